@@ -1,12 +1,40 @@
-from typing import Literal
+from collections.abc import Callable, Hashable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+import json
+import threading
+from typing import Literal, TypeVar
 from uuid import UUID
 
-from httpx import Client, Response
+from httpx import (
+    BaseTransport,
+    Client,
+    HTTPError,
+    HTTPStatusError,
+    QueryParams,
+    Response,
+    TransportError,
+)
+from pydantic import ValidationError
 
 from vaultwarden.models.exception_models import BitwardenError
-from vaultwarden.models.sync import ConnectToken, SyncData
-from vaultwarden.utils.crypto import make_master_key
-from vaultwarden.utils.logger import log_raise_for_status
+from vaultwarden.models.sync import ConnectToken, PreloginResponse, SyncData
+from vaultwarden.models.vault import Vault, VaultItem
+from vaultwarden.utils.crypto import decrypt
+from vaultwarden.utils.kdf import (
+    KdfParams,
+    derive_master_key,
+    derive_master_key_async,
+)
+from vaultwarden.utils.key_cache import RSAKeyCache
+from vaultwarden.utils.logger import log_raise_for_status, logger
+from vaultwarden.utils.single_flight import SingleFlight
+from vaultwarden.utils.sync_cache import CACHED_TOKEN_FIELDS, SyncCache
+
+T = TypeVar("T")
+
+# KDF parameters of the prelogin, and the master key derived with them
+PreloginKey = tuple[KdfParams, Future[bytes]]
 
 
 class BitwardenAPIClient:
@@ -19,6 +47,10 @@ class BitwardenAPIClient:
         client_secret: str,
         device_id: UUID | str,
         timeout: int = 30,
+        sync_cache: SyncCache | None = None,
+        eager_kdf: bool = False,
+        rsa_key_cache: RSAKeyCache | None = None,
+        transport: BaseTransport | None = None,
     ):
         # if one of the parameters is None, raise an exception
         if not all(
@@ -31,23 +63,79 @@ class BitwardenAPIClient:
         self.client_secret = client_secret
         self.device_id = device_id
         self.url = url.strip("/")
+        # the transport may be a ConnectionPool shared with other clients
         self._http_client = Client(
             base_url=f"{self.url}/",
             event_hooks={"response": [log_raise_for_status]},
             headers={"Bitwarden-Client-Version": "2024.1.0"},
             timeout=timeout,
+            transport=transport,
         )
         self._connect_token: ConnectToken | None = None
         self._sync: SyncData | None = None
+        self._vault: Vault | None = None
+        self._sync_revision: int | None = None
+        self.sync_cache = sync_cache
+        # imported RSA keys, the cache shared by the clients if None
+        self.rsa_key_cache = rsa_key_cache
+        self._sync_invalidated = False
+        # the master key and the KDF parameters it was derived with
+        self._master_key: tuple[KdfParams, bytes] | None = None
+        self._prelogin: Future[PreloginKey | None] | None = None
+        self._prelogin_lock = threading.Lock()
+        self._flights = SingleFlight()
+        if eager_kdf:
+            self.prepare_master_key()
 
     @property
     def connect_token(self) -> ConnectToken | None:
         return self._connect_token
 
     @connect_token.setter
-    def connect_token(self, value: ConnectToken):
+    def connect_token(self, value: ConnectToken | None):
         self._connect_token = value
 
+    def _prelogin_master_key(self) -> PreloginKey | None:
+        try:
+            resp = self._http_client.post(
+                "identity/accounts/prelogin", json={"email": self.email}
+            )
+            params = KdfParams.from_settings(
+                PreloginResponse.model_validate_json(resp.text)
+            )
+        except (HTTPError, ValidationError, BitwardenError) as e:
+            logger.warning(f"Prelogin failed, deriving after login: {e}")
+            return None
+        return params, derive_master_key_async(
+            self.password, self.email, params
+        )
+
+    def prepare_master_key(self) -> None:
+        """Start deriving the master key in background, with the KDF
+        parameters of the prelogin, unless already derived or started"""
+        with self._prelogin_lock:
+            if self._master_key is not None or self._prelogin is not None:
+                return
+            executor = ThreadPoolExecutor(max_workers=1)
+            self._prelogin = executor.submit(self._prelogin_master_key)
+            executor.shutdown(wait=False)
+
+    def _derive_master_key(self, token: ConnectToken) -> bytes:
+        """Get the master key for the KDF parameters of a token: the one
+        already derived, the one of the prelogin, or a new derivation"""
+        params = KdfParams.from_settings(token)
+        if self._master_key is not None and self._master_key[0] == params:
+            return self._master_key[1]
+        with self._prelogin_lock:
+            prelogin, self._prelogin = self._prelogin, None
+        started = prelogin.result() if prelogin is not None else None
+        if started is not None and started[0] == params:
+            master_key = started[1].result()
+        else:
+            master_key = derive_master_key(self.password, self.email, params)
+        self._master_key = (params, master_key)
+        return master_key
+
     # refresh connect token if expired
     def _refresh_connect_token(self):
         if (
@@ -68,13 +156,13 @@ class BitwardenAPIClient:
         )
         self._connect_token = ConnectToken.model_validate_json(resp.text)
 
-        self._connect_token.master_key = make_master_key(
-            password=self.password,
-            salt=self.email,
-            iterations=self._connect_token.KdfIterations,
+        self._connect_token.master_key = self._derive_master_key(
+            self._connect_token
         )
 
     def _set_connect_token(self):
+        # derived while the token is requested
+        self.prepare_master_key()
         headers = {
             "content-type": "application/x-www-form-urlencoded; charset=utf-8",
         }
@@ -92,14 +180,17 @@ class BitwardenAPIClient:
             "identity/connect/token", headers=headers, data=payload
         )
         self._connect_token = ConnectToken.model_validate_json(resp.text)
-        self._connect_token.master_key = make_master_key(
-            password=self.password,
-            salt=self.email,
-            iterations=self._connect_token.KdfIterations,
+        self._connect_token.master_key = self._derive_master_key(
+            self._connect_token
         )
 
     # login to api
     def _api_login(self) -> None:
+        if self.connect_token is None or self.connect_token.is_expired():
+            # concurrent requests share a single login
+            self.coalesce("login", self._login)
+
+    def _login(self) -> None:
         if self.connect_token is not None:
             if self.connect_token.is_expired():
                 self._refresh_connect_token()
@@ -111,30 +202,242 @@ class BitwardenAPIClient:
         self,
         method: Literal["GET", "POST", "DELETE", "PUT"],
         path: str,
+        fresh: bool = False,
         **kwargs,
     ) -> Response:
+        """
+        Send a request to the API, identical concurrent GETs share a single
+        response
+        :param fresh: send the request, instead of joining an identical GET
+            in flight which may predate a write, to reload after writes
+        """
+        if fresh:
+            return self._send(method, path, **kwargs)
         return self._api_request(method, path, **kwargs)
 
-    def _api_request(
-        self,
-        method: Literal["GET", "POST", "DELETE", "PUT"],
-        path: str,
-        **kwargs,
-    ) -> Response:
+    def _api_headers(self) -> dict[str, str]:
         self._api_login()
         if self.connect_token is None:
             raise BitwardenError("Fail to connect")
-        headers = {
+        return {
             "Authorization": f"Bearer {self.connect_token.access_token}",
             "content-type": "application/json; charset=utf-8",
             "Accept": "*/*",
         }
+
+    def coalesce(self, key: Hashable, func: Callable[[], T]) -> T:
+        """Run `func` once for the threads calling concurrently with the
+        same key, they share its result"""
+        return self._flights.do(key, func)
+
+    def _api_request(
+        self,
+        method: Literal["GET", "POST", "DELETE", "PUT"],
+        path: str,
+        **kwargs,
+    ) -> Response:
+        if method == "GET" and kwargs.keys() <= {"params"}:
+            # identical concurrent GETs share a single response
+            return self.coalesce(
+                (method, path, str(QueryParams(kwargs.get("params")))),
+                lambda: self._send(method, path, **kwargs),
+            )
+        return self._send(method, path, **kwargs)
+
+    def _send(
+        self,
+        method: Literal["GET", "POST", "DELETE", "PUT"],
+        path: str,
+        **kwargs,
+    ) -> Response:
+        headers = self._api_headers()
+        if "files" in kwargs:
+            # let httpx set the multipart content-type and its boundary
+            del headers["content-type"]
         return self._http_client.request(
             method, path, headers=headers, **kwargs
         )
 
+    @contextmanager
+    def api_stream(
+        self,
+        method: Literal["GET", "POST", "PUT"],
+        path: str,
+        **kwargs,
+    ) -> Iterator[Response]:
+        """Send a request whose response body is read lazily"""
+        headers = self._api_headers()
+        with self._http_client.stream(
+            method, path, headers=headers, **kwargs
+        ) as resp:
+            yield resp
+
     def sync(self, force_refresh: bool = False) -> SyncData:
-        if self._sync is None or force_refresh:
-            resp = self._api_request("GET", "api/sync")
-            self._sync = SyncData.model_validate_json(resp.text)
+        if self._sync is None or force_refresh or self._sync_invalidated:
+            # concurrent callers share a single fetch and parse
+            return self.coalesce(
+                ("sync", force_refresh),
+                lambda: self._refresh_sync(force_refresh),
+            )
+        return self._sync
+
+    def _refresh_sync(
+        self,
+        force_refresh: bool,
+        fresh: bool = False,
+        revision: int | None = None,
+    ) -> SyncData:
+        # cleared first so that invalidations received meanwhile stick
+        invalidated, self._sync_invalidated = self._sync_invalidated, False
+        try:
+            self._sync = self._fetch_sync(
+                force_refresh or invalidated, fresh, revision
+            )
+        except BaseException:
+            self._sync_invalidated = self._sync_invalidated or invalidated
+            raise
+        return self._sync
+
+    def _fetch_sync(
+        self,
+        force_refresh: bool,
+        fresh: bool = False,
+        revision: int | None = None,
+    ) -> SyncData:
+        if self.sync_cache is not None:
+            return self._cached_sync(
+                self.sync_cache, force_refresh, fresh, revision
+            )
+        resp = self.api_request("GET", "api/sync", fresh=fresh)
+        self._sync_revision = None
+        return SyncData.model_validate_json(resp.text)
+
+    def invalidate_sync(self) -> None:
+        """Fetch the sync from the server on the next access"""
+        self._sync_invalidated = True
+
+    def _use_cached_token(self, token: str) -> None:
+        """Restore the keys of the user from a cached sync, offline"""
+        if self._connect_token is not None:
+            return
+        # expired, the next request to the server logs in
+        self._connect_token = ConnectToken.model_validate_json(token)
+        self._connect_token.master_key = self._derive_master_key(
+            self._connect_token
+        )
+
+    def _cached_sync(
+        self,
+        cache: SyncCache,
+        force_refresh: bool,
+        fresh: bool = False,
+        revision: int | None = None,
+    ) -> SyncData:
+        """
+        Serve the sync from the cache, revalidated against the server
+        :param revision: the revision date just fetched by the caller, not
+            fetched again
+        """
+        account = f"{self.url}|{self.email.lower()}"
+        entry = cache.get(account)
+        if entry is not None and not force_refresh and cache.is_fresh(entry):
+            self._use_cached_token(entry.token)
+            self._sync_revision = entry.revision
+            return SyncData.model_validate_json(entry.payload)
+        try:
+            if revision is None:
+                revision = self.revision_date()
+            if (
+                entry is not None
+                and not force_refresh
+                and entry.revision == revision
+            ):
+                cache.touch(account)
+                payload = entry.payload
+            else:
+                payload = self.api_request("GET", "api/sync", fresh=fresh).text
+                assert self.connect_token is not None
+                token = self.connect_token.model_dump(
+                    include=CACHED_TOKEN_FIELDS
+                )
+                token.update(
+                    access_token="",
+                    expires_in=0,
+                    token_type="Bearer",
+                    scope="api",
+                )
+                cache.put(account, revision, json.dumps(token), payload)
+        except (TransportError, HTTPStatusError) as e:
+            # a reverse proxy answers 502, 503 or 504 for a server down
+            if entry is None or (
+                isinstance(e, HTTPStatusError) and e.response.status_code < 500
+            ):
+                raise
+            logger.warning(f"Serving the cached sync, server unreachable: {e}")
+            self._use_cached_token(entry.token)
+            revision, payload = entry.revision, entry.payload
+        self._sync_revision = revision
+        return SyncData.model_validate_json(payload)
+
+    def revision_date(self) -> int:
+        """Last modification of the account data, in ms since the epoch"""
+        resp = self._api_request("GET", "api/accounts/revision-date")
+        return int(resp.text)
+
+    def sync_if_changed(self) -> SyncData:
+        """Sync again only if the account data changed since the last sync"""
+        revision = self.revision_date()
+        if self._sync is None or revision != self._sync_revision:
+            # not joining a sync in flight, it may predate the revision
+            self._refresh_sync(True, fresh=True, revision=revision)
+            self._sync_revision = revision
+        assert self._sync is not None
         return self._sync
+
+    def vault(self, force_refresh: bool = False) -> Vault:
+        """Decrypted view of the ciphers of the user"""
+        sync = self.sync(force_refresh=force_refresh)
+        if self._vault is None or self._vault.sync is not sync:
+            if self.connect_token is None:
+                raise BitwardenError("Fail to connect")
+            self._vault = Vault(
+                sync, self.connect_token, rsa_key_cache=self.rsa_key_cache
+            )
+        return self._vault
+
+    def get_secret(
+        self,
+        name: str | None = None,
+        uri: str | None = None,
+        collection: str | None = None,
+        check_revision: bool = False,
+    ) -> VaultItem | None:
+        """
+        Get the cipher matching all the given criteria from the vault index
+        :param name: decrypted name of the cipher
+        :param uri: URI whose host matches one of the cipher URIs
+        :param collection: decrypted path of a collection of the cipher
+        :param check_revision: sync again first if the account data changed
+        :return: the cipher, None if no cipher matches
+        """
+        if check_revision:
+            self.sync_if_changed()
+        return self.vault().get_secret(
+            name=name, uri=uri, collection=collection
+        )
+
+    def organization_key(self, organization_id: UUID | str) -> bytes:
+        """Decrypt the symmetric key of an organization of the user"""
+        sync = self.sync()
+        raw_key = None
+        for org in sync.Profile.Organizations:
+            if str(org.Id) == str(organization_id):
+                raw_key = org.Key
+                break
+        if raw_key is None or self.connect_token is None:
+            raise BitwardenError(f"No Organizations `{organization_id}` found")
+        return decrypt(
+            raw_key,
+            self.connect_token.orgs_key,
+            key_cache=self.rsa_key_cache,
+        )
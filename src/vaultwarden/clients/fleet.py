@@ -0,0 +1,234 @@
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Any, Generic, TypeVar
+
+from vaultwarden.clients.bitwarden import BitwardenAPIClient
+from vaultwarden.clients.vaultwarden import VaultwardenAdminClient
+from vaultwarden.models.exception_models import VaultwardenAdminError
+from vaultwarden.models.sync import VaultwardenUser
+from vaultwarden.utils.logger import logger
+
+T = TypeVar("T")
+
+# Number of calls run concurrently, all instances together
+FLEET_MAX_WORKERS = 16
+# Number of calls run concurrently on a single instance
+INSTANCE_MAX_CONCURRENCY = 4
+
+
+class RateLimiter:
+    """Space the calls evenly, at most `rate` per second"""
+
+    def __init__(self, rate: float):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.interval = 1 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+@dataclass
+class Instance:
+    """
+    A Vaultwarden server of the fleet
+    :param name: the tag of the results of the instance
+    :param admin: the admin client of the instance
+    :param api: the API client of the instance
+    :param max_concurrency: the number of calls run concurrently on it
+    :param rate_limit: the maximum number of calls started per second
+    """
+
+    name: str
+    admin: VaultwardenAdminClient | None = None
+    api: BitwardenAPIClient | None = None
+    max_concurrency: int = INSTANCE_MAX_CONCURRENCY
+    rate_limit: float | None = None
+    _slots: threading.Semaphore = field(init=False, repr=False)
+    _limiter: RateLimiter | None = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._slots = threading.Semaphore(self.max_concurrency)
+        self._limiter = (
+            RateLimiter(self.rate_limit) if self.rate_limit else None
+        )
+
+    @property
+    def admin_client(self) -> VaultwardenAdminClient:
+        if self.admin is None:
+            raise VaultwardenAdminError(f"No admin client for {self.name}")
+        return self.admin
+
+    @property
+    def api_client(self) -> BitwardenAPIClient:
+        if self.api is None:
+            raise VaultwardenAdminError(f"No API client for {self.name}")
+        return self.api
+
+    def call(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a call within the concurrency and rate limits"""
+        with self._slots:
+            if self._limiter is not None:
+                self._limiter.acquire()
+            return func(*args)
+
+
+@dataclass
+class FleetResult(Generic[T]):
+    """Result of a call on an instance, or the exception it raised"""
+
+    instance: str
+    value: T | None = None
+    error: Exception | None = None
+    # the item the call was made for, like the email of an invitation
+    item: Any = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class VaultwardenFleet:
+    """Admin and API clients of several Vaultwarden instances.
+
+    The calls are broadcast to the instances concurrently, so a fleet-wide
+    query takes as long as the slowest instance. The results are tagged
+    with the name of their instance, and failures are returned, not raised.
+
+    Args:
+        instances: The instances, their names must be unique.
+        max_workers: The number of calls run concurrently, all instances
+            together.
+    """
+
+    def __init__(
+        self,
+        instances: Iterable[Instance] = (),
+        max_workers: int = FLEET_MAX_WORKERS,
+    ):
+        self.instances: dict[str, Instance] = {}
+        self.max_workers = max_workers
+        for instance in instances:
+            self.add(instance)
+
+    def add(self, instance: Instance) -> None:
+        if instance.name in self.instances:
+            raise VaultwardenAdminError(
+                f"Instance '{instance.name}' already in the fleet"
+            )
+        self.instances[instance.name] = instance
+
+    def _select(self, names: Iterable[str] | None) -> list[Instance]:
+        if names is None:
+            return list(self.instances.values())
+        try:
+            return [self.instances[name] for name in names]
+        except KeyError as e:
+            raise VaultwardenAdminError(f"Unknown instance {e}") from None
+
+    def _run(
+        self,
+        instance: Instance,
+        func: Callable[..., T],
+        item: Any,
+        with_item: bool,
+    ) -> FleetResult[T]:
+        args = (instance, item) if with_item else (instance,)
+        try:
+            value = instance.call(func, *args)
+        except Exception as e:
+            logger.warning(f"Fleet call failed on {instance.name}: {e}")
+            return FleetResult(instance.name, error=e, item=item)
+        return FleetResult(instance.name, value=value, item=item)
+
+    def broadcast(
+        self,
+        func: Callable[..., T],
+        items: Iterable[Any] | None = None,
+        instances: Iterable[str] | None = None,
+    ) -> list[FleetResult[T]]:
+        """
+        Call a function on every instance
+        :param func: called with the instance, and an item if items given
+        :param items: call the function for each item on every instance
+        :param instances: names of the instances, defaults to all of them
+        :return: the results, by instance then item
+        """
+        selected = self._select(instances)
+        # None is an item like any other when items are given
+        with_item = items is not None
+        each = [None] if items is None else list(items)
+        tasks = [(instance, item) for instance in selected for item in each]
+        if not tasks:
+            return []
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(tasks))
+        ) as executor:
+            return list(
+                executor.map(
+                    lambda t: self._run(t[0], func, t[1], with_item),
+                    tasks,
+                )
+            )
+
+    def users(
+        self,
+        instances: Iterable[str] | None = None,
+        **kwargs: Any,
+    ) -> list[FleetResult[list[VaultwardenUser]]]:
+        """The users of every instance, see `VaultwardenAdminClient.users`
+        for the filters"""
+        return self.broadcast(
+            lambda instance: instance.admin_client.users(**kwargs),
+            instances=instances,
+        )
+
+    def all_users(
+        self, instances: Iterable[str] | None = None, **kwargs: Any
+    ) -> list[tuple[str, VaultwardenUser]]:
+        """The users of the reachable instances, tagged with their name"""
+        return [
+            (result.instance, user)
+            for result in self.users(instances, **kwargs)
+            if result.value is not None
+            for user in result.value
+        ]
+
+    def user(
+        self,
+        email: str | None = None,
+        uuid: str | None = None,
+        instances: Iterable[str] | None = None,
+    ) -> list[FleetResult[VaultwardenUser]]:
+        """Find a user on every instance, the result of the instances it is
+        missing from holds a VaultwardenAdminError"""
+        return self.broadcast(
+            lambda instance: instance.admin_client.user(
+                email=email, uuid=uuid
+            ),
+            instances=instances,
+        )
+
+    def invite(
+        self,
+        emails: str | Iterable[str],
+        instances: Iterable[str] | None = None,
+    ) -> list[FleetResult[bool]]:
+        """Invite users on every instance, the emails are the result items"""
+        if isinstance(emails, str):
+            emails = [emails]
+        return self.broadcast(
+            lambda instance, email: instance.admin_client.invite(email),
+            items=emails,
+            instances=instances,
+        )
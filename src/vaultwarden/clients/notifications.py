@@ -0,0 +1,202 @@
+from collections.abc import Callable, Iterator
+import json
+import threading
+from typing import TYPE_CHECKING, Any
+import weakref
+
+from vaultwarden.models.enum import UpdateType
+from vaultwarden.models.exception_models import BitwardenError
+from vaultwarden.utils.logger import logger
+
+try:
+    import msgpack
+    from websockets.sync.client import connect
+except ImportError:  # pragma: no cover
+    msgpack = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from vaultwarden.clients.bitwarden import BitwardenAPIClient
+    from vaultwarden.models.bitwarden import Organization
+
+# SignalR messages are terminated by this separator during the handshake
+RECORD_SEPARATOR = b"\x1e"
+HANDSHAKE = json.dumps({"protocol": "messagepack", "version": 1})
+# SignalR invocation message type
+INVOCATION = 1
+
+# Seconds to wait before reconnecting, doubled up to the maximum
+RECONNECT_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+
+CIPHER_UPDATES = {
+    UpdateType.SyncCipherUpdate,
+    UpdateType.SyncCipherCreate,
+    UpdateType.SyncLoginDelete,
+    UpdateType.SyncCipherDelete,
+}
+# Events about something else than the sync data
+NON_SYNC_UPDATES = {
+    UpdateType.LogOut,
+    UpdateType.AuthRequest,
+    UpdateType.AuthRequestResponse,
+    UpdateType.Null,
+}
+
+
+def iter_messages(data: bytes) -> Iterator[Any]:
+    """Split a frame into SignalR messagepack messages and decode them"""
+    pos = 0
+    while pos < len(data):
+        # the length of each message is prefixed as a varint
+        length = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        yield msgpack.unpackb(data[pos : pos + length])
+        pos += length
+
+
+class NotificationsListener:
+    """Invalidate the client caches on the notifications of the server.
+
+    The listener connects to the websocket notifications hub from a
+    background thread, and reconnects when the connection drops.
+
+    Args:
+        client: The client whose sync cache is invalidated.
+        url: The notifications hub url, derived from the client url if None.
+        on_event: A function called with the type and payload of each event.
+    """
+
+    def __init__(
+        self,
+        client: "BitwardenAPIClient",
+        url: str | None = None,
+        on_event: Callable[[UpdateType, dict], None] | None = None,
+    ):
+        if msgpack is None:
+            raise BitwardenError(
+                "Notifications require the websockets and msgpack packages, "
+                "install python-vaultwarden[notifications]"
+            )
+        self.client = client
+        if url is None:
+            url = client.url.replace("http", "ws", 1) + "/notifications/hub"
+        self.url = url
+        self.on_event = on_event
+        self._organizations: list[weakref.ref["Organization"]] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._websocket: Any = None
+        self.connected = threading.Event()
+
+    def watch(self, organization: "Organization") -> None:
+        """Also invalidate the caches of an organization"""
+        self._organizations.append(weakref.ref(organization))
+
+    def organizations(self) -> list["Organization"]:
+        alive = [org for org in (ref() for ref in self._organizations) if org]
+        self._organizations = [weakref.ref(org) for org in alive]
+        return alive
+
+    def handle_event(self, update_type: UpdateType, payload: dict) -> None:
+        """Invalidate the cached sections an event is about"""
+        if update_type == UpdateType.LogOut:
+            self.client.connect_token = None
+        if update_type in NON_SYNC_UPDATES:
+            return
+        self.client.invalidate_sync()
+        organization_id = str(payload.get("OrganizationId"))
+        for org in self.organizations():
+            if (
+                update_type in CIPHER_UPDATES
+                and str(org.Id) == organization_id
+            ):
+                org._ciphers = None
+            if update_type in {UpdateType.SyncCiphers, UpdateType.SyncVault}:
+                org._ciphers = None
+            if update_type in {UpdateType.SyncOrgKeys, UpdateType.SyncVault}:
+                org._users = None
+                org._collections = None
+                org._groups = None
+
+    def handle_frame(self, data: bytes) -> None:
+        for message in iter_messages(data):
+            if not message or message[0] != INVOCATION:
+                continue
+            if message[3] != "ReceiveMessage":
+                continue
+            for argument in message[4]:
+                try:
+                    update_type = UpdateType(argument["Type"])
+                except ValueError:
+                    continue
+                payload = argument.get("Payload") or {}
+                logger.debug(f"Notification {update_type.name}: {payload}")
+                self.handle_event(update_type, payload)
+                if self.on_event is not None:
+                    self.on_event(update_type, payload)
+
+    def _listen(self) -> None:
+        self.client._api_login()
+        token = self.client.connect_token
+        if token is None:
+            raise BitwardenError("Fail to connect")
+        with connect(
+            f"{self.url}?access_token={token.access_token}"
+        ) as websocket:
+            self._websocket = websocket
+            websocket.send(HANDSHAKE + RECORD_SEPARATOR.decode())
+            response = websocket.recv()
+            if isinstance(response, str):
+                response = response.encode()
+            handshake, _, rest = response.partition(RECORD_SEPARATOR)
+            if json.loads(handshake).get("error"):
+                raise BitwardenError(f"Handshake refused: {handshake!r}")
+            # events that happened while disconnected are unknown
+            if self.client._sync is not None:
+                self.client.invalidate_sync()
+            self.connected.set()
+            if rest:
+                self.handle_frame(rest)
+            for frame in websocket:
+                if isinstance(frame, bytes):
+                    self.handle_frame(frame)
+
+    def _run(self) -> None:
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            try:
+                self._listen()
+                delay = RECONNECT_DELAY
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logger.warning(f"Notifications hub disconnected: {e}")
+            finally:
+                self.connected.clear()
+                self._websocket = None
+            self._stop.wait(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="vaultwarden-notifications", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        websocket = self._websocket
+        if websocket is not None:
+            websocket.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -1,9 +1,18 @@
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import http
 from http.cookiejar import Cookie
 from typing import Any, Literal
 from uuid import UUID
 
-from httpx import Client, HTTPStatusError, Response
+from httpx import (
+    BaseTransport,
+    Client,
+    HTTPStatusError,
+    QueryParams,
+    Response,
+)
 from pydantic import TypeAdapter
 
 from vaultwarden.clients.bitwarden import BitwardenAPIClient
@@ -11,13 +20,17 @@ from vaultwarden.models.bitwarden import get_organization
 from vaultwarden.models.enum import VaultwardenUserStatus
 from vaultwarden.models.exception_models import VaultwardenAdminError
 from vaultwarden.models.sync import VaultwardenUser
+from vaultwarden.models.user_index import SweepReport, UserIndex, UserQuery
 from vaultwarden.utils.logger import log_raise_for_status, logger
+from vaultwarden.utils.single_flight import SingleFlight
+
+# Number of accounts disabled concurrently by a sweep
+SWEEP_MAX_WORKERS = 8
 
 
 class VaultwardenAdminClient:
     _users: list[VaultwardenUser]
-    _users_index: dict[UUID, int]
-    _users_alias: dict[str, UUID]
+    _index: UserIndex
 
     def __init__(
         self,
@@ -25,20 +38,25 @@ class VaultwardenAdminClient:
         admin_secret_token: str,
         preload_users: bool,
         timeout: int = 30,
+        transport: BaseTransport | None = None,
     ):
         # If url or admin_secret_token is None, raise an exception
         if not url or not admin_secret_token:
             raise VaultwardenAdminError("Missing url or admin_secret_token")
         self.admin_secret_token = admin_secret_token
         self.url = url.strip("/")
+        # the transport may be a ConnectionPool shared with other clients
         self._http_client = Client(
             base_url=f"{self.url}/admin/",
             event_hooks={"response": [log_raise_for_status]},
             timeout=timeout,
+            transport=transport,
         )
-        self._users_index = {}
-        self._users_alias = {}
         self._users = []
+        self._index = UserIndex(self._users)
+        self._flights = SingleFlight()
+        # counts the fresh loads, a shared load ending after one is older
+        self._users_version = 0
         # Preload all users infos
         if preload_users:
             self._load_users()
@@ -57,22 +75,79 @@ class VaultwardenAdminClient:
             # Cookie is valid, nothing to do
             return
 
-        # Refresh
-        self._http_client.post("", data={"token": self.admin_secret_token})
+        # Refresh, once for the concurrent requests
+        self._flights.do(
+            "login",
+            lambda: self._http_client.post(
+                "", data={"token": self.admin_secret_token}
+            ),
+        )
 
     def _admin_request(
         self, method: Literal["GET", "POST"], path: str, **kwargs: Any
+    ) -> Response:
+        if method == "GET" and kwargs.keys() <= {"params"}:
+            # identical concurrent GETs share a single response
+            return self._flights.do(
+                (method, path, str(QueryParams(kwargs.get("params")))),
+                lambda: self._send(method, path, **kwargs),
+            )
+        return self._send(method, path, **kwargs)
+
+    def _send(
+        self, method: Literal["GET", "POST"], path: str, **kwargs: Any
     ) -> Response:
         self._admin_login()
         return self._http_client.request(method, path, **kwargs)
 
-    def _load_users(self) -> None:
-        resp = self._admin_request("GET", "users")
-        self._users = TypeAdapter(list[VaultwardenUser]).validate_json(
-            resp.text
+    def _load_users(self, fresh: bool = False) -> None:
+        """
+        Load the users and index them
+        :param fresh: send the request, instead of joining a load already
+            in flight which may predate a write, after writes
+        """
+        if fresh:
+            self._users, self._index = self._fetch_users(fresh=True)
+            self._users_version += 1
+            return
+        version = self._users_version
+        # concurrent loads share a single parse and index
+        users, index = self._flights.do("users", self._fetch_users)
+        if version == self._users_version:
+            self._users, self._index = users, index
+
+    def _fetch_users(
+        self, fresh: bool = False
+    ) -> tuple[list[VaultwardenUser], UserIndex]:
+        if fresh:
+            resp = self._send("GET", "users")
+        else:
+            resp = self._admin_request("GET", "users")
+        users = TypeAdapter(list[VaultwardenUser]).validate_json(resp.text)
+        return users, UserIndex(users)
+
+    def _set_cached_enabled(
+        self, identifier: str | UUID, enabled: bool
+    ) -> None:
+        """Patch a cached user in place of reloading all the users"""
+        try:
+            position = self._index.position(UUID(str(identifier)))
+        except ValueError:
+            return
+        if position is None:
+            return
+        user = self._users[position]
+        status = user.status
+        # invited users have no password yet, whatever their enabled flag
+        if status != VaultwardenUserStatus.Invited:
+            status = (
+                VaultwardenUserStatus.Enabled
+                if enabled
+                else VaultwardenUserStatus.Disabled
+            )
+        self._index.update(
+            user.model_copy(update={"UserEnabled": enabled, "status": status})
         )
-        self._users_index = {u.Id: i for i, u in enumerate(self._users)}
-        self._users_alias = {u.Email: u.Id for u in self._users}
 
     def user(
         self, email=None, uuid=None, force_refresh=False
@@ -83,15 +158,18 @@ class VaultwardenAdminClient:
             raise VaultwardenAdminError("Both email and id given")
         if force_refresh or not self._users:
             self._load_users()
-        res_uuid = uuid
         if email is not None:
-            res_uuid = self._users_alias.get(email)
-        if res_uuid is None:
-            raise VaultwardenAdminError(f"User '{email}' not found")
-        index = self._users_index.get(res_uuid)
-        if index is None:
-            raise VaultwardenAdminError(f"User '{res_uuid}' not found")
-        return self._users[index]
+            user = self._index.by_email.get(email)
+            if user is None:
+                raise VaultwardenAdminError(f"User '{email}' not found")
+            return user
+        try:
+            user = self._index.by_id.get(UUID(str(uuid)))
+        except ValueError:
+            user = None
+        if user is None:
+            raise VaultwardenAdminError(f"User '{uuid}' not found")
+        return user
 
     def get_user(
         self, email=None, uuid=None, force_refresh=False
@@ -116,21 +194,38 @@ class VaultwardenAdminClient:
         | dict[str, VaultwardenUser]
         | dict[UUID, VaultwardenUser]
     ):
-        if force_refresh or not self._users:
-            self._load_users()
-        res = self._users
+        if mfa is None and enabled is None and not exclude_invited:
+            if force_refresh or not self._users:
+                self._load_users()
+            # copies, the dicts of the index back the user lookups
+            if as_email_dict:
+                return dict(self._index.by_email)
+            if as_uuid_dict:
+                return dict(self._index.by_id)
+            return self._users
+        query = self.query(force_refresh=force_refresh)
         if mfa is not None:
-            res = [u for u in self._users if u.TwoFactorEnabled == mfa]
+            query.mfa(mfa)
         if enabled is not None:
-            res = [u for u in res if u.UserEnabled == enabled]
+            query.enabled(enabled)
         if exclude_invited:
-            res = [u for u in res if u.status != VaultwardenUserStatus.Invited]
+            query.exclude_invited()
+        res = query.all()
         if as_email_dict:
             return {u.Email: u for u in res}
         if as_uuid_dict:
             return {u.Id: u for u in res}
         return res
 
+    def query(self, force_refresh: bool = False) -> UserQuery:
+        """
+        Filter the users with the indexes, for instance
+        `client.query().enabled().mfa(False).last_active(before=date).all()`
+        """
+        if force_refresh or not self._users:
+            self._load_users()
+        return self._index.query()
+
     # User Management Part
     def invite(self, email: str) -> bool:
         try:
@@ -139,7 +234,7 @@ class VaultwardenAdminClient:
             if e.response.status_code != http.HTTPStatus.CONFLICT:
                 logger.warning(f"Failed to invite {email} {e}")
                 return False
-        self._load_users()
+        self._load_users(fresh=True)
         return True
 
     def delete(self, identifier: str | UUID) -> bool:
@@ -149,7 +244,7 @@ class VaultwardenAdminClient:
         except HTTPStatusError as e:
             logger.warning(f"Failed to delete {identifier} {e}")
             return False
-        self._load_users()
+        self._load_users(fresh=True)
         logger.info(f"Successfully deleted account: {identifier}")
         return True
 
@@ -164,10 +259,89 @@ class VaultwardenAdminClient:
         except HTTPStatusError as e:
             logger.warning(f"Failed to disable {identifier} {e}")
             return False
-        self._load_users()
+        self._load_users(fresh=True)
         logger.info(f"Successfully disabled account: {identifier}")
         return True
 
+    def disable_inactive_users(
+        self,
+        inactive_for: timedelta,
+        dry_run: bool = False,
+        exclude: Iterable[str | UUID] = (),
+        include_never_active: bool = True,
+        max_workers: int = SWEEP_MAX_WORKERS,
+        now: datetime | None = None,
+        force_refresh: bool = False,
+    ) -> SweepReport:
+        """
+        Disable the enabled accounts inactive for a duration, invited
+        accounts are left alone
+        :param inactive_for: the inactivity duration
+        :param dry_run: only report the accounts that would be disabled
+        :param exclude: emails or ids of accounts to keep enabled
+        :param include_never_active: also disable the accounts never active,
+            created before the cutoff
+        :param max_workers: the number of accounts disabled concurrently
+        :param now: the reference date, defaults to now
+        :param force_refresh: reload the users before selecting them
+        :return: the report of the sweep, the users are reloaded once after
+            disabling
+        """
+        cutoff = (now or datetime.now(timezone.utc)) - inactive_for
+        candidates = (
+            self.query(force_refresh=force_refresh)
+            .enabled()
+            .exclude_invited()
+            .last_active(before=cutoff)
+        ).all()
+        if include_never_active:
+            candidates += (
+                self.query()
+                .enabled()
+                .exclude_invited()
+                .never_active()
+                .created(before=cutoff)
+            ).all()
+        excluded = {str(identifier) for identifier in exclude}
+        candidates = [
+            user
+            for user in candidates
+            if user.Email not in excluded and str(user.Id) not in excluded
+        ]
+        report = SweepReport(
+            cutoff=cutoff, dry_run=dry_run, candidates=candidates
+        )
+        if dry_run or not candidates:
+            return report
+
+        def disable(user: VaultwardenUser) -> str | None:
+            try:
+                self._admin_request(
+                    "POST",
+                    f"users/{user.Id}/disable",
+                    headers={"Content-Type": "application/json"},
+                )
+            except HTTPStatusError as e:
+                return str(e)
+            return None
+
+        # log in once before the concurrent requests
+        self._admin_login()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            errors = list(executor.map(disable, candidates))
+        for user, error in zip(candidates, errors, strict=True):
+            if error is None:
+                report.disabled.append(user)
+            else:
+                logger.warning(f"Failed to disable {user.Email} {error}")
+                report.failed[user.Id] = error
+        self._load_users(fresh=True)
+        logger.info(
+            f"Disabled {len(report.disabled)} accounts inactive since "
+            f"{cutoff}, {len(report.failed)} failed"
+        )
+        return report
+
     def enable(self, identifier: str | UUID) -> bool:
         logger.info(f"Enabling {identifier} account")
         try:
@@ -179,7 +353,7 @@ class VaultwardenAdminClient:
         except HTTPStatusError as e:
             logger.warning(f"Failed to enable {identifier} {e}")
             return False
-        self._load_users()
+        self._load_users(fresh=True)
         logger.info(f"Successfully enabled account: {identifier}")
         return True
 
@@ -198,6 +372,7 @@ class VaultwardenAdminClient:
                 headers={"Content-Type": "application/json"},
             )
         resp.raise_for_status()
+        self._set_cached_enabled(identifier, enabled)
 
     def remove_2fa(self, uuid=None, email=None) -> bool:
         user = self.get_user(uuid=uuid, email=email)
@@ -0,0 +1,231 @@
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING, Literal
+from uuid import UUID
+
+from vaultwarden.models.enum import (
+    OrganizationUserStatus,
+    OrganizationUserType,
+)
+from vaultwarden.models.exception_models import BitwardenError
+
+if TYPE_CHECKING:
+    from vaultwarden.models.bitwarden import (
+        CollectionAccess,
+        OrganizationCollection,
+        OrganizationGroup,
+        OrganizationUserDetails,
+    )
+
+AccessPlane = Literal["access", "write", "view_passwords", "manage"]
+ACCESS_PLANES: tuple[AccessPlane, ...] = (
+    "access",
+    "write",
+    "view_passwords",
+    "manage",
+)
+
+# Users with these types can access every collection of the organization
+FULL_ACCESS_TYPES = {OrganizationUserType.Owner, OrganizationUserType.Admin}
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Positions of the set bits of an integer, lowest first"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def _planes(access: "CollectionAccess") -> tuple[bool, bool, bool, bool]:
+    return True, not access.ReadOnly, not access.HidePasswords, access.Manage
+
+
+class AccessMatrix:
+    """Bitset index of the access of the users to the collections.
+
+    Each plane keeps one integer per user whose bits are the collections it
+    has this access to, and one integer per collection whose bits are the
+    users, so bulk queries are bitwise operations. Direct and group grants
+    are merged, the most permissive one winning. Owners and admins have
+    every access to every collection, the users and groups with AccessAll
+    every access but manage. Only confirmed users have access: the invited
+    and accepted ones, listed in `pending`, get their grants once
+    confirmed.
+
+    Args:
+        users: The users of the organization.
+        collections: The collections of the organization.
+        groups: The groups of the organization, with their collections.
+    """
+
+    def __init__(
+        self,
+        users: list["OrganizationUserDetails"],
+        collections: list["OrganizationCollection"],
+        groups: list["OrganizationGroup"] | None = None,
+    ):
+        self.users = users
+        self.collections = collections
+        self.pending = [
+            user
+            for user in users
+            if user.Status
+            in (
+                OrganizationUserStatus.Invited,
+                OrganizationUserStatus.Accepted,
+            )
+        ]
+        self._user_index: dict[UUID, int] = {}
+        for i, user in enumerate(users):
+            for user_id in (user.Id, user.UserId):
+                if user_id is not None:
+                    self._user_index[user_id] = i
+        self._collection_index = {
+            coll.Id: j for j, coll in enumerate(collections) if coll.Id
+        }
+        all_collections = (1 << len(collections)) - 1
+        # bitset of the collections granted by each group, for each plane
+        group_grants: dict[UUID, list[int]] = {}
+        for group in groups or []:
+            grants = [0, 0, 0, 0]
+            if group.AccessAll:
+                grants = [all_collections] * 3 + [0]
+            for group_access in group.Collections:
+                self._grant(
+                    grants, group_access.CollectionId, _planes(group_access)
+                )
+            if group.Id is not None:
+                group_grants[group.Id] = grants
+
+        self._rows: dict[AccessPlane, list[int]] = {
+            plane: [0] * len(users) for plane in ACCESS_PLANES
+        }
+        for i, user in enumerate(users):
+            # the members can not decrypt anything until confirmed
+            if user.Status != OrganizationUserStatus.Confirmed:
+                continue
+            if user.Type in FULL_ACCESS_TYPES:
+                grants = [all_collections] * len(ACCESS_PLANES)
+            else:
+                grants = [0, 0, 0, 0]
+                if user.AccessAll:
+                    grants = [all_collections] * 3 + [0]
+                for access in user.Collections:
+                    self._grant(grants, access.CollectionId, _planes(access))
+                for group_id in user.Groups or []:
+                    granted = group_grants.get(UUID(str(group_id)))
+                    if granted is not None:
+                        grants = [
+                            a | b for a, b in zip(grants, granted, strict=True)
+                        ]
+            for plane, bits in zip(ACCESS_PLANES, grants, strict=True):
+                self._rows[plane][i] = bits
+
+        self._columns: dict[AccessPlane, list[int]] = {}
+        for plane, rows in self._rows.items():
+            # users mostly share the same rows, transpose each distinct one
+            users_by_row: dict[int, int] = {}
+            for i, bits in enumerate(rows):
+                users_by_row[bits] = users_by_row.get(bits, 0) | 1 << i
+            columns = [0] * len(collections)
+            for bits, user_bits in users_by_row.items():
+                for j in iter_bits(bits):
+                    columns[j] |= user_bits
+            self._columns[plane] = columns
+
+    def _grant(
+        self,
+        grants: list[int],
+        collection_id: UUID | None,
+        planes: tuple[bool, ...],
+    ) -> None:
+        j = self._collection_index.get(collection_id)  # type: ignore[arg-type]
+        if j is None:
+            return
+        for k, granted in enumerate(planes):
+            if granted:
+                grants[k] |= 1 << j
+
+    def _user_position(self, user_id: UUID | str) -> int:
+        i = self._user_index.get(UUID(str(user_id)))
+        if i is None:
+            raise BitwardenError(f"User {user_id} not found")
+        return i
+
+    def _collection_position(self, collection_id: UUID | str) -> int:
+        j = self._collection_index.get(UUID(str(collection_id)))
+        if j is None:
+            raise BitwardenError(f"Collection {collection_id} not found")
+        return j
+
+    def user_bits(
+        self, user_id: UUID | str, plane: AccessPlane = "access"
+    ) -> int:
+        """Bitset of the collections of a user, by organization user or
+        user id"""
+        return self._rows[plane][self._user_position(user_id)]
+
+    def collection_bits(
+        self, collection_id: UUID | str, plane: AccessPlane = "access"
+    ) -> int:
+        """Bitset of the users of a collection"""
+        return self._columns[plane][self._collection_position(collection_id)]
+
+    def can(
+        self,
+        user_id: UUID | str,
+        collection_id: UUID | str,
+        plane: AccessPlane = "access",
+    ) -> bool:
+        j = self._collection_position(collection_id)
+        return bool(self.user_bits(user_id, plane) >> j & 1)
+
+    def users_with(
+        self,
+        collection_ids: UUID | str | Iterable[UUID | str],
+        plane: AccessPlane = "access",
+        require_all: bool = False,
+    ) -> list["OrganizationUserDetails"]:
+        """
+        Get the users with an access to one or several collections
+        :param collection_ids: the collections to check
+        :param plane: the kind of access: access, write, view_passwords
+            or manage
+        :param require_all: only get the users with an access to all the
+            collections instead of any of them
+        :return:
+        """
+        if isinstance(collection_ids, (UUID, str)):
+            collection_ids = [collection_ids]
+        columns = [self.collection_bits(c, plane) for c in collection_ids]
+        bits = 0
+        if columns:
+            bits = columns[0]
+            for column in columns[1:]:
+                bits = bits & column if require_all else bits | column
+        return [self.users[i] for i in iter_bits(bits)]
+
+    def collections_of(
+        self,
+        user_ids: UUID | str | Iterable[UUID | str],
+        plane: AccessPlane = "access",
+        require_all: bool = False,
+    ) -> list["OrganizationCollection"]:
+        """
+        Get the collections one or several users have an access to
+        :param user_ids: the organization user or user ids to check
+        :param plane: the kind of access: access, write, view_passwords
+            or manage
+        :param require_all: only get the collections all the users have an
+            access to instead of any of them
+        :return:
+        """
+        if isinstance(user_ids, (UUID, str)):
+            user_ids = [user_ids]
+        rows = [self.user_bits(u, plane) for u in user_ids]
+        bits = 0
+        if rows:
+            bits = rows[0]
+            for row in rows[1:]:
+                bits = bits & row if require_all else bits | row
+        return [self.collections[j] for j in iter_bits(bits)]
@@ -1,22 +1,58 @@
-from typing import Generic, Literal, TypeVar, cast
+from base64 import b64decode
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from copy import deepcopy
+from datetime import datetime, timezone
+from functools import partial
+from secrets import token_bytes
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Generic, Literal, TypeVar, cast
 from uuid import UUID
 
+from httpx import Response
 from pydantic import AliasChoices, Field, TypeAdapter, field_validator
 from pydantic_core.core_schema import FieldValidationInfo
 
 from vaultwarden.clients.bitwarden import BitwardenAPIClient
-from vaultwarden.models.enum import CipherType, OrganizationUserType
+from vaultwarden.models.access import AccessMatrix
+from vaultwarden.models.collection_tree import CollectionTree
+from vaultwarden.models.enum import (
+    CipherType,
+    OrganizationUserStatus,
+    OrganizationUserType,
+)
 from vaultwarden.models.exception_models import BitwardenError
 from vaultwarden.models.permissive_model import PermissiveBaseModel
-from vaultwarden.utils.crypto import decrypt, encrypt
+from vaultwarden.utils.crypto import (
+    decrypt,
+    encrypt,
+    encrypt_asym,
+    encrypt_sym,
+)
+from vaultwarden.utils.crypto_stream import (
+    STREAM_CHUNK_SIZE,
+    decrypt_stream,
+    encrypt_stream,
+)
+from vaultwarden.utils.parallel import process_map
 
 # Pydantic models for Bitwarden data structures
 
 T = TypeVar("T", bound="BitwardenBaseModel")
 
+# Maximum number of ids sent in a single bulk organization request
+BULK_CHUNK_SIZE = 100
+# Maximum number of ciphers sent in a single import request
+IMPORT_CHUNK_SIZE = 500
+# Encrypted attachments larger than this are spooled to disk before upload
+ATTACHMENT_SPOOL_SIZE = 8 * 1024 * 1024
+# Number of collections updated concurrently by the subtree operations
+COLLECTIONS_MAX_WORKERS = 8
+
 
 class ResplistBitwarden(PermissiveBaseModel, Generic[T]):
     Data: list[T]
+    ContinuationToken: str | None = None
 
 
 class BitwardenBaseModel(PermissiveBaseModel):
@@ -37,12 +73,23 @@ class BitwardenBaseModel(PermissiveBaseModel):
         return self.bitwarden_client
 
 
+class CipherAttachment(BitwardenBaseModel):
+    Id: str
+    Url: str | None = None
+    FileName: str
+    Key: str | None = None
+    Size: str | None = None
+    SizeName: str | None = None
+
+
 class CipherDetails(BitwardenBaseModel):
     Id: UUID | None = None
     OrganizationId: UUID | None = Field(None, validate_default=True)
     Type: CipherType
     Name: str
     CollectionIds: list[UUID]
+    Key: str | None = None
+    Attachments: list[CipherAttachment] | None = None
 
     @field_validator("OrganizationId")
     @classmethod
@@ -51,6 +98,107 @@ class CipherDetails(BitwardenBaseModel):
             return info.context.get("parent_id")
         return v
 
+    def key(self) -> bytes:
+        """Symmetric key the fields and attachments of the cipher use"""
+        if self.OrganizationId is not None:
+            key = self.api_client.organization_key(self.OrganizationId)
+        else:
+            connect_token = self.api_client.connect_token
+            if connect_token is None:
+                raise BitwardenError("Fail to connect")
+            key = connect_token.user_key
+        if self.Key is not None:
+            key = decrypt(self.Key, key)
+        return key
+
+    def attachment(self, attachment_id: str) -> CipherAttachment:
+        resp = self.api_client.api_request(
+            "GET", f"api/ciphers/{self.Id}/attachment/{attachment_id}"
+        )
+        return CipherAttachment.model_validate_json(
+            resp.text, context={"client": self.api_client}
+        )
+
+    def download_attachment(
+        self,
+        attachment_id: str,
+        sink: BinaryIO,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> int:
+        """
+        Download and decrypt an attachment, chunk by chunk. The download is
+        spooled and verified first, the sink receives nothing if it fails.
+        :param attachment_id: id of the attachment
+        :param sink: file-like object the decrypted content is written to
+        :param chunk_size: size of the chunks read from the server
+        :return: the number of bytes written to the sink
+        """
+        attachment = self.attachment(attachment_id)
+        if attachment.Url is None:
+            raise BitwardenError(f"Attachment `{attachment_id}` has no url")
+        path = attachment.Url.removeprefix(f"{self.api_client.url}/")
+        if "://" in path:
+            raise BitwardenError(
+                f"Attachment `{attachment_id}` is not hosted by the server"
+            )
+        key = self.key()
+        if attachment.Key is not None:
+            key = decrypt(attachment.Key, key)
+        with self.api_client.api_stream("GET", path) as resp:
+            return decrypt_stream(
+                resp.iter_bytes(chunk_size),
+                key,
+                sink,
+                chunk_size,
+                spool_size=ATTACHMENT_SPOOL_SIZE,
+            )
+
+    def upload_attachment(
+        self,
+        file_name: str,
+        source: BinaryIO | Iterable[bytes],
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> CipherAttachment:
+        """
+        Encrypt and upload an attachment, chunk by chunk
+        :param file_name: name of the attachment
+        :param source: binary file-like object or iterable of bytes to upload
+        :param chunk_size: size of the chunks read from the source
+        :return: the created attachment
+        """
+        cipher_key = self.key()
+        attachment_key = token_bytes(64)
+        with SpooledTemporaryFile(max_size=ATTACHMENT_SPOOL_SIZE) as file:
+            spool = cast("BinaryIO", file)
+            size = encrypt_stream(source, attachment_key, spool, chunk_size)
+            spool.seek(0)
+            attachment = CipherAttachment(
+                Id="",
+                FileName=encrypt_sym(file_name, cipher_key),
+                Key=encrypt_sym(attachment_key, cipher_key),
+                Size=str(size),
+            )
+            resp = self.api_client.api_request(
+                "POST",
+                f"api/ciphers/{self.Id}/attachment/v2",
+                json={
+                    "key": attachment.Key,
+                    "fileName": attachment.FileName,
+                    "fileSize": size,
+                },
+            )
+            attachment.Id = resp.json()["attachmentId"]
+            self.api_client.api_request(
+                "POST",
+                f"api/ciphers/{self.Id}/attachment/{attachment.Id}",
+                files={"data": (attachment.FileName, spool)},
+            )
+        attachment.bitwarden_client = self.api_client
+        if self.Attachments is None:
+            self.Attachments = []
+        self.Attachments.append(attachment)
+        return attachment
+
     def add_collections(self, collections: list[UUID]):
         _current_collections = self.CollectionIds
         for collection in collections:
@@ -88,6 +236,78 @@ class CipherDetails(BitwardenBaseModel):
         )
 
 
+# Fields holding encrypted strings, per section of a cipher
+CIPHER_ENCRYPTED_FIELDS = {
+    "login": ("username", "password", "totp"),
+    "card": (
+        "cardholderName",
+        "brand",
+        "number",
+        "expMonth",
+        "expYear",
+        "code",
+    ),
+    "identity": (
+        "title",
+        "firstName",
+        "middleName",
+        "lastName",
+        "address1",
+        "address2",
+        "address3",
+        "city",
+        "state",
+        "postalCode",
+        "country",
+        "company",
+        "email",
+        "phone",
+        "ssn",
+        "username",
+        "passportNumber",
+        "licenseNumber",
+    ),
+}
+
+
+def _encrypt_cipher_item(key: bytes, item: dict) -> dict:
+    """Encrypt a cipher given in the plaintext json export format"""
+
+    def enc(value):
+        if value is None or value == "":
+            return None
+        return encrypt_sym(str(value), key)
+
+    cipher = {
+        "type": item.get("type", CipherType.Login),
+        "name": enc(item["name"]),
+        "notes": enc(item.get("notes")),
+        "favorite": item.get("favorite", False),
+        "reprompt": item.get("reprompt", 0),
+        "fields": [
+            {
+                "name": enc(field.get("name")),
+                "value": enc(field.get("value")),
+                "type": field.get("type", 0),
+            }
+            for field in item.get("fields") or []
+        ],
+    }
+    for section, fields in CIPHER_ENCRYPTED_FIELDS.items():
+        data = item.get(section)
+        if data is None:
+            continue
+        cipher[section] = {field: enc(data.get(field)) for field in fields}
+    if "login" in cipher:
+        cipher["login"]["uris"] = [
+            {"uri": enc(uri.get("uri")), "match": uri.get("match")}
+            for uri in item["login"].get("uris") or []
+        ]
+    if cipher["type"] == CipherType.SecureNote:
+        cipher["secureNote"] = item.get("secureNote") or {"type": 0}
+    return cipher
+
+
 class CollectionAccess(BitwardenBaseModel):
     ReadOnly: bool = False
     HidePasswords: bool = False
@@ -192,6 +412,23 @@ class OrganizationCollection(BitwardenBaseModel):
         )
 
 
+class GroupCollection(CollectionAccess):
+    CollectionId: UUID | None = Field(
+        None,
+        validation_alias=AliasChoices("id", "Id"),
+        serialization_alias="id",
+    )
+
+
+class OrganizationGroup(BitwardenBaseModel):
+    Id: UUID | None = None
+    OrganizationId: UUID | None = None
+    Name: str
+    AccessAll: bool = False
+    ExternalId: str | None = None
+    Collections: list[GroupCollection] = Field(default_factory=list)
+
+
 class OrganizationUserDetails(BitwardenBaseModel):
     Id: UUID | None = None
     Email: str
@@ -199,6 +436,7 @@ class OrganizationUserDetails(BitwardenBaseModel):
     OrganizationId: UUID | None = Field(None, validate_default=True)
     Status: int
     Type: OrganizationUserType
+    AccessAll: bool = False
     ExternalId: str | None
     Key: str | None = None
     ResetPasswordKey: str | None = None
@@ -329,6 +567,46 @@ class OrganizationUserDetails(BitwardenBaseModel):
         )
 
 
+class OrganizationUserBulkResult(BitwardenBaseModel):
+    Id: UUID
+    Error: str = ""
+
+    @property
+    def success(self) -> bool:
+        return not self.Error
+
+
+class OrganizationUserPublicKey(BitwardenBaseModel):
+    Id: UUID
+    UserId: UUID
+    Key: str
+
+
+def _wrap_organization_key(org_key: bytes, public_key: bytes) -> str:
+    return encrypt_asym(org_key, public_key)
+
+
+class OrganizationEvent(BitwardenBaseModel):
+    Type: int
+    Date: datetime
+    UserId: UUID | None = None
+    OrganizationId: UUID | None = None
+    CipherId: UUID | None = None
+    CollectionId: UUID | None = None
+    GroupId: UUID | None = None
+    PolicyId: UUID | None = None
+    OrganizationUserId: UUID | None = None
+    ActingUserId: UUID | None = None
+    DeviceType: int | None = None
+    IpAddress: str | None = None
+
+
+def _rfc3339(date: datetime) -> str:
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.isoformat()
+
+
 class CollectionCipher(BitwardenBaseModel):
     CollectionId: UUID
     CipherId: UUID
@@ -341,7 +619,12 @@ class Organization(BitwardenBaseModel):
     Object: str | None
     _collections: list[OrganizationCollection] | None = None
     _users: list[OrganizationUserDetails] | None = None
+    # counts the fresh loads of the users, a shared load ending after one
+    # is older
+    _users_version: int = 0
     _ciphers: list[CipherDetails] | None = None
+    _groups: list[OrganizationGroup] | None = None
+    _collection_tree: CollectionTree | None = None
 
     @field_validator("Id")
     @classmethod
@@ -420,13 +703,43 @@ class Organization(BitwardenBaseModel):
         resp = self.api_client.api_request(
             "POST", f"api/organizations/{self.Id}/users/invite", json=payload
         )
-        self._users = self._get_users()
+        self._load_users(fresh=True)
         return resp
 
-    def _get_users(self) -> list[OrganizationUserDetails]:
+    def _load_users(self, fresh: bool = False) -> None:
+        if fresh:
+            self._users = self._get_users(fresh=True)
+            self._users_version += 1
+            return
+        version = self._users_version
+        users = self._get_users()
+        if version == self._users_version:
+            self._users = users
+
+    def _get_users(self, fresh: bool = False) -> list[OrganizationUserDetails]:
+        """
+        Load the users of the organization
+        :param fresh: send the request, instead of joining a load already
+            in flight which may predate a write, after writes
+        """
+        if fresh:
+            return self._fetch_users(fresh=True)
+        # the threads loading the roster at once share a single parse
+        users = self.api_client.coalesce(
+            ("organization-users", self.Id), self._fetch_users
+        )
+        # deep copies sharing the client, as each instance changes its own
+        # users and their collections
+        memo = {id(self.api_client): self.api_client}
+        return [deepcopy(user, memo) for user in users]
+
+    def _fetch_users(
+        self, fresh: bool = False
+    ) -> list[OrganizationUserDetails]:
         resp = self.api_client.api_request(
             "GET",
             f"api/organizations/{self.Id}/users",
+            fresh=fresh,
             params={"includeCollections": True, "includeGroups": True},
         )
         return (
@@ -448,7 +761,8 @@ class Organization(BitwardenBaseModel):
         search: str | UUID | None = None,
     ) -> list[OrganizationUserDetails]:
         if self._users is None or force_refresh:
-            self._users = self._get_users()
+            self._load_users()
+        assert self._users is not None
         res = self._users
         if mfa is not None:
             res = [
@@ -461,6 +775,185 @@ class Organization(BitwardenBaseModel):
             return []
         return res
 
+    def _bulk_request(
+        self,
+        method: Literal["POST", "DELETE", "PUT"],
+        path: str,
+        field: str,
+        items: list,
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> list[OrganizationUserBulkResult]:
+        results: list[OrganizationUserBulkResult] = []
+        for i in range(0, len(items), chunk_size):
+            resp = self.api_client.api_request(
+                method,
+                f"api/organizations/{self.Id}/{path}",
+                json={field: items[i : i + chunk_size]},
+            )
+            results.extend(
+                ResplistBitwarden[OrganizationUserBulkResult]
+                .model_validate_json(
+                    resp.text, context={"client": self.api_client}
+                )
+                .Data
+            )
+        return results
+
+    def _bulk_users_request(
+        self,
+        method: Literal["POST", "DELETE", "PUT"],
+        path: str,
+        users: Sequence[OrganizationUserDetails | UUID | str],
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> list[OrganizationUserBulkResult]:
+        ids = [
+            str(user.Id)
+            if isinstance(user, OrganizationUserDetails)
+            else str(user)
+            for user in users
+        ]
+        return self._bulk_request(method, path, "ids", ids, chunk_size)
+
+    def _patch_users(
+        self,
+        results: list[OrganizationUserBulkResult],
+        status: OrganizationUserStatus | None = None,
+    ) -> None:
+        if self._users is None:
+            return
+        done = {res.Id for res in results if res.success}
+        if status is None:
+            self._users = [user for user in self._users if user.Id not in done]
+            return
+        for user in self._users:
+            if user.Id in done:
+                user.Status = status
+
+    def remove_users(
+        self,
+        users: Sequence[OrganizationUserDetails | UUID | str],
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> list[OrganizationUserBulkResult]:
+        """
+        Remove several users from the organization
+        :param users: users or organization user ids to remove
+        :param chunk_size: maximum number of ids sent per request
+        :return: the result of the operation for each id
+        """
+        res = self._bulk_users_request("DELETE", "users", users, chunk_size)
+        self._patch_users(res)
+        return res
+
+    def revoke_users(
+        self,
+        users: Sequence[OrganizationUserDetails | UUID | str],
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> list[OrganizationUserBulkResult]:
+        """
+        Revoke the access of several users to the organization
+        :param users: users or organization user ids to revoke
+        :param chunk_size: maximum number of ids sent per request
+        :return: the result of the operation for each id
+        """
+        res = self._bulk_users_request(
+            "PUT", "users/revoke", users, chunk_size
+        )
+        self._patch_users(res, OrganizationUserStatus.Revoked)
+        return res
+
+    def restore_users(
+        self,
+        users: Sequence[OrganizationUserDetails | UUID | str],
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> list[OrganizationUserBulkResult]:
+        """
+        Restore the access of several revoked users to the organization
+        :param users: users or organization user ids to restore
+        :param chunk_size: maximum number of ids sent per request
+        :return: the result of the operation for each id
+        """
+        res = self._bulk_users_request(
+            "PUT", "users/restore", users, chunk_size
+        )
+        # The status a user is restored to (invited, accepted or confirmed)
+        # is only known by the server, reload the roster once if needed
+        if self._users is not None and any(r.success for r in res):
+            self._load_users(fresh=True)
+        return res
+
+    def reinvite_users(
+        self,
+        users: Sequence[OrganizationUserDetails | UUID | str],
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> list[OrganizationUserBulkResult]:
+        """
+        Send the invitation email again to several invited users
+        :param users: users or organization user ids to reinvite
+        :param chunk_size: maximum number of ids sent per request
+        :return: the result of the operation for each id
+        """
+        return self._bulk_users_request(
+            "POST", "users/reinvite", users, chunk_size
+        )
+
+    def confirm_users(
+        self,
+        users: Sequence[OrganizationUserDetails | UUID | str] | None = None,
+        chunk_size: int = BULK_CHUNK_SIZE,
+        max_workers: int | None = None,
+    ) -> list[OrganizationUserBulkResult]:
+        """
+        Confirm several users who accepted their invitation
+        :param users: users or organization user ids to confirm, defaults to
+            every accepted user of the organization
+        :param chunk_size: maximum number of users confirmed per request
+        :param max_workers: number of processes wrapping the organization
+            key, defaults to the number of CPUs
+        :return: the result of the operation for each id
+        """
+        if users is None:
+            users = [
+                user
+                for user in self.users()
+                if user.Status == OrganizationUserStatus.Accepted
+            ]
+        if not users:
+            return []
+        ids = [
+            str(user.Id)
+            if isinstance(user, OrganizationUserDetails)
+            else str(user)
+            for user in users
+        ]
+        resp = self.api_client.api_request(
+            "POST",
+            f"api/organizations/{self.Id}/users/public-keys",
+            json={"ids": ids},
+        )
+        public_keys = (
+            ResplistBitwarden[OrganizationUserPublicKey]
+            .model_validate_json(
+                resp.text, context={"client": self.api_client}
+            )
+            .Data
+        )
+        wrapped_keys = process_map(
+            partial(_wrap_organization_key, self.key()),
+            [b64decode(public_key.Key) for public_key in public_keys],
+            max_workers=max_workers,
+        )
+        keys = [
+            {"id": str(public_key.Id), "key": wrapped_key}
+            for public_key, wrapped_key in zip(
+                public_keys, wrapped_keys, strict=True
+            )
+        ]
+        res = self._bulk_request(
+            "POST", "users/confirm", "keys", keys, chunk_size
+        )
+        self._patch_users(res, OrganizationUserStatus.Confirmed)
+        return res
+
     def user(self, user_id: UUID) -> OrganizationUserDetails:
         resp = self.api_client.api_request(
             "GET",
@@ -500,8 +993,13 @@ class Organization(BitwardenBaseModel):
     def collections(
         self, force_refresh: bool = False, as_dict: bool = False
     ) -> list[OrganizationCollection] | dict[str, OrganizationCollection]:
-        if self._collections is None or force_refresh:
+        if (
+            self._collections is None
+            or self._collection_tree is None
+            or force_refresh
+        ):
             self._collections = self._get_collections()
+            self._collection_tree = CollectionTree(self._collections)
         if as_dict:
             return {coll.Name: coll for coll in self._collections}
         return self._collections
@@ -521,10 +1019,11 @@ class Organization(BitwardenBaseModel):
             context={"parent_id": self.Id, "client": self.api_client},
         )
         res.Name = decrypt(res.Name, org_key).decode("utf-8")
+        # an unloaded cache is loaded whole, with the new collection, later
         if self._collections is not None:
             self._collections.append(res)
-        else:
-            self._collections = [res]
+        if self._collection_tree is not None:
+            self._collection_tree.add(res)
         return res
 
     def delete_collection(self, collection_id: UUID):
@@ -532,17 +1031,87 @@ class Organization(BitwardenBaseModel):
             "DELETE",
             f"api/organizations/{self.Id}/collections/{collection_id}",
         )
-        self._collections = self._get_collections()
+        collection_id = UUID(str(collection_id))
+        if self._collections is not None:
+            self._collections = [
+                coll for coll in self._collections if coll.Id != collection_id
+            ]
+        if self._collection_tree is not None:
+            self._collection_tree.remove(collection_id)
         return resp
 
+    def collection_tree(self, force_refresh: bool = False) -> CollectionTree:
+        """Collections indexed on the `/` separated levels of their names"""
+        self.collections(force_refresh=force_refresh)
+        assert self._collection_tree is not None
+        return self._collection_tree
+
     def collection(self, name) -> OrganizationCollection | None:
-        self.collections()
-        if self._collections is None:
-            return None
-        for collection in self._collections:
-            if collection.Name == name:
-                return collection
-        return None
+        return self.collection_tree().get(name)
+
+    def subtree_collections(
+        self, name: str, include_self: bool = True
+    ) -> list[OrganizationCollection]:
+        return self.collection_tree().subtree(name, include_self=include_self)
+
+    def set_subtree_users(
+        self,
+        name: str,
+        users: list[CollectionUser] | list[UUID],
+        default_readonly: bool = False,
+        default_hide_passwords: bool = False,
+        default_manage: bool = False,
+        max_workers: int = COLLECTIONS_MAX_WORKERS,
+    ) -> list[Response]:
+        """
+        Set the users of a collection and of all the collections nested
+        under it, concurrently
+        :param name: the path of the subtree root
+        :param users: the users to set, see OrganizationCollection.set_users
+        :param max_workers: the number of collections updated concurrently
+        :return: the responses, in the order of subtree_collections
+        """
+        set_users = partial(
+            OrganizationCollection.set_users,
+            users=users,
+            default_readonly=default_readonly,
+            default_hide_passwords=default_hide_passwords,
+            default_manage=default_manage,
+        )
+        collections = self.subtree_collections(name)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(set_users, collections))
+
+    def _get_groups(self) -> list[OrganizationGroup]:
+        resp = self.api_client.api_request(
+            "GET", f"api/organizations/{self.Id}/groups"
+        )
+        return (
+            ResplistBitwarden[OrganizationGroup]
+            .model_validate_json(
+                resp.text, context={"client": self.api_client}
+            )
+            .Data
+        )
+
+    def groups(self, force_refresh: bool = False) -> list[OrganizationGroup]:
+        if self._groups is None or force_refresh:
+            self._groups = self._get_groups()
+        return self._groups
+
+    def access_matrix(self, force_refresh: bool = False) -> AccessMatrix:
+        """
+        Index the access of the users to the collections, from the cached
+        users, collections and groups
+        :param force_refresh: reload the users, collections and groups
+        :return:
+        """
+        self.collections(force_refresh=force_refresh)
+        return AccessMatrix(
+            self.users(force_refresh=force_refresh),
+            self._collections or [],
+            self.groups(force_refresh=force_refresh),
+        )
 
     def _get_ciphers(self) -> list[CipherDetails]:
         resp = self.api_client.api_request(
@@ -579,16 +1148,184 @@ class Organization(BitwardenBaseModel):
             ]
         return self._ciphers
 
+    def _get_events(
+        self, start: datetime, end: datetime, continuation_token: str | None
+    ) -> ResplistBitwarden[OrganizationEvent]:
+        params = {"start": _rfc3339(start), "end": _rfc3339(end)}
+        if continuation_token is not None:
+            params["continuationToken"] = continuation_token
+        resp = self.api_client.api_request(
+            "GET", f"api/organizations/{self.Id}/events", params=params
+        )
+        return ResplistBitwarden[OrganizationEvent].model_validate_json(
+            resp.text, context={"client": self.api_client}
+        )
+
+    def iter_event_pages(
+        self,
+        start: datetime,
+        end: datetime | None = None,
+        continuation_token: str | None = None,
+    ) -> Iterator[ResplistBitwarden[OrganizationEvent]]:
+        """
+        Iterate over the pages of the event log of the organization, the
+        next page is fetched while the current one is consumed
+        :param start: oldest date of the events, naive dates are UTC
+        :param end: newest date of the events, defaults to now
+        :param continuation_token: token of a page to resume from
+        :return: pages of events, their ContinuationToken resumes after them
+        """
+        if end is None:
+            end = datetime.now(timezone.utc)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future: Future[ResplistBitwarden[OrganizationEvent]] | None
+            future = executor.submit(
+                self._get_events, start, end, continuation_token
+            )
+            try:
+                while future is not None:
+                    page = future.result()
+                    future = None
+                    if page.ContinuationToken:
+                        future = executor.submit(
+                            self._get_events,
+                            start,
+                            end,
+                            page.ContinuationToken,
+                        )
+                    yield page
+            finally:
+                if future is not None:
+                    future.cancel()
+
+    def iter_events(
+        self,
+        start: datetime,
+        end: datetime | None = None,
+        continuation_token: str | None = None,
+    ) -> Iterator[OrganizationEvent]:
+        """
+        Iterate over the event log of the organization, in constant memory
+        :param start: oldest date of the events, naive dates are UTC
+        :param end: newest date of the events, defaults to now
+        :param continuation_token: token of a page to resume from
+        :return:
+        """
+        for page in self.iter_event_pages(start, end, continuation_token):
+            yield from page.Data
+
+    def import_ciphers(
+        self,
+        items: Sequence[dict],
+        collections: (
+            Sequence[OrganizationCollection | UUID | str] | None
+        ) = None,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        max_workers: int | None = None,
+    ) -> int:
+        """
+        Create ciphers in the organization
+        :param items: ciphers in the bitwarden plaintext json export format,
+            `collectionIds` of an item adds it to existing collections
+        :param collections: collections, ids or collection names every item
+            is added to, missing collection names are created, strings
+            parsed as UUIDs are ids
+        :param chunk_size: maximum number of ciphers sent per request
+        :param max_workers: number of processes encrypting the ciphers,
+            defaults to the number of CPUs
+        :return: the number of imported ciphers
+        """
+        org_key = self.key()
+        by_id = {
+            coll.Id: coll
+            for coll in cast(
+                "list[OrganizationCollection]", self.collections()
+            )
+        }
+        by_name = {coll.Name: coll for coll in by_id.values()}
+        default_ids: list[UUID | None] = []
+        missing: list[str] = []
+        for coll in collections or []:
+            coll_id: UUID | None
+            if isinstance(coll, OrganizationCollection):
+                coll_id = coll.Id
+            elif isinstance(coll, UUID):
+                coll_id = coll
+            else:
+                try:
+                    coll_id = UUID(coll)
+                except ValueError:
+                    # not an id, a collection name
+                    if coll not in by_name:
+                        if coll not in missing:
+                            missing.append(coll)
+                        continue
+                    coll_id = by_name[coll].Id
+            if coll_id not in by_id:
+                raise BitwardenError(f"No Collection `{coll_id}` found")
+            if coll_id not in default_ids:
+                default_ids.append(coll_id)
+        items_ids: list[list[UUID]] = []
+        for item in items:
+            item_ids = [UUID(str(i)) for i in item.get("collectionIds") or []]
+            for item_id in item_ids:
+                if item_id not in by_id:
+                    raise BitwardenError(f"No Collection `{item_id}` found")
+            items_ids.append(item_ids)
+        # created once every id is known to exist
+        for name in missing:
+            created = self.create_collection(name)
+            by_id[created.Id] = created
+            default_ids.append(created.Id)
+        items_collections = []
+        for item_ids in items_ids:
+            ids = list(default_ids)
+            ids.extend(i for i in dict.fromkeys(item_ids) if i not in ids)
+            items_collections.append(ids)
+        ciphers = process_map(
+            partial(_encrypt_cipher_item, org_key),
+            items,
+            max_workers=max_workers,
+        )
+        for i in range(0, len(ciphers), chunk_size):
+            chunk_collections: dict[UUID | None, int] = {}
+            relationships = []
+            for index, coll_ids in enumerate(
+                items_collections[i : i + chunk_size]
+            ):
+                for coll_id in coll_ids:
+                    position = chunk_collections.setdefault(
+                        coll_id, len(chunk_collections)
+                    )
+                    relationships.append({"key": index, "value": position})
+            payload = {
+                "ciphers": [
+                    {**cipher, "organizationId": str(self.Id)}
+                    for cipher in ciphers[i : i + chunk_size]
+                ],
+                "collections": [
+                    {
+                        "id": str(coll_id),
+                        "name": encrypt_sym(by_id[coll_id].Name, org_key),
+                        "groups": [],
+                        "users": [],
+                    }
+                    for coll_id in chunk_collections
+                ],
+                "collectionRelationships": relationships,
+            }
+            self.api_client.api_request(
+                "POST",
+                "api/ciphers/import-organization",
+                params={"organizationId": str(self.Id)},
+                json=payload,
+            )
+        self._ciphers = None
+        return len(ciphers)
+
     def key(self):
-        sync = self.api_client.sync()
-        raw_key = None
-        for org in sync.Profile.Organizations:
-            if org.Id == self.Id:
-                raw_key = org.Key
-                break
-        if raw_key is not None:
-            return decrypt(raw_key, self.api_client.connect_token.orgs_key)
-        raise BitwardenError(f"No Organizations `{self.Id}` found")
+        assert self.Id is not None
+        return self.api_client.organization_key(self.Id)
 
 
 def get_organization(
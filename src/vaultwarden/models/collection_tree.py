@@ -0,0 +1,132 @@
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING
+from uuid import UUID
+
+if TYPE_CHECKING:
+    from vaultwarden.models.bitwarden import OrganizationCollection
+
+# Separator of the nested collection names
+COLLECTION_SEPARATOR = "/"
+
+
+def split_path(name: str) -> list[str]:
+    return [part for part in name.split(COLLECTION_SEPARATOR) if part]
+
+
+class CollectionNode:
+    """A level of the collection tree, a collection may not exist for it"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.collections: list["OrganizationCollection"] = []
+        self.children: dict[str, "CollectionNode"] = {}
+
+    def __repr__(self) -> str:
+        return f"CollectionNode(path={self.path!r})"
+
+    @property
+    def collection(self) -> "OrganizationCollection | None":
+        return self.collections[0] if self.collections else None
+
+    def walk(self) -> Iterator["CollectionNode"]:
+        """This node then its descendants, depth first"""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children.values()))
+
+
+class CollectionTree:
+    """Index of the collections on the `/` separated levels of their names.
+
+    Args:
+        collections: The collections with their decrypted names.
+    """
+
+    def __init__(self, collections: Iterable["OrganizationCollection"] = ()):
+        self.root = CollectionNode("")
+        self._nodes: dict[str, CollectionNode] = {"": self.root}
+        self._paths: dict[UUID, str] = {}
+        for collection in collections:
+            self.add(collection)
+
+    def node(self, name: str) -> CollectionNode | None:
+        return self._nodes.get(COLLECTION_SEPARATOR.join(split_path(name)))
+
+    def add(self, collection: "OrganizationCollection") -> None:
+        node = self.root
+        for part in split_path(collection.Name):
+            child = node.children.get(part)
+            if child is None:
+                path = (
+                    f"{node.path}{COLLECTION_SEPARATOR}{part}"
+                    if node.path
+                    else part
+                )
+                child = CollectionNode(path)
+                node.children[part] = child
+                self._nodes[path] = child
+            node = child
+        node.collections.append(collection)
+        if collection.Id is not None:
+            self._paths[collection.Id] = node.path
+
+    def remove(self, collection_id: UUID) -> None:
+        path = self._paths.pop(collection_id, None)
+        if path is None:
+            return
+        node = self._nodes[path]
+        node.collections = [
+            c for c in node.collections if c.Id != collection_id
+        ]
+        self._prune(path)
+
+    def _prune(self, path: str) -> None:
+        """Drop the empty levels of a path, from the deepest"""
+        parts = split_path(path)
+        while parts:
+            path = COLLECTION_SEPARATOR.join(parts)
+            node = self._nodes[path]
+            if node.collections or node.children:
+                return
+            del self._nodes[path]
+            parent = self._nodes[COLLECTION_SEPARATOR.join(parts[:-1])]
+            del parent.children[parts[-1]]
+            parts.pop()
+
+    def get(self, name: str) -> "OrganizationCollection | None":
+        """Get the first collection named exactly `name`"""
+        node = self.node(name)
+        if node is None:
+            return None
+        return next((c for c in node.collections if c.Name == name), None)
+
+    def subtree(
+        self, name: str, include_self: bool = True
+    ) -> list["OrganizationCollection"]:
+        """
+        Get the collections nested under a name
+        :param name: the path of the subtree root, empty for all collections
+        :param include_self: include the collections named exactly `name`
+        :return:
+        """
+        node = self.node(name)
+        if node is None:
+            return []
+        res = []
+        for descendant in node.walk():
+            if descendant is not node or include_self:
+                res.extend(descendant.collections)
+        return res
+
+    def ancestors(self, name: str) -> list["OrganizationCollection"]:
+        """Get the existing collections above a name, the closest first"""
+        parts = split_path(name)[:-1]
+        res = []
+        while parts:
+            node = self._nodes.get(COLLECTION_SEPARATOR.join(parts))
+            if node is not None:
+                res.extend(node.collections)
+            parts.pop()
+        return res
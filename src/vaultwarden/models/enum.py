@@ -16,6 +16,11 @@ class OrganizationUserType(IntEnum):
     Custom = 4
 
 
+class KdfType(IntEnum):
+    PBKDF2_SHA256 = 0
+    Argon2id = 1
+
+
 class CipherType(IntEnum):
     Login = 1
     SecureNote = 2
@@ -27,3 +32,24 @@ class VaultwardenUserStatus(IntEnum):
     Enabled = 0
     Invited = 1
     Disabled = 2
+
+
+class UpdateType(IntEnum):
+    SyncCipherUpdate = 0
+    SyncCipherCreate = 1
+    SyncLoginDelete = 2
+    SyncFolderDelete = 3
+    SyncCiphers = 4
+    SyncVault = 5
+    SyncOrgKeys = 6
+    SyncFolderCreate = 7
+    SyncFolderUpdate = 8
+    SyncCipherDelete = 9
+    SyncSettings = 10
+    LogOut = 11
+    SyncSendCreate = 12
+    SyncSendUpdate = 13
+    SyncSendDelete = 14
+    AuthRequest = 15
+    AuthRequestResponse = 16
+    Null = 100
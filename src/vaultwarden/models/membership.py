@@ -0,0 +1,169 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import threading
+from uuid import UUID
+
+from httpx import HTTPStatusError
+
+from vaultwarden.clients.bitwarden import BitwardenAPIClient
+from vaultwarden.models.bitwarden import (
+    Organization,
+    OrganizationCollection,
+    OrganizationUserDetails,
+    get_organization,
+)
+from vaultwarden.models.enum import OrganizationUserType
+from vaultwarden.models.exception_models import BitwardenError
+from vaultwarden.utils.logger import logger
+
+# Number of organizations loaded concurrently
+MEMBERSHIP_MAX_WORKERS = 8
+
+
+@dataclass(frozen=True)
+class Membership:
+    organization: Organization
+    user: OrganizationUserDetails
+
+    @property
+    def type(self) -> OrganizationUserType:
+        return self.user.Type
+
+    @property
+    def collection_ids(self) -> list[UUID]:
+        return [
+            coll.CollectionId
+            for coll in self.user.Collections
+            if coll.CollectionId is not None
+        ]
+
+    def collections(self) -> list[OrganizationCollection]:
+        """Collections of the user, their names are decrypted on first use"""
+        ids = set(self.collection_ids)
+        collections = self.organization.collections()
+        assert isinstance(collections, list)
+        return [coll for coll in collections if coll.Id in ids]
+
+
+def _discard(index: dict, key: str | UUID, organization_id: UUID) -> None:
+    memberships = index.get(key)
+    if memberships is None:
+        return
+    memberships.pop(organization_id, None)
+    if not memberships:
+        del index[key]
+
+
+class MembershipIndex:
+    """Memberships of the users across all the organizations of a client.
+
+    The users of every organization in the profile of the client are
+    loaded concurrently, then indexed by email and user id. Organizations
+    the client can not manage are skipped.
+
+    Args:
+        client: The client, member of the organizations to index.
+        max_workers: The number of organizations loaded concurrently.
+    """
+
+    def __init__(
+        self,
+        client: BitwardenAPIClient,
+        max_workers: int = MEMBERSHIP_MAX_WORKERS,
+    ):
+        self.client = client
+        self.max_workers = max_workers
+        self.organizations: dict[UUID, Organization] = {}
+        self._by_email: dict[str, dict[UUID, Membership]] = {}
+        self._by_user_id: dict[UUID, dict[UUID, Membership]] = {}
+        self._lock = threading.Lock()
+
+    def _load(
+        self, organization_id: UUID, org: Organization | None = None
+    ) -> Organization | None:
+        try:
+            if org is None:
+                org = get_organization(self.client, organization_id)
+            org.users(force_refresh=True)
+        except HTTPStatusError as e:
+            logger.warning(
+                f"Given Bitwarden client has no access to org "
+                f"'{organization_id}': {e}"
+            )
+            return None
+        return org
+
+    def _unindex(self, organization_id: UUID) -> None:
+        org = self.organizations.pop(organization_id, None)
+        if org is None:
+            return
+        for user in org.users():
+            _discard(self._by_email, user.Email.lower(), organization_id)
+            if user.UserId is not None:
+                _discard(self._by_user_id, user.UserId, organization_id)
+
+    def _index(self, org: Organization) -> None:
+        assert org.Id is not None
+        self.organizations[org.Id] = org
+        for user in org.users():
+            membership = Membership(org, user)
+            self._by_email.setdefault(user.Email.lower(), {})[org.Id] = (
+                membership
+            )
+            if user.UserId is not None:
+                self._by_user_id.setdefault(user.UserId, {})[org.Id] = (
+                    membership
+                )
+
+    def build(self) -> "MembershipIndex":
+        """Load the users of all the organizations of the client"""
+        profile = self.client.sync(force_refresh=True).Profile
+        org_ids = [org.Id for org in profile.Organizations]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            orgs = list(executor.map(self._load, org_ids))
+        with self._lock:
+            self.organizations = {}
+            self._by_email = {}
+            self._by_user_id = {}
+            for org in orgs:
+                if org is not None:
+                    self._index(org)
+        return self
+
+    def refresh(self, organization_id: UUID | str) -> None:
+        """Reload the users of a single organization"""
+        organization_id = UUID(str(organization_id))
+        with self._lock:
+            # the users of the old roster are needed to unindex them
+            previous = self.organizations.get(organization_id)
+            if previous is not None:
+                self._unindex(organization_id)
+        org = self._load(organization_id, previous)
+        with self._lock:
+            if org is not None:
+                self._index(org)
+
+    def memberships(
+        self, email: str | None = None, user_id: UUID | str | None = None
+    ) -> list[Membership]:
+        """
+        Get the memberships of a user in the indexed organizations
+        :param email: email of the user, case insensitive
+        :param user_id: id of the user, not of the organization user
+        :return:
+        """
+        if email is None and user_id is None:
+            raise BitwardenError("Missing email or user_id")
+        if email is not None:
+            res = self._by_email.get(email.lower(), {})
+        else:
+            res = self._by_user_id.get(UUID(str(user_id)), {})
+        return list(res.values())
+
+    def organizations_of(
+        self, email: str | None = None, user_id: UUID | str | None = None
+    ) -> list[Organization]:
+        return [
+            m.organization
+            for m in self.memberships(email=email, user_id=user_id)
+        ]
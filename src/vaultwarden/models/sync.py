@@ -43,6 +43,13 @@ class ConnectToken(PermissiveBaseModel):
         return decrypt(self.PrivateKey, self.user_key)
 
 
+class PreloginResponse(PermissiveBaseModel):
+    Kdf: int = 0
+    KdfIterations: int
+    KdfMemory: int | None = None
+    KdfParallelism: int | None = None
+
+
 class ProfileOrganization(PermissiveBaseModel):
     Id: UUID
     Name: str
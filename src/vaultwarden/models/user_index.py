@@ -0,0 +1,328 @@
+from bisect import bisect_left, insort
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import cache
+from typing import Literal
+from uuid import UUID
+
+from vaultwarden.models.enum import VaultwardenUserStatus
+from vaultwarden.models.sync import VaultwardenUser
+from vaultwarden.utils.logger import logger
+
+# Format of the dates of the admin users endpoint
+VAULTWARDEN_DATE_FORMAT = "%Y-%m-%d %H:%M:%S %z"
+# The dates are in the time zone of the server, named by its abbreviation
+# when the TZ of the server is set
+TIMEZONE_ABBREVIATIONS: dict[str, float] = {
+    "UTC": 0,
+    "UT": 0,
+    "GMT": 0,
+    "Z": 0,
+    "WET": 0,
+    "WEST": 1,
+    "BST": 1,
+    "CET": 1,
+    "CEST": 2,
+    "EET": 2,
+    "EEST": 3,
+    "MSK": 3,
+    "NST": -3.5,
+    "NDT": -2.5,
+    "AST": -4,
+    "ADT": -3,
+    "EST": -5,
+    "EDT": -4,
+    "CST": -6,
+    "CDT": -5,
+    "MST": -7,
+    "MDT": -6,
+    "PST": -8,
+    "PDT": -7,
+    "AKST": -9,
+    "AKDT": -8,
+    "HST": -10,
+    "JST": 9,
+    "KST": 9,
+    "AWST": 8,
+    "ACST": 9.5,
+    "ACDT": 10.5,
+    "AEST": 10,
+    "AEDT": 11,
+    "NZST": 12,
+    "NZDT": 13,
+}
+
+DateField = Literal["LastActive", "CreatedAt"]
+
+
+@cache
+def _zone(abbreviation: str) -> timezone:
+    offset = TIMEZONE_ABBREVIATIONS.get(abbreviation.upper())
+    if offset is None:
+        # logged once per zone, the dates are off by the offset at most
+        logger.warning(f"Unknown time zone '{abbreviation}', read as UTC")
+        offset = 0
+    return timezone(timedelta(hours=offset))
+
+
+def parse_vaultwarden_date(value: str | None) -> datetime | None:
+    """Parse a date of the admin users endpoint, like
+    `2024-07-23 12:15:19 +00:00` or `2024-07-23 14:15:19 CEST`.
+
+    The dates without zone are UTC. An unparseable date is logged and
+    returned as None, like a missing one.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, VAULTWARDEN_DATE_FORMAT)
+    except ValueError:
+        pass
+    stamp, _, abbreviation = value.rpartition(" ")
+    try:
+        date = datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        try:
+            return _aware(datetime.fromisoformat(value))
+        except ValueError:
+            logger.warning(f"Unparseable date '{value}', ignored")
+            return None
+    if not abbreviation.isalpha():
+        logger.warning(f"Unparseable date '{value}', ignored")
+        return None
+    return date.replace(tzinfo=_zone(abbreviation))
+
+
+def _aware(date: datetime) -> datetime:
+    return (
+        date if date.tzinfo is not None else date.replace(tzinfo=timezone.utc)
+    )
+
+
+@dataclass
+class SweepReport:
+    """Outcome of `VaultwardenAdminClient.disable_inactive_users`"""
+
+    cutoff: datetime
+    dry_run: bool
+    candidates: list[VaultwardenUser] = field(default_factory=list)
+    disabled: list[VaultwardenUser] = field(default_factory=list)
+    failed: dict[UUID, str] = field(default_factory=dict)
+
+
+class UserIndex:
+    """Secondary indexes on the users of the admin client.
+
+    The indexes hold positions in the `users` list: sets of positions by
+    status, MFA, enabled and organization, and lists of positions sorted
+    on the parsed `LastActive` and `CreatedAt` dates.
+
+    Args:
+        users: The users of the Vaultwarden instance.
+    """
+
+    def __init__(self, users: list[VaultwardenUser]):
+        self.users = users
+        self.by_id: dict[UUID, VaultwardenUser] = {}
+        self.by_email: dict[str, VaultwardenUser] = {}
+        self.status: dict[VaultwardenUserStatus, set[int]] = {
+            status: set() for status in VaultwardenUserStatus
+        }
+        self.mfa: dict[bool, set[int]] = {True: set(), False: set()}
+        self.enabled: dict[bool, set[int]] = {True: set(), False: set()}
+        self.organizations: dict[UUID, set[int]] = {}
+        # (date, position) pairs sorted by date, undated users are apart
+        self.dates: dict[DateField, list[tuple[datetime, int]]] = {
+            "LastActive": [],
+            "CreatedAt": [],
+        }
+        self.undated: dict[DateField, set[int]] = {
+            "LastActive": set(),
+            "CreatedAt": set(),
+        }
+        self._positions: dict[UUID, int] = {}
+        for position, user in enumerate(users):
+            self._add(position, user)
+        for dates in self.dates.values():
+            dates.sort()
+
+    def _add(
+        self, position: int, user: VaultwardenUser, sort: bool = False
+    ) -> None:
+        self._positions[user.Id] = position
+        self.by_id[user.Id] = user
+        self.by_email[user.Email] = user
+        self.status[user.status].add(position)
+        self.mfa[user.TwoFactorEnabled].add(position)
+        self.enabled[user.UserEnabled].add(position)
+        for org in user.Organizations:
+            self.organizations.setdefault(org.Id, set()).add(position)
+        for date_field, dates in self.dates.items():
+            value = getattr(user, date_field)
+            date = parse_vaultwarden_date(value)
+            if date is None:
+                # an unparseable date is not a missing one: such a user is
+                # neither in a date range nor never active
+                if not value:
+                    self.undated[date_field].add(position)
+            elif sort:
+                insort(dates, (date, position))
+            else:
+                dates.append((date, position))
+
+    def _remove(self, position: int, user: VaultwardenUser) -> None:
+        del self.by_id[user.Id]
+        self.by_email.pop(user.Email, None)
+        self.status[user.status].discard(position)
+        self.mfa[user.TwoFactorEnabled].discard(position)
+        self.enabled[user.UserEnabled].discard(position)
+        for org in user.Organizations:
+            self.organizations.get(org.Id, set()).discard(position)
+        for date_field, dates in self.dates.items():
+            value = getattr(user, date_field)
+            date = parse_vaultwarden_date(value)
+            if date is None:
+                self.undated[date_field].discard(position)
+            else:
+                i = bisect_left(dates, (date, position))
+                if i < len(dates) and dates[i] == (date, position):
+                    del dates[i]
+
+    def update(self, user: VaultwardenUser) -> None:
+        """Replace a user with a patched copy, reindexing only it"""
+        position = self._positions[user.Id]
+        self._remove(position, self.users[position])
+        self.users[position] = user
+        self._add(position, user, sort=True)
+
+    def position(self, user_id: UUID) -> int | None:
+        return self._positions.get(user_id)
+
+    def date_range(
+        self,
+        field: DateField,
+        after: datetime | None = None,
+        before: datetime | None = None,
+    ) -> list[int]:
+        """Positions of the users dated in [after, before), by date, naive
+        dates are UTC"""
+        dates = self.dates[field]
+        start = 0
+        end = len(dates)
+        if after is not None:
+            start = bisect_left(dates, (_aware(after), -1))
+        if before is not None:
+            end = bisect_left(dates, (_aware(before), -1))
+        return [position for _, position in dates[start:end]]
+
+    def query(self) -> "UserQuery":
+        return UserQuery(self)
+
+
+class UserQuery:
+    """Composable filters on the users, resolved with the indexes"""
+
+    def __init__(self, index: UserIndex):
+        self._index = index
+        self._include: list[set[int]] = []
+        self._exclude: list[set[int]] = []
+        self._order: list[int] | None = None
+
+    def status(self, *statuses: VaultwardenUserStatus) -> "UserQuery":
+        self._include.append(
+            set().union(*(self._index.status[s] for s in statuses))
+        )
+        return self
+
+    def exclude_status(self, *statuses: VaultwardenUserStatus) -> "UserQuery":
+        self._exclude.extend(self._index.status[s] for s in statuses)
+        return self
+
+    def exclude_invited(self) -> "UserQuery":
+        return self.exclude_status(VaultwardenUserStatus.Invited)
+
+    def mfa(self, enabled: bool = True) -> "UserQuery":
+        self._include.append(self._index.mfa[enabled])
+        return self
+
+    def enabled(self, enabled: bool = True) -> "UserQuery":
+        self._include.append(self._index.enabled[enabled])
+        return self
+
+    def organization(self, *organization_ids: UUID | str) -> "UserQuery":
+        """Users member of any of the organizations"""
+        self._include.append(
+            set().union(
+                *(
+                    self._index.organizations.get(UUID(str(org_id)), set())
+                    for org_id in organization_ids
+                )
+            )
+        )
+        return self
+
+    def _date(
+        self,
+        field: DateField,
+        after: datetime | None,
+        before: datetime | None,
+        include_undated: bool,
+    ) -> "UserQuery":
+        positions = self._index.date_range(field, after, before)
+        if include_undated:
+            positions += sorted(self._index.undated[field])
+        self._include.append(set(positions))
+        if self._order is None:
+            self._order = positions
+        return self
+
+    def last_active(
+        self,
+        after: datetime | None = None,
+        before: datetime | None = None,
+        include_never: bool = False,
+    ) -> "UserQuery":
+        """
+        Users last active in [after, before), sorted by LastActive
+        :param include_never: also include the users never active
+        """
+        return self._date("LastActive", after, before, include_never)
+
+    def never_active(self) -> "UserQuery":
+        """Users without LastActive date"""
+        self._include.append(self._index.undated["LastActive"])
+        return self
+
+    def created(
+        self, after: datetime | None = None, before: datetime | None = None
+    ) -> "UserQuery":
+        """Users created in [after, before), sorted by CreatedAt"""
+        return self._date("CreatedAt", after, before, False)
+
+    def positions(self) -> list[int]:
+        """Positions of the matching users, by date when filtered on one"""
+        if self._include:
+            include = sorted(self._include, key=len)
+            res = set(include[0]).intersection(*include[1:])
+        else:
+            res = set(range(len(self._index.users)))
+        res.difference_update(*self._exclude)
+        if self._order is not None:
+            return [p for p in self._order if p in res]
+        return sorted(res)
+
+    def all(self) -> list[VaultwardenUser]:
+        return [self._index.users[p] for p in self.positions()]
+
+    def count(self) -> int:
+        return len(self.positions())
+
+    def emails(self) -> list[str]:
+        return [user.Email for user in self.all()]
+
+    def ids(self) -> list[UUID]:
+        return [user.Id for user in self.all()]
+
+    def __iter__(self) -> Iterator[VaultwardenUser]:
+        return iter(self.all())
@@ -0,0 +1,348 @@
+from urllib.parse import urlsplit
+from uuid import UUID
+
+from pydantic import Field, TypeAdapter
+
+from vaultwarden.models.enum import CipherType
+from vaultwarden.models.exception_models import BitwardenError
+from vaultwarden.models.permissive_model import PermissiveBaseModel
+from vaultwarden.models.sync import ConnectToken, SyncData
+from vaultwarden.utils.cache import LRUCache
+from vaultwarden.utils.crypto import decrypt
+from vaultwarden.utils.key_cache import RSAKeyCache
+
+# Maximum number of decrypted values kept in memory by a vault
+DECRYPT_CACHE_SIZE = 4096
+
+# Pydantic models for the encrypted ciphers returned by the sync
+
+
+class CipherLoginUri(PermissiveBaseModel):
+    Uri: str | None = None
+    Match: int | None = None
+
+
+class CipherLogin(PermissiveBaseModel):
+    Username: str | None = None
+    Password: str | None = None
+    Totp: str | None = None
+    Uris: list[CipherLoginUri] | None = None
+
+
+class CipherField(PermissiveBaseModel):
+    Name: str | None = None
+    Value: str | None = None
+    Type: int = 0
+
+
+class CipherCard(PermissiveBaseModel):
+    CardholderName: str | None = None
+    Brand: str | None = None
+    Number: str | None = None
+    ExpMonth: str | None = None
+    ExpYear: str | None = None
+    Code: str | None = None
+
+
+class SyncCipher(PermissiveBaseModel):
+    Id: UUID
+    OrganizationId: UUID | None = None
+    FolderId: UUID | None = None
+    Type: CipherType
+    Name: str
+    Notes: str | None = None
+    Key: str | None = None
+    Login: CipherLogin | None = None
+    Card: CipherCard | None = None
+    Fields: list[CipherField] | None = None
+    CollectionIds: list[UUID] = Field(default_factory=list)
+    RevisionDate: str | None = None
+    DeletedDate: str | None = None
+
+
+def uri_host(uri: str) -> str | None:
+    """Normalized host of a URI, the scheme being optional"""
+    if "://" not in uri:
+        uri = f"//{uri}"
+    try:
+        return urlsplit(uri.strip()).hostname
+    except ValueError:
+        return None
+
+
+class SecretIndex:
+    """Maps decrypted names, URI hosts and collection paths to cipher ids"""
+
+    def __init__(self, vault: "Vault"):
+        self.names: dict[str, set[UUID]] = {}
+        self.hosts: dict[str, set[UUID]] = {}
+        self.collections: dict[str, set[UUID]] = {}
+        collection_ids: dict[UUID, set[UUID]] = {}
+        for item in vault.items():
+            cipher = item.cipher
+            name = vault.decrypt(cipher.Name, cipher, cache=False)
+            self.names.setdefault(name or "", set()).add(cipher.Id)
+            if cipher.Login is not None:
+                for login_uri in cipher.Login.Uris or []:
+                    uri = vault.decrypt(login_uri.Uri, cipher, cache=False)
+                    host = uri_host(uri) if uri else None
+                    if host:
+                        self.hosts.setdefault(host, set()).add(cipher.Id)
+            for coll_id in cipher.CollectionIds:
+                collection_ids.setdefault(coll_id, set()).add(cipher.Id)
+        for coll in vault.sync.Collections:
+            coll_id = UUID(coll.get("id") or coll["Id"])
+            org_id = UUID(coll.get("organizationId") or coll["OrganizationId"])
+            path = decrypt(
+                coll.get("name") or coll["Name"], vault.key(org_id)
+            ).decode("utf-8")
+            self.collections.setdefault(path, set()).update(
+                collection_ids.get(coll_id, set())
+            )
+
+    def search(
+        self,
+        name: str | None = None,
+        uri: str | None = None,
+        collection: str | None = None,
+    ) -> set[UUID]:
+        """Ids of the ciphers matching all the given criteria"""
+        if name is None and uri is None and collection is None:
+            raise BitwardenError("Missing name, uri or collection")
+        matches: list[set[UUID]] = []
+        if name is not None:
+            matches.append(self.names.get(name, set()))
+        if uri is not None:
+            matches.append(self.hosts.get(uri_host(uri) or "", set()))
+        if collection is not None:
+            matches.append(self.collections.get(collection.strip("/"), set()))
+        return set.intersection(*matches)
+
+
+class VaultItem:
+    """Decrypted view of a cipher, each field is decrypted on access"""
+
+    def __init__(self, vault: "Vault", cipher: SyncCipher):
+        self._vault = vault
+        self.cipher = cipher
+
+    def __repr__(self) -> str:
+        return f"VaultItem(id={self.id}, type={self.type.name})"
+
+    def _decrypt(self, value: str | None) -> str | None:
+        return self._vault.decrypt(value, self.cipher)
+
+    @property
+    def id(self) -> UUID:
+        return self.cipher.Id
+
+    @property
+    def organization_id(self) -> UUID | None:
+        return self.cipher.OrganizationId
+
+    @property
+    def type(self) -> CipherType:
+        return self.cipher.Type
+
+    @property
+    def collection_ids(self) -> list[UUID]:
+        return self.cipher.CollectionIds
+
+    @property
+    def name(self) -> str:
+        return self._decrypt(self.cipher.Name) or ""
+
+    @property
+    def notes(self) -> str | None:
+        return self._decrypt(self.cipher.Notes)
+
+    @property
+    def username(self) -> str | None:
+        login = self.cipher.Login
+        return None if login is None else self._decrypt(login.Username)
+
+    @property
+    def password(self) -> str | None:
+        login = self.cipher.Login
+        return None if login is None else self._decrypt(login.Password)
+
+    @property
+    def totp(self) -> str | None:
+        login = self.cipher.Login
+        return None if login is None else self._decrypt(login.Totp)
+
+    @property
+    def uris(self) -> list[str]:
+        login = self.cipher.Login
+        if login is None or login.Uris is None:
+            return []
+        return [
+            uri
+            for uri in (self._decrypt(u.Uri) for u in login.Uris)
+            if uri is not None
+        ]
+
+    @property
+    def fields(self) -> dict[str, str | None]:
+        return {
+            self._decrypt(field.Name) or "": self._decrypt(field.Value)
+            for field in self.cipher.Fields or []
+        }
+
+    @property
+    def card(self) -> dict[str, str | None] | None:
+        card = self.cipher.Card
+        if card is None:
+            return None
+        return {
+            name: self._decrypt(value)
+            for name, value in card.model_dump(
+                include=set(CipherCard.model_fields)
+            ).items()
+        }
+
+
+class Vault:
+    """Typed and lazily decrypted access to the ciphers of a sync.
+
+    Args:
+        sync: The sync data of the user.
+        connect_token: The token of the user, holding its keys.
+        cache_size: The maximum number of decrypted values kept in memory.
+        rsa_key_cache: The cache of the private key of the user, defaults
+            to the shared one.
+    """
+
+    def __init__(
+        self,
+        sync: SyncData,
+        connect_token: ConnectToken,
+        cache_size: int = DECRYPT_CACHE_SIZE,
+        rsa_key_cache: RSAKeyCache | None = None,
+    ):
+        self.sync = sync
+        self._connect_token = connect_token
+        self._rsa_key_cache = rsa_key_cache
+        self._items: dict[UUID, VaultItem] | None = None
+        self._index: SecretIndex | None = None
+        self._keys: dict[UUID | None, bytes] = {}
+        self._cache: LRUCache[tuple[str, UUID | None], str] = LRUCache(
+            cache_size
+        )
+
+    def _load_items(self) -> dict[UUID, VaultItem]:
+        if self._items is None:
+            ciphers = TypeAdapter(list[SyncCipher]).validate_python(
+                self.sync.Ciphers
+            )
+            self._items = {c.Id: VaultItem(self, c) for c in ciphers}
+        return self._items
+
+    def key(self, organization_id: UUID | None = None) -> bytes:
+        """Symmetric key of the user, or of one of its organizations"""
+        if organization_id in self._keys:
+            return self._keys[organization_id]
+        if organization_id is None:
+            key = self._connect_token.user_key
+        else:
+            org = next(
+                (
+                    org
+                    for org in self.sync.Profile.Organizations
+                    if org.Id == organization_id
+                ),
+                None,
+            )
+            if org is None or org.Key is None:
+                raise BitwardenError(
+                    f"No Organizations `{organization_id}` found"
+                )
+            key = decrypt(
+                org.Key,
+                self._connect_token.orgs_key,
+                key_cache=self._rsa_key_cache,
+            )
+        self._keys[organization_id] = key
+        return key
+
+    def cipher_key(self, cipher: SyncCipher) -> bytes:
+        key = self.key(cipher.OrganizationId)
+        if cipher.Key is None:
+            return key
+        cipher_key = self._keys.get(cipher.Id)
+        if cipher_key is None:
+            cipher_key = decrypt(cipher.Key, key)
+            self._keys[cipher.Id] = cipher_key
+        return cipher_key
+
+    def decrypt(
+        self, value: str | None, cipher: SyncCipher, cache: bool = True
+    ) -> str | None:
+        """Decrypt a field of a cipher, memoizing the result"""
+        if value is None:
+            return None
+        if not cache:
+            return decrypt(value, self.cipher_key(cipher)).decode("utf-8")
+        owner = cipher.Id if cipher.Key is not None else cipher.OrganizationId
+        return self._cache.get_or_set(
+            (value, owner),
+            lambda: decrypt(value, self.cipher_key(cipher)).decode("utf-8"),
+        )
+
+    def items(
+        self,
+        cipher_type: CipherType | None = None,
+        organization_id: UUID | None = None,
+        collection: UUID | None = None,
+        include_deleted: bool = False,
+    ) -> list[VaultItem]:
+        """
+        Get the ciphers of the vault, nothing is decrypted
+        :param cipher_type: only get ciphers of this type
+        :param organization_id: only get ciphers of this organization
+        :param collection: only get ciphers of this collection
+        :param include_deleted: include the ciphers in the trash
+        :return:
+        """
+        res = list(self._load_items().values())
+        if not include_deleted:
+            res = [i for i in res if i.cipher.DeletedDate is None]
+        if cipher_type is not None:
+            res = [i for i in res if i.type == cipher_type]
+        if organization_id is not None:
+            res = [i for i in res if i.organization_id == organization_id]
+        if collection is not None:
+            res = [i for i in res if collection in i.collection_ids]
+        return res
+
+    def item(self, cipher_id: UUID | str) -> VaultItem | None:
+        return self._load_items().get(UUID(str(cipher_id)))
+
+    def index(self) -> SecretIndex:
+        """Lookup index of the vault, built on first use"""
+        if self._index is None:
+            self._index = SecretIndex(self)
+        return self._index
+
+    def get_secret(
+        self,
+        name: str | None = None,
+        uri: str | None = None,
+        collection: str | None = None,
+    ) -> VaultItem | None:
+        """
+        Get the cipher matching all the given criteria
+        :param name: decrypted name of the cipher
+        :param uri: URI whose host matches one of the cipher URIs
+        :param collection: decrypted path of a collection of the cipher
+        :return: the cipher, None if no cipher matches
+        """
+        ids = self.index().search(name=name, uri=uri, collection=collection)
+        if len(ids) > 1:
+            raise BitwardenError(
+                f"{len(ids)} ciphers match name={name!r} uri={uri!r} "
+                f"collection={collection!r}"
+            )
+        if not ids:
+            return None
+        return self.item(ids.pop())
@@ -9,15 +9,17 @@ import hashlib
 import re
 import secrets
 import string
-from base64 import b64decode, b64encode
+from base64 import b64encode
+from binascii import a2b_base64
 from enum import IntEnum
 from hashlib import pbkdf2_hmac, sha256
 from hmac import new as hmac_new
 from secrets import token_bytes
 
-from Crypto.Cipher import AES, PKCS1_OAEP
 from Crypto.PublicKey import RSA
-from hkdf import hkdf_expand
+
+from vaultwarden.utils.crypto_backend import get_backend
+from vaultwarden.utils.key_cache import RSA_KEY_CACHE
 
 
 class CIPHERS(IntEnum):
@@ -25,7 +27,6 @@ class CIPHERS(IntEnum):
     asym = 4
 
 
-CACHE = {}  # type: ignore
 ITERATIONS = 2000000
 ENCODED_CIPHER = {
     CIPHERS.sym: "{typ}.{b64_iv}|{b64_ct}|{b64_digest}",
@@ -65,53 +66,78 @@ class DecryptError(ValueError):
     """."""
 
 
+# plain ints, faster to compare than the enum members
+_ASYM = int(CIPHERS.asym)
+
+
+def _is_cipher_string(cipher_string):
+    """same as ENCRYPTED_STRING_RE: a type digit, a dot, then a padding `=`
+    on the first line"""
+    if (
+        len(cipher_string) < 3
+        or cipher_string[1] != "."
+        or not "0" <= cipher_string[0] <= "9"
+    ):
+        return False
+    eq = cipher_string.find("=", 2)
+    return eq >= 0 and cipher_string.find("\n", 2, eq) < 0
+
+
+def _b64decode(part, name):
+    try:
+        return a2b_base64(part)
+    except Exception:
+        raise B64DecryptError(f"{name} {part} not valid")
+
+
 def decode_cipher_string(cipher_string):
-    """decode a cipher tring into it's parts"""
-    iv = None
-    mac = None
-    if not ENCRYPTED_STRING_RE.match(cipher_string):
+    """decode a cipher string into its parts, checking its structure in a
+    single pass without regular expression"""
+    if not isinstance(cipher_string, str) or not _is_cipher_string(
+        cipher_string
+    ):
         raise WrongFormatError(f"{cipher_string}")
-    try:
-        typ = cipher_string[0:1]
-        typ = int(typ)
-        assert typ < 9
-    except (AssertionError, ValueError):
+    typ = ord(cipher_string[0]) - 48
+    if typ > 8:
         raise WrongTypeDecryptError(f"{typ} is not valid")
+    iv = None
+    mac = None
     ct = cipher_string[2:]
-    if typ == CIPHERS.asym:
-        pass
-    else:
-        try:
-            if typ == 0:
-                iv, ct = ct.split("|", 2)
-            else:
-                iv, ct, mac = ct.split("|", 3)
-        except Exception:
+    if typ != _ASYM:
+        parts = ct.split("|")
+        if len(parts) != (2 if typ == 0 else 3):
             raise MissingPartsDecryptError(f"{ct} is missing parts")
-    if iv:
-        try:
-            iv = b64decode(iv)
-        except Exception:
-            raise B64DecryptError(f"iv {iv} not valid")
-    if mac:
-        try:
-            mac = b64decode(mac)[0:32]
-        except Exception:
-            raise B64DecryptError(f"mac {mac} not valid")
+        if typ == 0:
+            iv, ct = parts
+        else:
+            iv, ct, mac = parts
     try:
-        ct = b64decode(ct)
+        return (
+            typ,
+            a2b_base64(iv) if iv else iv,
+            a2b_base64(ct),
+            a2b_base64(mac)[0:32] if mac else mac,
+        )
     except Exception:
-        raise B64DecryptError(f"ct {ct} not valid")
-    return typ, iv, ct, mac
+        # decode again part by part, to report the invalid one
+        for name, part in (("iv", iv), ("mac", mac), ("ct", ct)):
+            if part:
+                _b64decode(part, name)
+        raise
 
 
 def is_encrypted(cipher_string):
-    try:
-        decode_cipher_string(cipher_string)
-    except DecodeEncKeyError:
+    """check the structure of a cipher string, without decoding its parts"""
+    if not isinstance(cipher_string, str) or not _is_cipher_string(
+        cipher_string
+    ):
         return False
-    else:
+    typ = ord(cipher_string[0]) - 48
+    if typ > 8:
+        return False
+    if typ == _ASYM:
         return True
+    return cipher_string.count("|", 2) == (1 if typ == 0 else 2)
 
 
 def make_master_key(password, salt, iterations=ITERATIONS):
@@ -132,14 +158,16 @@ def hash_password(password, salt, iterations=ITERATIONS):
     return base64.b64encode(hashpw), master_key
 
 
-def load_rsa_key(key):
-    rsakeys = CACHE.setdefault("rsa", {})
-    if not isinstance(key, RSA.RsaKey):
-        try:
-            key = rsakeys[key]
-        except KeyError:
-            rsakeys[key] = RSA.importKey(key)
-            key = rsakeys[key]
+def load_rsa_key(key, backend=None, key_cache=None):
+    """import an encoded RSA key with the backend, through a RSAKeyCache,
+    the shared one by default"""
+    backend = backend or get_backend()
+    if isinstance(key, RSA.RsaKey) and backend.name != "pycryptodome":
+        key = key.exportKey("DER")
+    if isinstance(key, (bytes, str)):
+        if key_cache is None:
+            key_cache = RSA_KEY_CACHE
+        key = key_cache.load(key, backend)
     return key
 
 
@@ -151,13 +179,13 @@ def aes_encrypt(plaintext, key, charset="utf-8"):
     padding = bytes([pad_len] * pad_len)
     content = plaintext + padding
     iv = token_bytes(16)
-    c = AES.new(enc, AES.MODE_CBC, iv)
-    ct = c.encrypt(content)
+    ct = get_backend().aes_cbc_encrypt(enc, iv, content)
     cmac = hmac_new(mac, iv + ct, sha256)
     return iv, ct, cmac
 
 
 def encrypt_sym(plaintext, key, to_bytes=False, *a, **kw):
+    kw.pop("key_cache", None)
     # inspired from bitwarden/jslib:src/services/crypto.service.ts
     typ, (iv, ct, mac) = int(CIPHERS.sym), aes_encrypt(
         plaintext, key, *a, **kw
@@ -187,8 +215,11 @@ def encrypt_sym_to_bytes(plaintext, key, *a, **kw):
     return encrypt_sym(plaintext, key, *a, **kw)
 
 
-def encrypt_asym(plaintext, key, *a, **kw):
-    cipher = PKCS1_OAEP.new(load_rsa_key(key)).encrypt(plaintext)
+def encrypt_asym(plaintext, key, *a, key_cache=None, **kw):
+    backend = get_backend()
+    cipher = backend.rsa_oaep_encrypt(
+        load_rsa_key(key, backend, key_cache), plaintext
+    )
     b64_ct = b64encode(cipher).decode()
     typ = CIPHERS.asym
     return ENCODED_CIPHER[typ].format(**locals())
@@ -205,8 +236,9 @@ def encrypt(typ, plaintext, key, *a, **kw):
 def get_sym_enc_mac(key):
     # symmetric master_key of the user
     if len(key) == 32:
-        enc = hkdf_expand(key, b"enc", 32, sha256)
-        mac = hkdf_expand(key, b"mac", 32, sha256)
+        backend = get_backend()
+        enc = backend.hkdf_expand(key, b"enc", 32)
+        mac = backend.hkdf_expand(key, b"mac", 32)
     # symmetric key of an organization
     elif len(key) == 64:
         enc = key[:32]
@@ -221,8 +253,7 @@ def decrypt_sym(dct, key, div, dmac, *a, **kw):
         raise DecryptError(
             f"Symmetric hmac verification failed {bytes(hdmac).hex()} / {bytes(dmac).hex()}. Check your password."
         )
-    c = AES.new(enc, AES.MODE_CBC, div)
-    plaintext = c.decrypt(dct)
+    plaintext = get_backend().aes_cbc_decrypt(enc, div, dct)
     pad_len = plaintext[-1]
     padding = bytes([pad_len] * pad_len)
     if plaintext[-pad_len:] == padding:
@@ -230,8 +261,11 @@ def decrypt_sym(dct, key, div, dmac, *a, **kw):
     return plaintext
 
 
-def decrypt_asym(dct, key, *a, **kw):
-    return PKCS1_OAEP.new(load_rsa_key(key)).decrypt(dct)
+def decrypt_asym(dct, key, *a, key_cache=None, **kw):
+    backend = get_backend()
+    return backend.rsa_oaep_decrypt(
+        load_rsa_key(key, backend, key_cache), dct
+    )
 
 
 def decrypt_bytes(cipher_bytes, key, *a, **kw):
@@ -260,9 +294,10 @@ def decrypt(cipher_string, key, *a, **kw):
 def strech_key(key):
     stretched_key = key
     if len(stretched_key) < 64:
-        stretched_key = hkdf_expand(key, b"enc", 32, sha256) + hkdf_expand(
-            key, b"mac", 32, sha256
-        )
+        backend = get_backend()
+        stretched_key = backend.hkdf_expand(
+            key, b"enc", 32
+        ) + backend.hkdf_expand(key, b"mac", 32)
     return stretched_key
 
 
@@ -0,0 +1,212 @@
+"""Implementations of the primitives used by `vaultwarden.utils.crypto`
+
+Two backends are provided: pycryptodome, always installed, and OpenSSL
+through the optional `cryptography` package. Unless one is set with
+`set_backend`, the fastest available on the host is selected on first use.
+"""
+
+from abc import ABC, abstractmethod
+from hashlib import sha256
+import threading
+import time
+from typing import Any
+
+from Crypto.Cipher import AES, PKCS1_OAEP
+from Crypto.PublicKey import RSA
+from hkdf import hkdf_expand
+
+try:
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding, rsa
+    from cryptography.hazmat.primitives.ciphers import (
+        Cipher,
+        algorithms,
+        modes,
+    )
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDFExpand
+except ImportError:  # pragma: no cover
+    Cipher = None  # type: ignore[assignment,misc]
+
+# Payload sizes and number of rounds of the selection of the fastest backend
+PROBE_SIZES = (64, 1024, 16 * 1024)
+PROBE_ROUNDS = 32
+
+
+class CryptoBackend(ABC):
+    """AES-256-CBC, RSA-OAEP-SHA1 and HKDF-SHA256 expansion primitives.
+
+    The AES methods take unpadded multiples of the block size, the RSA
+    methods take keys returned by `import_rsa_key`. A backend missing one of
+    them can not be instantiated.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def aes_cbc_encrypt(self, key: bytes, iv: bytes, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def aes_cbc_decrypt(self, key: bytes, iv: bytes, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def import_rsa_key(self, key: bytes | str) -> Any:
+        """Import a DER or PEM encoded, public or private, RSA key"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def rsa_oaep_encrypt(self, key: Any, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def rsa_oaep_decrypt(self, key: Any, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def hkdf_expand(self, key: bytes, info: bytes, length: int) -> bytes:
+        raise NotImplementedError
+
+
+class PyCryptodomeBackend(CryptoBackend):
+    name = "pycryptodome"
+
+    def aes_cbc_encrypt(self, key: bytes, iv: bytes, data: bytes) -> bytes:
+        return AES.new(key, AES.MODE_CBC, iv).encrypt(data)
+
+    def aes_cbc_decrypt(self, key: bytes, iv: bytes, data: bytes) -> bytes:
+        return AES.new(key, AES.MODE_CBC, iv).decrypt(data)
+
+    def import_rsa_key(self, key: bytes | str) -> Any:
+        return RSA.importKey(key)
+
+    def rsa_oaep_encrypt(self, key: Any, data: bytes) -> bytes:
+        return PKCS1_OAEP.new(key).encrypt(data)
+
+    def rsa_oaep_decrypt(self, key: Any, data: bytes) -> bytes:
+        return PKCS1_OAEP.new(key).decrypt(data)
+
+    def hkdf_expand(self, key: bytes, info: bytes, length: int) -> bytes:
+        return hkdf_expand(key, info, length, sha256)
+
+
+class OpenSSLBackend(CryptoBackend):
+    name = "openssl"
+
+    def __init__(self) -> None:
+        if Cipher is None:
+            raise ImportError(
+                "The openssl crypto backend requires the cryptography package"
+            )
+        self._oaep = padding.OAEP(
+            mgf=padding.MGF1(algorithm=hashes.SHA1()),
+            algorithm=hashes.SHA1(),
+            label=None,
+        )
+
+    def aes_cbc_encrypt(self, key: bytes, iv: bytes, data: bytes) -> bytes:
+        encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+        return encryptor.update(data) + encryptor.finalize()
+
+    def aes_cbc_decrypt(self, key: bytes, iv: bytes, data: bytes) -> bytes:
+        decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+        return decryptor.update(data) + decryptor.finalize()
+
+    def import_rsa_key(self, key: bytes | str) -> Any:
+        if isinstance(key, str):
+            key = key.encode()
+        if key.lstrip().startswith(b"-----"):
+            if b"PRIVATE" in key:
+                return serialization.load_pem_private_key(key, password=None)
+            return serialization.load_pem_public_key(key)
+        try:
+            return serialization.load_der_private_key(key, password=None)
+        except ValueError:
+            return serialization.load_der_public_key(key)
+
+    def rsa_oaep_encrypt(self, key: Any, data: bytes) -> bytes:
+        if isinstance(key, rsa.RSAPrivateKey):
+            key = key.public_key()
+        return key.encrypt(data, self._oaep)
+
+    def rsa_oaep_decrypt(self, key: Any, data: bytes) -> bytes:
+        return key.decrypt(data, self._oaep)
+
+    def hkdf_expand(self, key: bytes, info: bytes, length: int) -> bytes:
+        return HKDFExpand(
+            algorithm=hashes.SHA256(), length=length, info=info
+        ).derive(key)
+
+
+BACKENDS: dict[str, type[CryptoBackend]] = {
+    PyCryptodomeBackend.name: PyCryptodomeBackend,
+    OpenSSLBackend.name: OpenSSLBackend,
+}
+
+_backend: CryptoBackend | None = None
+_lock = threading.Lock()
+
+
+def available_backends() -> list[CryptoBackend]:
+    """Instances of the backends whose dependencies are installed"""
+    res = []
+    for backend_class in BACKENDS.values():
+        try:
+            res.append(backend_class())
+        except ImportError:
+            continue
+    return res
+
+
+def _probe(backend: CryptoBackend) -> float:
+    """Time the symmetric operations run for each encrypted string"""
+    key = bytes(range(32))
+    iv = bytes(16)
+    start = time.perf_counter()
+    for _ in range(PROBE_ROUNDS):
+        backend.hkdf_expand(key, b"enc", 32)
+        for size in PROBE_SIZES:
+            data = backend.aes_cbc_encrypt(key, iv, bytes(size))
+            backend.aes_cbc_decrypt(key, iv, data)
+    return time.perf_counter() - start
+
+
+def select_fastest_backend() -> CryptoBackend:
+    """Get the available backend running the probe the fastest.
+
+    Only the symmetric operations are timed: AES and HKDF run for every
+    encrypted string, RSA once per organization key and timing it requires
+    generating a key. For RSA bound workloads, like confirming many users,
+    set the backend with `set_backend("openssl")`, faster for RSA.
+    """
+    backends = available_backends()
+    if len(backends) == 1:
+        return backends[0]
+    # best of three, the first round also warms the backends up
+    return min(backends, key=lambda b: min(_probe(b) for _ in range(3)))
+
+
+def get_backend() -> CryptoBackend:
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                _backend = select_fastest_backend()
+    return _backend
+
+
+def set_backend(backend: CryptoBackend | str | None) -> CryptoBackend | None:
+    """
+    Set the backend used by the crypto functions
+    :param backend: a backend or its name, None to select the fastest again
+    :return: the previous backend
+    """
+    global _backend
+    if isinstance(backend, str):
+        try:
+            backend = BACKENDS[backend]()
+        except KeyError:
+            raise ValueError(f"Unknown crypto backend {backend}") from None
+    with _lock:
+        previous, _backend = _backend, backend
+    return previous
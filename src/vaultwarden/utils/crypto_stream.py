@@ -0,0 +1,241 @@
+from collections.abc import Iterable
+from functools import partial
+from hashlib import sha256
+import hmac
+from secrets import token_bytes
+from tempfile import SpooledTemporaryFile
+from typing import Any, BinaryIO, cast
+
+from Crypto.Cipher import AES
+
+from vaultwarden.utils.crypto import (
+    CIPHERS,
+    DecryptError,
+    UnimplementedError,
+    get_sym_enc_mac,
+)
+
+# Size of the chunks read from or written to streams
+STREAM_CHUNK_SIZE = 64 * 1024
+# Size of the encrypted streams kept in memory while verified, larger ones
+# are spooled to a temporary file
+STREAM_SPOOL_SIZE = 8 * 1024 * 1024
+
+BLOCK_SIZE = AES.block_size
+# type (1 byte) | iv (16 bytes) | mac (32 bytes), before the ciphertext
+HEADER_SIZE = 1 + BLOCK_SIZE + 32
+
+
+class SymStreamDecryptor:
+    """Incrementally verify and decrypt a type 2 encrypted byte stream.
+
+    The stream uses the layout produced by `encrypt_sym_to_bytes`. The HMAC
+    covers the whole ciphertext, so it can only be verified by `finalize`:
+    the plaintext returned by `update` must be discarded if it raises.
+    `decrypt_stream` verifies the stream first, and decrypts it with
+    `verified=True` to skip a second HMAC computation.
+    """
+
+    def __init__(self, key: bytes, verified: bool = False):
+        self._enc, self._mac = get_sym_enc_mac(key)
+        self._verified = verified
+        self._header = bytearray()
+        self._pending = bytearray()
+        self._cipher: Any = None
+        self._hmac: hmac.HMAC | None = None
+        self._digest = b""
+
+    def _start(self) -> None:
+        if self._header[0] != CIPHERS.sym:
+            raise UnimplementedError(
+                f"{self._header[0]} encType decryption is not implemented"
+            )
+        iv = bytes(self._header[1 : 1 + BLOCK_SIZE])
+        self._digest = bytes(self._header[1 + BLOCK_SIZE :])
+        self._cipher = AES.new(self._enc, AES.MODE_CBC, iv)
+        self._hmac = hmac.new(self._mac, iv, sha256)
+
+    def update(self, data: bytes) -> bytes:
+        """Feed encrypted bytes, return the plaintext decrypted so far"""
+        if self._cipher is None:
+            missing = HEADER_SIZE - len(self._header)
+            self._header += data[:missing]
+            data = data[missing:]
+            if len(self._header) < HEADER_SIZE:
+                return b""
+            self._start()
+        assert self._hmac is not None and self._cipher is not None
+        if not self._verified:
+            self._hmac.update(data)
+        self._pending += data
+        # Keep the last block back, it holds the padding
+        size = (len(self._pending) - 1) // BLOCK_SIZE * BLOCK_SIZE
+        if size <= 0:
+            return b""
+        with memoryview(self._pending) as view:
+            plaintext = self._cipher.decrypt(view[:size])
+        del self._pending[:size]
+        return plaintext
+
+    def finalize(self) -> bytes:
+        """Verify the HMAC and return the last unpadded plaintext block"""
+        if self._cipher is None or len(self._pending) != BLOCK_SIZE:
+            raise DecryptError("Truncated or malformed encrypted stream")
+        assert self._hmac is not None
+        if not self._verified and not hmac.compare_digest(
+            self._hmac.digest(), self._digest
+        ):
+            raise DecryptError("Symmetric hmac verification failed")
+        plaintext = self._cipher.decrypt(bytes(self._pending))
+        pad_len = plaintext[-1]
+        if plaintext[-pad_len:] == bytes([pad_len] * pad_len):
+            plaintext = plaintext[:-pad_len]
+        return plaintext
+
+
+class SymStreamEncryptor:
+    """Incrementally encrypt a byte stream with the type 2 layout.
+
+    The layout produced by `encrypt_sym_to_bytes` puts the HMAC before the
+    ciphertext, so `header` is only available once `finalize` was called.
+    """
+
+    def __init__(self, key: bytes):
+        enc, mac = get_sym_enc_mac(key)
+        self._iv = token_bytes(BLOCK_SIZE)
+        self._cipher = AES.new(enc, AES.MODE_CBC, self._iv)
+        self._hmac = hmac.new(mac, self._iv, sha256)
+        self._pending = bytearray()
+        self._digest: bytes | None = None
+
+    def update(self, data: bytes) -> bytes:
+        """Feed plaintext, return the ciphertext of the full blocks so far"""
+        self._pending += data
+        size = len(self._pending) // BLOCK_SIZE * BLOCK_SIZE
+        if size == 0:
+            return b""
+        with memoryview(self._pending) as view:
+            ciphertext = self._cipher.encrypt(view[:size])
+        del self._pending[:size]
+        self._hmac.update(ciphertext)
+        return ciphertext
+
+    def finalize(self) -> bytes:
+        """Pad and encrypt the last block, return its ciphertext"""
+        pad_len = BLOCK_SIZE - len(self._pending)
+        self._pending += bytes([pad_len] * pad_len)
+        ciphertext = self._cipher.encrypt(bytes(self._pending))
+        self._pending.clear()
+        self._hmac.update(ciphertext)
+        self._digest = self._hmac.digest()
+        return ciphertext
+
+    @property
+    def header(self) -> bytes:
+        if self._digest is None:
+            raise ValueError("The stream must be finalized first")
+        return bytes([CIPHERS.sym]) + self._iv + self._digest
+
+
+def encrypt_stream(
+    source: BinaryIO | Iterable[bytes],
+    key: bytes,
+    sink: BinaryIO,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> int:
+    """Encrypt a byte stream into a seekable file-like sink.
+
+    Args:
+        source: A binary file-like object, or an iterable of bytes.
+        key: The symmetric key to encrypt with.
+        sink: Where to write the encrypted bytes, its header is written last.
+        chunk_size: The size of the chunks read from a file-like source.
+
+    Returns:
+        The number of encrypted bytes written.
+    """
+    if hasattr(source, "read"):
+        source = iter(partial(source.read, chunk_size), b"")
+    encryptor = SymStreamEncryptor(key)
+    start = sink.tell()
+    sink.write(bytes(HEADER_SIZE))
+    written = HEADER_SIZE
+    for chunk in source:
+        written += sink.write(encryptor.update(chunk))
+    written += sink.write(encryptor.finalize())
+    sink.seek(start)
+    sink.write(encryptor.header)
+    sink.seek(start + written)
+    return written
+
+
+def verify_stream(
+    source: BinaryIO, key: bytes, chunk_size: int = STREAM_CHUNK_SIZE
+) -> None:
+    """Verify the HMAC of a type 2 encrypted byte stream, without decrypting
+    it.
+
+    Args:
+        source: A binary file-like object, read to its end.
+        key: The symmetric key the stream was encrypted with.
+        chunk_size: The size of the chunks read from the source.
+
+    Raises:
+        DecryptError: The stream is truncated, malformed or tampered with.
+    """
+    _, mac = get_sym_enc_mac(key)
+    header = source.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise DecryptError("Truncated or malformed encrypted stream")
+    if header[0] != CIPHERS.sym:
+        raise UnimplementedError(
+            f"{header[0]} encType decryption is not implemented"
+        )
+    digest = hmac.new(mac, header[1 : 1 + BLOCK_SIZE], sha256)
+    size = 0
+    for chunk in iter(partial(source.read, chunk_size), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    if size == 0 or size % BLOCK_SIZE:
+        raise DecryptError("Truncated or malformed encrypted stream")
+    if not hmac.compare_digest(digest.digest(), header[1 + BLOCK_SIZE :]):
+        raise DecryptError("Symmetric hmac verification failed")
+
+
+def decrypt_stream(
+    chunks: Iterable[bytes],
+    key: bytes,
+    sink: BinaryIO,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    spool_size: int = STREAM_SPOOL_SIZE,
+) -> int:
+    """Decrypt a type 2 encrypted byte stream into a file-like sink.
+
+    The encrypted bytes are spooled and their HMAC verified before anything
+    is decrypted: the sink only receives authenticated plaintext, and
+    nothing when the stream is truncated or tampered with.
+
+    Args:
+        chunks: The encrypted bytes, in chunks of any size.
+        key: The symmetric key the stream was encrypted with.
+        sink: Where to write the plaintext.
+        chunk_size: The size of the chunks read back from the spool.
+        spool_size: The size of the spool kept in memory, larger streams
+            are written to a temporary file.
+
+    Returns:
+        The number of plaintext bytes written.
+    """
+    with SpooledTemporaryFile(max_size=spool_size) as file:
+        spool = cast("BinaryIO", file)
+        for chunk in chunks:
+            spool.write(chunk)
+        spool.seek(0)
+        verify_stream(spool, key, chunk_size)
+        spool.seek(0)
+        decryptor = SymStreamDecryptor(key, verified=True)
+        written = 0
+        for chunk in iter(partial(spool.read, chunk_size), b""):
+            written += sink.write(decryptor.update(chunk))
+        written += sink.write(decryptor.finalize())
+    return written
@@ -0,0 +1,153 @@
+"""Derivation of the master key of the users, PBKDF2-SHA256 or Argon2id
+
+The derivations run in a pool of threads, both KDFs releasing the GIL, and
+their results are cached: a client logging in again, or several clients of
+the same account, derive the master key once.
+"""
+
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from hashlib import sha256
+import threading
+from typing import Protocol
+
+from vaultwarden.models.enum import KdfType
+from vaultwarden.models.exception_models import BitwardenError
+from vaultwarden.utils.cache import LRUCache
+from vaultwarden.utils.crypto import make_master_key
+
+try:
+    from argon2.low_level import Type, hash_secret_raw
+except ImportError:  # pragma: no cover
+    hash_secret_raw = None  # type: ignore[assignment]
+
+# Number of derived master keys kept in memory
+KDF_CACHE_SIZE = 32
+# Number of master keys derived concurrently
+KDF_MAX_WORKERS = 4
+
+
+class KdfSettings(Protocol):
+    Kdf: int
+    KdfIterations: int
+    KdfMemory: int | None
+    KdfParallelism: int | None
+
+
+@dataclass(frozen=True)
+class KdfParams:
+    """
+    Parameters of the KDF of an account
+    :param kdf: the KDF type
+    :param iterations: the iterations, or the time cost of Argon2id
+    :param memory: the memory of Argon2id, in MiB
+    :param parallelism: the lanes of Argon2id, each hashed by a thread
+    """
+
+    kdf: KdfType = KdfType.PBKDF2_SHA256
+    iterations: int = 600000
+    memory: int | None = None
+    parallelism: int | None = None
+
+    @classmethod
+    def from_settings(cls, settings: KdfSettings) -> "KdfParams":
+        """Parameters of a connect token or a prelogin response"""
+        try:
+            kdf = KdfType(settings.Kdf)
+        except ValueError:
+            raise BitwardenError(f"Unsupported KDF {settings.Kdf}") from None
+        return cls(
+            kdf=kdf,
+            iterations=settings.KdfIterations,
+            memory=settings.KdfMemory,
+            parallelism=settings.KdfParallelism,
+        )
+
+
+def _pbkdf2(password: str, salt: str, params: KdfParams) -> bytes:
+    return make_master_key(password, salt, params.iterations)
+
+
+def _argon2id(password: str, salt: str, params: KdfParams) -> bytes:
+    if hash_secret_raw is None:
+        raise BitwardenError(
+            "Argon2id accounts require the argon2-cffi package, "
+            "install python-vaultwarden[argon2]"
+        )
+    if params.memory is None or params.parallelism is None:
+        raise BitwardenError("Missing Argon2id memory or parallelism")
+    return hash_secret_raw(
+        secret=password.encode("utf-8"),
+        # the salt must be 16 bytes at least, the email may be shorter
+        salt=sha256(salt.lower().encode("utf-8")).digest(),
+        time_cost=params.iterations,
+        memory_cost=params.memory * 1024,
+        parallelism=params.parallelism,
+        hash_len=32,
+        type=Type.ID,
+    )
+
+
+DERIVATIONS: dict[KdfType, Callable[[str, str, KdfParams], bytes]] = {
+    KdfType.PBKDF2_SHA256: _pbkdf2,
+    KdfType.Argon2id: _argon2id,
+}
+
+_cache: LRUCache[tuple, Future[bytes]] = LRUCache(KDF_CACHE_SIZE)
+_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=KDF_MAX_WORKERS, thread_name_prefix="vaultwarden-kdf"
+        )
+    return _executor
+
+
+def _evict_failed(key: tuple, future: Future[bytes]) -> None:
+    if future.exception() is not None:
+        with _lock:
+            if _cache.get(key) is future:
+                _cache.pop(key)
+
+
+def derive_master_key_async(
+    password: str, salt: str, params: KdfParams
+) -> Future[bytes]:
+    """Start deriving a master key in the pool, unless already derived.
+
+    Args:
+        password: The master password.
+        salt: The email of the user.
+        params: The KDF parameters of the account.
+
+    Returns:
+        The future master key, shared by the concurrent calls.
+    """
+    # the password is hashed, not kept as is in the key
+    key = (params, salt.lower(), sha256(password.encode("utf-8")).digest())
+    with _lock:
+        future = _cache.get(key)
+        if future is not None:
+            return future
+        future = _get_executor().submit(
+            DERIVATIONS[params.kdf], password, salt, params
+        )
+        _cache.set(key, future)
+    # a failure, like a missing package, is not cached
+    future.add_done_callback(lambda f: _evict_failed(key, f))
+    return future
+
+
+def derive_master_key(password: str, salt: str, params: KdfParams) -> bytes:
+    """Derive a master key in the pool, see `derive_master_key_async`"""
+    return derive_master_key_async(password, salt, params).result()
+
+
+def clear_cache() -> None:
+    """Forget the derived master keys"""
+    _cache.clear()
@@ -0,0 +1,34 @@
+from hashlib import sha256
+from typing import Any
+
+from vaultwarden.utils.cache import LRUCache
+from vaultwarden.utils.crypto_backend import CryptoBackend
+
+# Number of imported RSA keys kept by the default cache
+RSA_KEY_CACHE_SIZE = 256
+
+
+class RSAKeyCache(LRUCache[tuple[str, bytes], Any]):
+    """Bounded cache of the RSA keys imported by the crypto backends.
+
+    The entries are keyed by the backend name and the SHA-256 of the
+    encoded key, the encoded private keys are not kept.
+
+    Args:
+        maxsize: The maximum number of imported keys kept.
+    """
+
+    def __init__(self, maxsize: int = RSA_KEY_CACHE_SIZE):
+        super().__init__(maxsize)
+
+    def load(self, key: bytes | str, backend: CryptoBackend) -> Any:
+        """Import an encoded key with the backend, unless cached"""
+        encoded = key.encode() if isinstance(key, str) else key
+        return self.get_or_set(
+            (backend.name, sha256(encoded).digest()),
+            lambda: backend.import_rsa_key(key),
+        )
+
+
+# Shared by the clients built without a cache of their own
+RSA_KEY_CACHE = RSAKeyCache()
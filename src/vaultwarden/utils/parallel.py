@@ -0,0 +1,37 @@
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+import os
+from typing import TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Below this number of items, spawning worker processes costs more than
+# running the function in the current process
+PROCESS_MAP_MIN_ITEMS = 64
+
+
+def process_map(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int | None = None,
+    min_items: int = PROCESS_MAP_MIN_ITEMS,
+) -> list[R]:
+    """Apply a CPU-bound function to items across a pool of processes.
+
+    Args:
+        func: A picklable function, defined at module level.
+        items: The items to apply the function to.
+        max_workers: The number of processes, defaults to the number of CPUs.
+        min_items: Run in the current process below this number of items.
+
+    Returns:
+        The results, in the order of the items.
+    """
+    items = list(items)
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1 or len(items) < min_items:
+        return [func(item) for item in items]
+    chunksize = max(1, len(items) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, items, chunksize=chunksize))
@@ -0,0 +1,45 @@
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+import threading
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Run a call once for all the concurrent callers of the same key.
+
+    The callers arriving while the call of their key runs wait for it and
+    share its result, or its exception. Nothing is kept once the call is
+    done: the next caller runs it again.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, Future[Any]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if future is None:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        """Number of calls running"""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,97 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+import os
+import sqlite3
+import time
+
+# Seconds during which a cached sync is served without asking the server
+SYNC_CACHE_TTL = 300
+
+# Fields of the connect token needed to decrypt the cached sync offline,
+# they are encrypted with the master key of the user
+CACHED_TOKEN_FIELDS = {
+    "Kdf",
+    "KdfIterations",
+    "KdfMemory",
+    "KdfParallelism",
+    "Key",
+    "PrivateKey",
+}
+
+
+@dataclass
+class CachedSync:
+    revision: int
+    checked_at: float
+    token: str
+    payload: str
+
+
+class SyncCache:
+    """SQLite store of still encrypted sync payloads, shared by processes.
+
+    Args:
+        path: The path of the SQLite database, created with 0600 mode.
+        ttl: Seconds during which a cached sync is served as is, after
+            which it is revalidated against the account revision date.
+    """
+
+    def __init__(self, path: str, ttl: float = SYNC_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        if not os.path.exists(path):
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_cache ("
+                "account TEXT PRIMARY KEY, revision INTEGER NOT NULL, "
+                "checked_at REAL NOT NULL, token TEXT NOT NULL, "
+                "payload TEXT NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, account: str) -> CachedSync | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT revision, checked_at, token, payload "
+                "FROM sync_cache WHERE account = ?",
+                (account,),
+            ).fetchone()
+        return None if row is None else CachedSync(*row)
+
+    def is_fresh(self, entry: CachedSync) -> bool:
+        return time.time() - entry.checked_at < self.ttl
+
+    def put(
+        self, account: str, revision: int, token: str, payload: str
+    ) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_cache "
+                "(account, revision, checked_at, token, payload) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (account, revision, time.time(), token, payload),
+            )
+
+    def touch(self, account: str) -> None:
+        """Mark a cached sync as revalidated against the server"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE sync_cache SET checked_at = ? WHERE account = ?",
+                (time.time(), account),
+            )
+
+    def delete(self, account: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM sync_cache WHERE account = ?", (account,)
+            )
@@ -0,0 +1,65 @@
+from types import TracebackType
+
+from httpx import BaseTransport, HTTPTransport, Limits, Request, Response
+
+# Defaults of httpx, for the pools shared by several clients
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 5.0
+
+
+class ConnectionPool(BaseTransport):
+    """Pool of HTTP connections shared by several clients.
+
+    Clients built with the same pool reuse its connections, kept alive
+    between their requests, instead of opening their own. Closing a client
+    does not close the pool, `shutdown` closes it once every client is done.
+
+    Args:
+        max_connections: The maximum number of connections, all hosts.
+        max_keepalive_connections: The maximum number of idle connections.
+        keepalive_expiry: The seconds an idle connection is kept open.
+        http2: Multiplex the requests over HTTP/2 connections, requires
+            the `h2` package.
+        retries: The number of retries of the failed connections.
+        transport: The transport to share instead of a new HTTPTransport.
+    """
+
+    def __init__(
+        self,
+        max_connections: int | None = MAX_CONNECTIONS,
+        max_keepalive_connections: int | None = MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float | None = KEEPALIVE_EXPIRY,
+        http2: bool = False,
+        retries: int = 0,
+        transport: BaseTransport | None = None,
+    ):
+        if transport is None:
+            transport = HTTPTransport(
+                limits=Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive_connections,
+                    keepalive_expiry=keepalive_expiry,
+                ),
+                http2=http2,
+                retries=retries,
+            )
+        self.transport = transport
+
+    def handle_request(self, request: Request) -> Response:
+        return self.transport.handle_request(request)
+
+    def close(self) -> None:
+        """Called by the clients on close, the pool stays open for others"""
+
+    def shutdown(self) -> None:
+        """Close the connections of the pool"""
+        self.transport.close()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None = None,
+        exc_value: BaseException | None = None,
+        traceback: TracebackType | None = None,
+    ) -> None:
+        self.shutdown()
@@ -0,0 +1,5 @@
+"""Benchmarks of the clients against the in-process fake server
+
+Run them with `python -m tests.benchmarks --scales 1000,10000`, they are
+not collected by the test suite.
+"""
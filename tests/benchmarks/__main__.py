@@ -0,0 +1,43 @@
+import argparse
+
+from tests.benchmarks.suite import BENCHMARKS, Result, measure
+
+
+def report(result: Result) -> str:
+    peak = "" if result.peak_mib is None else f"{result.peak_mib:10.1f}"
+    return (
+        f"{result.name:<24}{result.scale:>8}{result.seconds * 1000:>12.1f}"
+        f"{result.requests:>10}{peak}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the clients against the fake server"
+    )
+    parser.add_argument(
+        "--scales",
+        default="1000",
+        help="comma separated numbers of objects, like 1000,10000,100000",
+    )
+    parser.add_argument(
+        "--only", action="append", help="name of a benchmark to run"
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="trace the peak memory, which slows the benchmarks down",
+    )
+    args = parser.parse_args()
+    scales = [int(scale) for scale in args.scales.split(",")]
+    header = f"{'benchmark':<24}{'scale':>8}{'ms':>12}{'requests':>10}"
+    print(header + (f"{'peak MiB':>10}" if args.memory else ""))
+    for bench in BENCHMARKS:
+        if args.only and bench.name not in args.only:
+            continue
+        for scale in scales:
+            print(report(measure(bench, scale, memory=args.memory)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Compare the cipher string parser with the former regex based one
+
+Run them with `python -m tests.benchmarks.cipher_string --count 100000`.
+"""
+
+import argparse
+from base64 import b64decode
+from collections.abc import Callable
+import re
+from secrets import token_bytes
+import time
+
+from vaultwarden.utils.crypto import (
+    CIPHERS,
+    B64DecryptError,
+    DecodeEncKeyError,
+    MissingPartsDecryptError,
+    WrongFormatError,
+    WrongTypeDecryptError,
+    decode_cipher_string,
+    encrypt_sym,
+    is_encrypted,
+)
+
+ENCRYPTED_STRING_RE = re.compile("^[0-9][.].*=.*", flags=re.I | re.M)
+
+
+def regex_decode_cipher_string(cipher_string):
+    """The parser replaced by `decode_cipher_string`, as the baseline"""
+    iv = None
+    mac = None
+    if not ENCRYPTED_STRING_RE.match(cipher_string):
+        raise WrongFormatError(f"{cipher_string}")
+    try:
+        typ = int(cipher_string[0:1])
+        assert typ < 9
+    except (AssertionError, ValueError):
+        raise WrongTypeDecryptError(f"{cipher_string} is not valid") from None
+    ct = cipher_string[2:]
+    if typ != CIPHERS.asym:
+        try:
+            if typ == 0:
+                iv, ct = ct.split("|", 2)
+            else:
+                iv, ct, mac = ct.split("|", 3)
+        except Exception:
+            raise MissingPartsDecryptError(f"{ct} is missing parts") from None
+    if iv:
+        try:
+            iv = b64decode(iv)
+        except Exception:
+            raise B64DecryptError(f"iv {iv} not valid") from None
+    if mac:
+        try:
+            mac = b64decode(mac)[0:32]
+        except Exception:
+            raise B64DecryptError(f"mac {mac} not valid") from None
+    try:
+        ct = b64decode(ct)
+    except Exception:
+        raise B64DecryptError(f"ct {ct} not valid") from None
+    return typ, iv, ct, mac
+
+
+def regex_is_encrypted(cipher_string):
+    try:
+        regex_decode_cipher_string(cipher_string)
+    except DecodeEncKeyError:
+        return False
+    return True
+
+
+def measure(func: Callable[[str], object], values: list[str]) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for value in values:
+            func(value)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+    key = token_bytes(64)
+    # names of collections and ciphers, and a share of plain values
+    values = [
+        encrypt_sym(f"team-{i % 50}/project-{i}", key)
+        if i % 10
+        else f"plain-{i}"
+        for i in range(args.count)
+    ]
+    encrypted = [value for value in values if is_encrypted(value)]
+
+    print(f"{'operation':<24}{'regex ms':>12}{'parser ms':>12}{'speedup':>10}")
+    for name, baseline, func, inputs in (
+        (
+            "decode_cipher_string",
+            regex_decode_cipher_string,
+            decode_cipher_string,
+            encrypted,
+        ),
+        ("is_encrypted", regex_is_encrypted, is_encrypted, values),
+    ):
+        before = measure(baseline, inputs)
+        after = measure(func, inputs)
+        print(
+            f"{name:<24}{before * 1000:>12.1f}{after * 1000:>12.1f}"
+            f"{before / after:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Compare the crypto backends across payload and batch sizes
+
+Run them with `python -m tests.benchmarks.crypto --sizes 16,1024,65536`.
+"""
+
+import argparse
+from collections.abc import Callable
+from secrets import token_bytes
+import time
+
+from Crypto.PublicKey import RSA
+from vaultwarden.utils import crypto
+from vaultwarden.utils.crypto_backend import (
+    CryptoBackend,
+    available_backends,
+    select_fastest_backend,
+    set_backend,
+)
+
+# Operations run for each payload of a batch
+OPERATIONS: dict[str, Callable[[dict, bytes], object]] = {
+    "encrypt_sym": lambda ctx, data: crypto.encrypt_sym(data, ctx["key"]),
+    "decrypt_sym": lambda ctx, data: crypto.decrypt(
+        ctx["encrypted"][len(data)], ctx["key"]
+    ),
+    "stretch_key": lambda ctx, data: crypto.strech_key(ctx["key"][:32]),
+    # OAEP-SHA1 with a 2048 bits key fits at most 214 bytes
+    "encrypt_asym": lambda ctx, data: crypto.encrypt_asym(
+        data[:190], ctx["public_key"]
+    ),
+    "decrypt_asym": lambda ctx, data: crypto.decrypt(
+        ctx["asym_encrypted"], ctx["private_key"]
+    ),
+}
+
+
+def context(sizes: list[int]) -> dict:
+    rsa_key = RSA.generate(2048)
+    ctx = {
+        "key": token_bytes(64),
+        "private_key": rsa_key.exportKey("DER", pkcs=8),
+        "public_key": rsa_key.publickey().exportKey("DER"),
+    }
+    ctx["encrypted"] = {
+        size: crypto.encrypt_sym(token_bytes(size), ctx["key"])
+        for size in sizes
+    }
+    ctx["asym_encrypted"] = crypto.encrypt_asym(
+        token_bytes(190), ctx["public_key"]
+    )
+    return ctx
+
+
+def measure(
+    backend: CryptoBackend,
+    operation: Callable[[dict, bytes], object],
+    ctx: dict,
+    size: int,
+    batch: int,
+) -> float:
+    """Best of three runs of the operation on a batch of payloads"""
+    set_backend(backend)
+    data = token_bytes(size)
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(batch):
+            operation(ctx, data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        default="16,1024,65536",
+        help="comma separated payload sizes in bytes",
+    )
+    parser.add_argument(
+        "--batches",
+        default="1,100,1000",
+        help="comma separated numbers of payloads per batch",
+    )
+    parser.add_argument(
+        "--only", action="append", help="name of an operation to run"
+    )
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    batches = [int(batch) for batch in args.batches.split(",")]
+    backends = available_backends()
+    ctx = context(sizes)
+
+    print(
+        f"{'operation':<16}{'size':>8}{'batch':>8}"
+        + "".join(f"{b.name + ' ms':>18}" for b in backends)
+    )
+    for name, operation in OPERATIONS.items():
+        if args.only and name not in args.only:
+            continue
+        for size in sizes:
+            for batch in batches:
+                timings = "".join(
+                    f"{measure(b, operation, ctx, size, batch) * 1000:>18.3f}"
+                    for b in backends
+                )
+                print(f"{name:<16}{size:>8}{batch:>8}{timings}")
+    print(f"selected backend: {select_fastest_backend().name}")
+
+
+if __name__ == "__main__":
+    main()
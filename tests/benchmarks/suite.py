@@ -0,0 +1,233 @@
+"""Representative operations, each built on a server of `scale` objects"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import gc
+import time
+import tracemalloc
+
+from vaultwarden.models.bitwarden import get_organization
+from vaultwarden.models.enum import CipherType
+from vaultwarden.models.sync import SyncData
+
+from tests.fake_server import FakeVaultwarden
+from tests.fixture_generator import generate_dataset
+from tests.mock_client import ORGANIZATION_ID
+
+ORG_ID = str(ORGANIZATION_ID)
+# Collections of each user in the access matrix benchmark
+COLLECTIONS_PER_USER = 5
+
+
+@dataclass
+class Benchmark:
+    name: str
+    # build the server, return the operation to measure
+    setup: Callable[[int], tuple[FakeVaultwarden, Callable[[], object]]]
+
+
+@dataclass
+class Result:
+    name: str
+    scale: int
+    seconds: float
+    requests: int
+    peak_mib: float | None
+
+
+BENCHMARKS: list[Benchmark] = []
+
+
+def benchmark(setup):
+    BENCHMARKS.append(Benchmark(setup.__name__, setup))
+    return setup
+
+
+def logins(count: int) -> list[dict]:
+    return [
+        {
+            "name": f"secret-{i}",
+            "username": f"user-{i}",
+            "password": f"password-{i}",
+            "uri": f"https://host-{i}.example.com",
+        }
+        for i in range(count)
+    ]
+
+
+def dataset_server(scale: int) -> FakeVaultwarden:
+    """A server with `scale` users and ciphers, and a collection for ten"""
+    return FakeVaultwarden(
+        generate_dataset(
+            users=scale, collections=max(scale // 10, 1), ciphers=scale
+        )
+    )
+
+
+@benchmark
+def sync_parse(scale: int):
+    server = dataset_server(scale)
+    client = server.api_client()
+    payload = client._api_request("GET", "api/sync").text
+
+    def run():
+        return len(SyncData.model_validate_json(payload).Ciphers)
+
+    return server, run
+
+
+@benchmark
+def organization_ciphers(scale: int):
+    server = dataset_server(scale)
+
+    def run():
+        org = get_organization(server.api_client(), ORG_ID)
+        return len(org.ciphers())
+
+    return server, run
+
+
+@benchmark
+def organization_collections(scale: int):
+    server = dataset_server(scale)
+
+    def run():
+        org = get_organization(server.api_client(), ORG_ID)
+        return len(org.collections())
+
+    return server, run
+
+
+@benchmark
+def vault_get_secret(scale: int):
+    server = FakeVaultwarden()
+    server.add_ciphers(logins(scale))
+
+    def run():
+        client = server.api_client()
+        return client.get_secret(name=f"secret-{scale // 2}").password
+
+    return server, run
+
+
+@benchmark
+def organization_users(scale: int):
+    server = FakeVaultwarden()
+    server.add_org_users(
+        ORG_ID, [f"user-{i}@example.com" for i in range(scale)]
+    )
+
+    def run():
+        org = get_organization(server.api_client(), ORG_ID)
+        return len(org.users())
+
+    return server, run
+
+
+@benchmark
+def collection_subtree(scale: int):
+    server = FakeVaultwarden()
+    server.add_collections(
+        [f"team-{i % 10}/project-{i // 10}" for i in range(scale)]
+    )
+
+    def run():
+        org = get_organization(server.api_client(), ORG_ID)
+        return len(org.subtree_collections("team-0"))
+
+    return server, run
+
+
+@benchmark
+def access_matrix(scale: int):
+    server = FakeVaultwarden()
+    collection_ids = server.add_collections(
+        [f"collection-{i}" for i in range(max(scale // 10, 1))]
+    )
+    for i in range(scale):
+        server.add_org_users(
+            ORG_ID,
+            [f"user-{i}@example.com"],
+            collections=[
+                (
+                    collection_ids[(i + j) % len(collection_ids)],
+                    {"readOnly": j % 2 == 0},
+                )
+                for j in range(COLLECTIONS_PER_USER)
+            ],
+        )
+
+    def run():
+        org = get_organization(server.api_client(), ORG_ID)
+        matrix = org.access_matrix()
+        return sum(
+            len(matrix.users_with(coll_id, "write"))
+            for coll_id in collection_ids
+        )
+
+    return server, run
+
+
+@benchmark
+def admin_inactive_users(scale: int):
+    server = FakeVaultwarden()
+    now = datetime.now(timezone.utc)
+    server.add_admin_users(
+        [f"user-{i}@example.com" for i in range(scale)],
+        last_active=[now - timedelta(days=i % 365) for i in range(scale)],
+    )
+
+    def run():
+        admin = server.admin_client()
+        report = admin.disable_inactive_users(
+            timedelta(days=180), dry_run=True
+        )
+        return len(report.candidates)
+
+    return server, run
+
+
+@benchmark
+def import_ciphers(scale: int):
+    server = FakeVaultwarden()
+    items = [
+        {
+            "type": CipherType.Login,
+            "name": item["name"],
+            "login": {
+                "username": item["username"],
+                "password": item["password"],
+                "uris": [{"uri": item["uri"], "match": None}],
+            },
+            "collectionIds": [],
+        }
+        for item in logins(scale)
+    ]
+
+    def run():
+        org = get_organization(server.api_client(), ORG_ID)
+        return org.import_ciphers(items, collections=["imported"])
+
+    return server, run
+
+
+def measure(bench: Benchmark, scale: int, memory: bool = False) -> Result:
+    server, run = bench.setup(scale)
+    gc.collect()
+    before = server.request_count()
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        run()
+        seconds = time.perf_counter() - start
+        peak = None
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return Result(
+        bench.name, scale, seconds, server.request_count() - before, peak
+    )
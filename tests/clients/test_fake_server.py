@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import tempfile
+import unittest
+
+from vaultwarden.models.bitwarden import get_organization
+
+from tests.fake_server import FakeVaultwarden
+from tests.fixture_generator import generate_dataset
+from tests.mock_client import ORGANIZATION_ID
+
+
+class TestFakeServer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = FakeVaultwarden()
+        self.collection_ids = self.server.add_collections(
+            ["infra", "infra/db"]
+        )
+        self.server.add_org_users(
+            str(ORGANIZATION_ID),
+            ["member@example.com"],
+            collections=[(self.collection_ids[0], {"readOnly": True})],
+        )
+        self.server.add_ciphers(
+            [{"name": "db", "username": "admin", "password": "secret"}],
+            collection_ids=[self.collection_ids[1]],
+        )
+        self.client = self.server.api_client()
+
+    def test_login_and_sync(self):
+        item = self.client.get_secret(name="db", collection="infra/db")
+        self.assertIsNotNone(item)
+        assert item is not None
+        self.assertEqual(item.password, "secret")
+        self.assertEqual(
+            self.server.requests["POST /identity/connect/token"], 1
+        )
+
+    def test_organization(self):
+        org = get_organization(self.client, ORGANIZATION_ID)
+        self.assertEqual(
+            [u.Email for u in org.users()],
+            ["test-account@example.com", "member@example.com"],
+        )
+        org.create_collection("infra/web")
+        self.assertEqual(
+            [c.Name for c in org.subtree_collections("infra")],
+            ["infra", "infra/db", "infra/web"],
+        )
+        matrix = org.access_matrix()
+        self.assertEqual(
+            [u.Email for u in matrix.users_with(self.collection_ids[0])],
+            ["test-account@example.com", "member@example.com"],
+        )
+        self.assertEqual(
+            [
+                u.Email
+                for u in matrix.users_with(self.collection_ids[0], "write")
+            ],
+            ["test-account@example.com"],
+        )
+
+    def test_admin(self):
+        now = datetime.now(timezone.utc)
+        self.server.add_admin_users(
+            ["old@example.com", "new@example.com"],
+            last_active=[now - timedelta(days=100), now],
+        )
+        admin = self.server.admin_client()
+        report = admin.disable_inactive_users(timedelta(days=90))
+        self.assertEqual(
+            [u.Email for u in report.disabled], ["old@example.com"]
+        )
+        self.assertEqual(
+            [u.Email for u in admin.users(enabled=False)], ["old@example.com"]
+        )
+        self.assertEqual(self.server.requests["POST /admin/"], 1)
+
+
+class TestFixtureGenerator(unittest.TestCase):
+    def test_dataset(self):
+        dataset = generate_dataset(
+            users=20, collections=5, ciphers=10, seed=1, cache_dir=None
+        )
+        again = generate_dataset(
+            users=20, collections=5, ciphers=10, seed=1, cache_dir=None
+        )
+        self.assertEqual(
+            [u["id"] for u in dataset.org_users],
+            [u["id"] for u in again.org_users],
+        )
+        self.assertNotEqual(
+            [u["id"] for u in dataset.org_users],
+            [
+                u["id"]
+                for u in generate_dataset(
+                    users=20, collections=5, ciphers=10, seed=2, cache_dir=None
+                ).org_users
+            ],
+        )
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cached = generate_dataset(
+                users=20, collections=5, ciphers=10, cache_dir=Path(cache_dir)
+            )
+            self.assertEqual(
+                generate_dataset(
+                    users=20,
+                    collections=5,
+                    ciphers=10,
+                    cache_dir=Path(cache_dir),
+                ),
+                cached,
+            )
+
+        server = FakeVaultwarden(dataset)
+        client = server.api_client()
+        org = get_organization(client, ORGANIZATION_ID)
+        self.assertEqual(len(org.users()), 21)
+        self.assertEqual(len(org.ciphers()), 10)
+        self.assertEqual(
+            sorted(c.Name for c in org.collections()),
+            sorted(c.Name for c in org.collection_tree().subtree("")),
+        )
+        item = client.vault().items()[0]
+        self.assertEqual(len(item.password or ""), 24)
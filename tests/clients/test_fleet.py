@@ -0,0 +1,95 @@
+import threading
+import time
+import unittest
+
+from vaultwarden.clients.fleet import Instance, RateLimiter, VaultwardenFleet
+from vaultwarden.models.enum import VaultwardenUserStatus
+from vaultwarden.models.exception_models import VaultwardenAdminError
+
+from tests.fake_server import FakeVaultwarden
+
+
+class TestVaultwardenFleet(unittest.TestCase):
+    def setUp(self) -> None:
+        self.servers = {"eu": FakeVaultwarden(), "us": FakeVaultwarden()}
+        self.servers["eu"].add_admin_users(["alice@example.com"])
+        self.servers["us"].add_admin_users(
+            ["bob@example.com", "carol@example.com"]
+        )
+        self.fleet = VaultwardenFleet(
+            Instance(name, admin=server.admin_client())
+            for name, server in self.servers.items()
+        )
+
+    def test_users(self):
+        self.assertEqual(
+            sorted(
+                (name, user.Email) for name, user in self.fleet.all_users()
+            ),
+            [
+                ("eu", "alice@example.com"),
+                ("us", "bob@example.com"),
+                ("us", "carol@example.com"),
+            ],
+        )
+        results = self.fleet.user(email="bob@example.com")
+        self.assertEqual([r.instance for r in results], ["eu", "us"])
+        self.assertIsInstance(results[0].error, VaultwardenAdminError)
+        assert results[1].value is not None
+        self.assertEqual(results[1].value.Email, "bob@example.com")
+        with self.assertRaises(VaultwardenAdminError):
+            self.fleet.users(instances=["asia"])
+
+    def test_invite(self):
+        results = self.fleet.invite(
+            ["dave@example.com", "alice@example.com"], instances=["eu"]
+        )
+        self.assertEqual(
+            [(r.item, r.value) for r in results],
+            [("dave@example.com", True), ("alice@example.com", True)],
+        )
+        self.assertEqual(
+            self.fleet.instances["eu"]
+            .admin_client.user(email="dave@example.com")
+            .status,
+            VaultwardenUserStatus.Invited,
+        )
+        self.assertEqual(self.servers["us"].requests["POST /admin/invite"], 0)
+
+    def test_none_item(self):
+        results = self.fleet.broadcast(
+            lambda instance, item: (instance.name, item),
+            items=[None, 1],
+            instances=["eu"],
+        )
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual([r.value for r in results], [("eu", None), ("eu", 1)])
+
+    def test_concurrency(self):
+        # completes only if both instances are called at the same time
+        barrier = threading.Barrier(2, timeout=5)
+        results = self.fleet.broadcast(lambda instance: barrier.wait())
+        self.assertTrue(all(r.ok for r in results))
+
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def call(instance, item):
+            with lock:
+                running.append(item)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.remove(item)
+
+        fleet = VaultwardenFleet([Instance("eu", max_concurrency=2)])
+        fleet.broadcast(call, items=range(8))
+        self.assertEqual(max(peak), 2)
+
+    def test_rate_limit(self):
+        limiter = RateLimiter(50)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
@@ -0,0 +1,108 @@
+import threading
+import unittest
+
+import httpx
+from vaultwarden.models.bitwarden import Organization
+from vaultwarden.models.enum import UpdateType
+
+from tests.mock_client import ORGANIZATION_ID, make_api_client, sync_payload
+
+try:
+    import msgpack
+    from vaultwarden.clients.notifications import NotificationsListener
+    from websockets.sync.server import serve
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+def signalr_frame(*messages) -> bytes:
+    frame = b""
+    for message in messages:
+        data = msgpack.packb(message)
+        length = len(data)
+        while length > 0x7F:
+            frame += bytes([length & 0x7F | 0x80])
+            length >>= 7
+        frame += bytes([length]) + data
+    return frame
+
+
+def notification(update_type: UpdateType, payload: dict) -> list:
+    argument = {"ContextId": "app", "Type": update_type, "Payload": payload}
+    return [1, {}, None, "ReceiveMessage", [argument]]
+
+
+@unittest.skipIf(msgpack is None, "notifications extra is not installed")
+class TestNotificationsListener(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = make_api_client(
+            lambda request: httpx.Response(200, text=sync_payload())
+        )
+        self.client.sync()
+        self.organization = Organization.model_validate(
+            {"name": "Test", "billingEmail": "a@example.com", "object": None},
+            context={"client": self.client, "parent_id": ORGANIZATION_ID},
+        )
+        self.organization._ciphers = []
+        self.organization._users = []
+
+    def test_handle_frame(self):
+        listener = NotificationsListener(self.client)
+        listener.watch(self.organization)
+        listener.handle_frame(
+            signalr_frame(
+                [6],
+                notification(
+                    UpdateType.SyncCipherUpdate,
+                    {"Id": "c", "OrganizationId": str(ORGANIZATION_ID)},
+                ),
+            )
+        )
+        self.assertIsNone(self.organization._ciphers)
+        self.assertEqual(self.organization._users, [])
+        self.assertTrue(self.client._sync_invalidated)
+        listener.handle_frame(
+            signalr_frame(notification(UpdateType.SyncOrgKeys, {}))
+        )
+        self.assertIsNone(self.organization._users)
+
+    def test_listen_to_hub(self):
+        received = threading.Event()
+        tokens = []
+
+        def hub(websocket):
+            tokens.append(websocket.request.path)
+            websocket.recv()
+            websocket.send(b"{}\x1e")
+            websocket.send(
+                signalr_frame(
+                    notification(
+                        UpdateType.SyncCipherDelete,
+                        {"Id": "c", "OrganizationId": str(ORGANIZATION_ID)},
+                    )
+                )
+            )
+            for _ in websocket:
+                pass
+
+        with serve(hub, "127.0.0.1", 0) as server:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            port = server.socket.getsockname()[1]
+            listener = NotificationsListener(
+                self.client,
+                url=f"ws://127.0.0.1:{port}/notifications/hub",
+                on_event=lambda update_type, payload: received.set(),
+            )
+            listener.watch(self.organization)
+            listener.start()
+            try:
+                self.assertTrue(received.wait(5))
+            finally:
+                listener.stop(timeout=5)
+                server.shutdown()
+        self.assertIn("access_token=access-token", tokens[0])
+        self.assertIsNone(self.organization._ciphers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+from datetime import datetime, timedelta, timezone
+import json
+import unittest
+from uuid import uuid4
+
+import httpx
+from vaultwarden.models.enum import VaultwardenUserStatus
+from vaultwarden.models.exception_models import VaultwardenAdminError
+from vaultwarden.models.user_index import parse_vaultwarden_date
+
+from tests.mock_client import make_admin_client
+
+ORGANIZATION_ID = "cda840d2-1de0-4f31-bd49-b30dacd7e8b0"
+
+
+def admin_users() -> list[dict]:
+    with open("tests/fixtures/admin/users_camel.json") as file:
+        template = json.load(file)[0]
+    users = []
+    for day in range(1, 11):
+        user = {
+            **template,
+            "id": str(uuid4()),
+            "email": f"user-{day}@example.com",
+            "createdAt": f"2024-01-{day:02d} 09:00:00 +00:00",
+            "lastActive": f"2024-07-{day:02d} 12:00:00 +00:00",
+            "twoFactorEnabled": day % 2 == 0,
+            "organizations": template["organizations"] if day <= 3 else [],
+        }
+        if day == 9:
+            user.update(
+                {"_status": 1, "lastActive": None, "userEnabled": True}
+            )
+        if day == 10:
+            user.update({"_status": 2, "userEnabled": False})
+        users.append(user)
+    # listed out of date order
+    return users[::-1]
+
+
+class TestAdminUserIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.requests: list[httpx.Request] = []
+        self.users = admin_users()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            if request.url.path == "/admin/users":
+                return httpx.Response(200, json=self.users)
+            return httpx.Response(200)
+
+        self.client = make_admin_client(handler)
+
+    def test_parse_vaultwarden_date(self):
+        self.assertEqual(
+            parse_vaultwarden_date("2024-07-23 12:15:19 +00:00"),
+            datetime(2024, 7, 23, 12, 15, 19, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            parse_vaultwarden_date("2024-07-23 14:15:19 CEST"),
+            datetime(2024, 7, 23, 12, 15, 19, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            parse_vaultwarden_date("2024-07-23 12:15:19 XYZT"),
+            datetime(2024, 7, 23, 12, 15, 19, tzinfo=timezone.utc),
+        )
+        self.assertIsNone(parse_vaultwarden_date(None))
+        self.assertIsNone(parse_vaultwarden_date("yesterday"))
+
+    def test_abbreviated_time_zones(self):
+        self.users[0]["lastActive"] = "2024-07-10 14:00:00 CEST"
+        self.users[1]["createdAt"] = "not a date"
+        self.users[2]["lastActive"] = "2024-07-08 07:00:00 EDT"
+        self.assertEqual(len(self.client.users()), 10)
+        self.assertEqual(
+            self.client.query()
+            .last_active(after=datetime(2024, 7, 8))
+            .emails(),
+            ["user-8@example.com", "user-10@example.com"],
+        )
+        # an unparseable date is not a missing one
+        self.assertEqual(
+            self.client.query().created(before=datetime(2025, 1, 1)).count(),
+            9,
+        )
+        self.assertEqual(
+            self.client.query().never_active().emails(),
+            ["user-9@example.com"],
+        )
+
+    def test_users_filters(self):
+        self.assertEqual(len(self.client.users()), 10)
+        self.assertEqual(len(self.client.users(mfa=True)), 5)
+        self.assertEqual(len(self.client.users(enabled=False)), 1)
+        self.assertEqual(len(self.client.users(exclude_invited=True)), 9)
+        by_email = self.client.users(as_email_dict=True)
+        by_email.clear()
+        self.client.users(as_uuid_dict=True).clear()
+        self.assertEqual(len(self.client.users(as_email_dict=True)), 10)
+        self.assertIsNone(self.client.get_user(uuid="not-a-uuid"))
+        with self.assertRaisesRegex(VaultwardenAdminError, "not found"):
+            self.client.user(uuid="not-a-uuid")
+        self.assertEqual(
+            self.client.user(email="user-3@example.com").Email,
+            "user-3@example.com",
+        )
+
+    def test_query(self):
+        query = (
+            self.client.query()
+            .enabled()
+            .exclude_invited()
+            .last_active(before=datetime(2024, 7, 6), include_never=True)
+        )
+        self.assertEqual(
+            query.emails(), [f"user-{day}@example.com" for day in range(1, 6)]
+        )
+        self.assertEqual(
+            self.client.query()
+            .organization(ORGANIZATION_ID)
+            .mfa(False)
+            .created(after=datetime(2024, 1, 2))
+            .emails(),
+            ["user-3@example.com"],
+        )
+        self.assertEqual(
+            self.client.query()
+            .status(VaultwardenUserStatus.Invited)
+            .last_active(include_never=True)
+            .emails(),
+            ["user-9@example.com"],
+        )
+        self.assertEqual(
+            len([r for r in self.requests if r.url.path == "/admin/users"]), 1
+        )
+
+    def test_set_user_enabled_patches_index(self):
+        user = self.client.user(email="user-1@example.com")
+        self.client.set_user_enabled(user.Id, enabled=False)
+        self.assertEqual(
+            set(self.client.query().enabled(False).emails()),
+            {"user-1@example.com", "user-10@example.com"},
+        )
+        patched = self.client.user(uuid=user.Id)
+        self.assertEqual(patched.status, VaultwardenUserStatus.Disabled)
+        self.assertEqual(
+            self.client.query().last_active().emails()[0],
+            "user-1@example.com",
+        )
+
+
+class TestInactiveSweep(unittest.TestCase):
+    def setUp(self) -> None:
+        self.disabled: list[str] = []
+        self.loads = 0
+        self.users = admin_users()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/admin/users":
+                self.loads += 1
+                return httpx.Response(200, json=self.users)
+            if path.endswith("/disable"):
+                user_id = path.split("/")[-2]
+                if user_id == self.users[-2]["id"]:
+                    return httpx.Response(500, request=request)
+                self.disabled.append(user_id)
+            return httpx.Response(200)
+
+        self.client = make_admin_client(handler)
+        self.now = datetime(2024, 7, 7, 12, tzinfo=timezone.utc)
+
+    def test_dry_run(self):
+        report = self.client.disable_inactive_users(
+            timedelta(days=3), dry_run=True, now=self.now
+        )
+        self.assertEqual(
+            [u.Email for u in report.candidates],
+            [f"user-{day}@example.com" for day in range(1, 4)],
+        )
+        self.assertEqual(self.disabled, [])
+        self.assertEqual(self.loads, 1)
+
+    def test_sweep(self):
+        report = self.client.disable_inactive_users(
+            timedelta(days=3),
+            exclude=["user-3@example.com"],
+            now=self.now,
+        )
+        # user-2 fails to be disabled
+        self.assertEqual(
+            [u.Email for u in report.disabled], ["user-1@example.com"]
+        )
+        self.assertEqual(list(report.failed), [report.candidates[1].Id])
+        self.assertEqual(self.disabled, [self.users[-1]["id"]])
+        self.assertEqual(self.loads, 2)
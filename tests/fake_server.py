@@ -0,0 +1,593 @@
+"""In-process fake Vaultwarden server, for the tests and the benchmarks
+
+The server keeps its state as the JSON payloads of the real server, with
+the names and secrets encrypted with the keys of `mock_client`, and serves
+them through an httpx `MockTransport`.
+"""
+
+from collections import Counter
+import copy
+from datetime import datetime, timedelta, timezone
+import json
+import re
+import time
+from uuid import uuid4
+
+import httpx
+from vaultwarden.clients.bitwarden import BitwardenAPIClient
+from vaultwarden.clients.vaultwarden import VaultwardenAdminClient
+from vaultwarden.models.enum import CipherType, OrganizationUserType
+from vaultwarden.utils.crypto import decrypt, encrypt_sym
+from vaultwarden.utils.kdf import KdfParams
+
+from tests.fixture_generator import Dataset
+from tests.mock_client import (
+    EMAIL,
+    KDF_ITERATIONS,
+    ORGANIZATION_ID,
+    PASSWORD,
+    URL,
+    account_keys,
+    make_account_keys,
+)
+
+ADMIN_TOKEN = "admin-token"
+ACCESS_TOKEN = "access-token"
+# The user id of the test account
+USER_ID = "a8be340c-856b-481f-8183-2b7712995da2"
+
+UUID_RE = r"[0-9a-f-]{36}"
+
+
+def _read_json(path: str):
+    with open(path) as file:
+        return json.load(file)
+
+
+def _list(data: list) -> dict:
+    return {"data": data, "object": "list", "continuationToken": None}
+
+
+def _date(date: datetime) -> str:
+    return date.strftime("%Y-%m-%d %H:%M:%S +00:00")
+
+
+class FakeVaultwarden:
+    """A Vaultwarden instance holding one account, admin of organizations.
+
+    `requests` counts the requests received by "METHOD /path".
+    """
+
+    def __init__(
+        self, dataset: Dataset | None = None, kdf: KdfParams | None = None
+    ):
+        """
+        :param dataset: the organization to serve, see `generate_dataset`
+        :param kdf: the KDF of the account, the dataset keys use PBKDF2
+        """
+        if dataset is not None:
+            keys = dataset.keys
+        elif kdf is not None:
+            keys = make_account_keys(kdf)
+        else:
+            keys = account_keys()
+        self.kdf = kdf or KdfParams(iterations=KDF_ITERATIONS)
+        self.keys = keys
+        self.org_key = keys["org_key"]
+        self.user_key = keys["user_key"]
+        self.requests: Counter[str] = Counter()
+        self.revision = int(time.time() * 1000)
+        self._sync = _read_json("tests/fixtures/test-account/sync_camel.json")
+        self._sync["profile"]["key"] = keys["encrypted_user_key"]
+        self._sync["profile"]["privateKey"] = keys["encrypted_private_key"]
+        self._profile_org = self._sync["profile"]["organizations"][0]
+        self._profile_org["key"] = keys["encrypted_org_key"]
+        self._sync["profile"]["organizations"] = []
+        self._org_template = _read_json(
+            "tests/fixtures/test-organization/organization_camel.json"
+        )
+        self._org_user_template = _read_json(
+            "tests/fixtures/test-organization/users_camel.json"
+        )["data"][0]
+        self._admin_user_template = _read_json(
+            "tests/fixtures/admin/users_camel.json"
+        )[0]
+        self.organizations: dict[str, dict] = {}
+        self.collections: dict[str, dict[str, dict]] = {}
+        self.org_users: dict[str, dict[str, dict]] = {}
+        self.groups: dict[str, dict[str, dict]] = {}
+        self.ciphers: dict[str, dict] = {}
+        self.admin_users: dict[str, dict] = {}
+        self.add_organization("Test Organization", str(ORGANIZATION_ID))
+        if dataset is not None:
+            self.load_dataset(dataset)
+        self._routes: list[tuple[str, re.Pattern, object]] = [
+            (method, re.compile(f"^{pattern}$"), handler)
+            for method, pattern, handler in [
+                ("POST", "/identity/accounts/prelogin", self._prelogin),
+                ("POST", "/identity/connect/token", self._token),
+                ("GET", "/api/sync", self._get_sync),
+                ("GET", "/api/accounts/revision-date", self._revision),
+                ("GET", f"/api/organizations/({UUID_RE})", self._get_org),
+                (
+                    "GET",
+                    f"/api/organizations/({UUID_RE})/users",
+                    self._get_org_users,
+                ),
+                (
+                    "GET",
+                    f"/api/organizations/({UUID_RE})/users/({UUID_RE})",
+                    self._get_org_user,
+                ),
+                (
+                    "GET",
+                    f"/api/organizations/({UUID_RE})/collections",
+                    self._get_collections,
+                ),
+                (
+                    "POST",
+                    f"/api/organizations/({UUID_RE})/collections",
+                    self._post_collection,
+                ),
+                (
+                    "DELETE",
+                    f"/api/organizations/({UUID_RE})/collections/({UUID_RE})",
+                    self._delete_collection,
+                ),
+                (
+                    "GET",
+                    f"/api/organizations/({UUID_RE})/collections/({UUID_RE})"
+                    "/users",
+                    self._get_collection_users,
+                ),
+                (
+                    "PUT",
+                    f"/api/organizations/({UUID_RE})/collections/({UUID_RE})"
+                    "/users",
+                    self._put_collection_users,
+                ),
+                (
+                    "GET",
+                    f"/api/organizations/({UUID_RE})/groups",
+                    self._get_groups,
+                ),
+                (
+                    "GET",
+                    f"/api/organizations/({UUID_RE})/events",
+                    self._get_events,
+                ),
+                (
+                    "GET",
+                    "/api/ciphers/organization-details",
+                    self._get_org_ciphers,
+                ),
+                (
+                    "POST",
+                    "/api/ciphers/import-organization",
+                    self._import_ciphers,
+                ),
+                ("POST", "/admin/?", self._admin_login),
+                ("GET", "/admin/users", self._get_admin_users),
+                ("POST", "/admin/invite", self._admin_invite),
+                (
+                    "POST",
+                    f"/admin/users/({UUID_RE})/(enable|disable)",
+                    self._set_admin_user_enabled,
+                ),
+                (
+                    "POST",
+                    f"/admin/users/({UUID_RE})/delete",
+                    self._delete_admin_user,
+                ),
+            ]
+        ]
+
+    # Population of the server
+
+    def _encrypt(self, value: str | None, org_id: str | None) -> str | None:
+        if value is None:
+            return None
+        return encrypt_sym(value, self.org_key if org_id else self.user_key)
+
+    def _touch(self) -> None:
+        self.revision += 1
+
+    def add_organization(self, name: str, org_id: str | None = None) -> str:
+        org_id = org_id or str(uuid4())
+        self.organizations[org_id] = {
+            **self._org_template,
+            "id": org_id,
+            "name": name,
+        }
+        self._sync["profile"]["organizations"].append(
+            {**self._profile_org, "id": org_id, "name": name}
+        )
+        self.collections[org_id] = {}
+        self.org_users[org_id] = {}
+        self.groups[org_id] = {}
+        # the test account owns all the organizations
+        self.add_org_users(
+            org_id,
+            [EMAIL],
+            user_type=OrganizationUserType.Owner,
+            user_ids=[USER_ID],
+        )
+        self._touch()
+        return org_id
+
+    def load_dataset(self, dataset: Dataset) -> None:
+        """Serve the generated payloads in the default organization"""
+        org_id = str(ORGANIZATION_ID)
+        self.collections[org_id].update(
+            {coll["id"]: coll for coll in dataset.collections}
+        )
+        self.org_users[org_id].update(
+            {user["id"]: user for user in dataset.org_users}
+        )
+        self.ciphers.update({c["id"]: c for c in dataset.ciphers})
+        self._touch()
+
+    def add_collections(
+        self, names: list[str], org_id: str = str(ORGANIZATION_ID)
+    ) -> list[str]:
+        ids = []
+        for name in names:
+            coll_id = str(uuid4())
+            self.collections[org_id][coll_id] = {
+                "id": coll_id,
+                "name": self._encrypt(name, org_id),
+                "organizationId": org_id,
+                "externalId": None,
+                "object": "collection",
+            }
+            ids.append(coll_id)
+        self._touch()
+        return ids
+
+    def add_org_users(
+        self,
+        org_id: str,
+        emails: list[str],
+        user_type: OrganizationUserType = OrganizationUserType.User,
+        collections: list[tuple[str, dict]] | None = None,
+        groups: list[str] | None = None,
+        user_ids: list[str] | None = None,
+        access_all: bool = False,
+    ) -> list[str]:
+        """Add confirmed users, with the given (id, access) collections"""
+        ids = []
+        for i, email in enumerate(emails):
+            member_id = str(uuid4())
+            self.org_users[org_id][member_id] = {
+                **self._org_user_template,
+                "id": member_id,
+                "userId": user_ids[i] if user_ids else str(uuid4()),
+                "email": email,
+                "name": email.split("@")[0],
+                "type": int(user_type),
+                "status": 2,
+                "accessAll": access_all,
+                "collections": [
+                    {
+                        "id": coll_id,
+                        "readOnly": access.get("readOnly", False),
+                        "hidePasswords": access.get("hidePasswords", False),
+                        "manage": access.get("manage", False),
+                    }
+                    for coll_id, access in collections or []
+                ],
+                "groups": list(groups or []),
+            }
+            ids.append(member_id)
+        self._touch()
+        return ids
+
+    def add_ciphers(
+        self,
+        items: list[dict],
+        org_id: str | None = str(ORGANIZATION_ID),
+        collection_ids: list[str] | None = None,
+    ) -> list[str]:
+        """Add logins from {name, username, password, uri} dicts"""
+        ids = []
+        now = datetime.now(timezone.utc).isoformat()
+        for item in items:
+            cipher_id = str(uuid4())
+            login = {
+                "username": self._encrypt(item.get("username"), org_id),
+                "password": self._encrypt(item.get("password"), org_id),
+                "totp": None,
+                "uris": [
+                    {"uri": self._encrypt(item["uri"], org_id), "match": None}
+                ]
+                if item.get("uri")
+                else [],
+            }
+            self.ciphers[cipher_id] = {
+                "id": cipher_id,
+                "organizationId": org_id,
+                "folderId": None,
+                "type": int(CipherType.Login),
+                "name": self._encrypt(item["name"], org_id),
+                "notes": self._encrypt(item.get("notes"), org_id),
+                "key": None,
+                "login": login,
+                "fields": [],
+                "collectionIds": list(collection_ids or []),
+                "attachments": None,
+                "revisionDate": now,
+                "deletedDate": None,
+                "object": "cipherDetails",
+            }
+            ids.append(cipher_id)
+        self._touch()
+        return ids
+
+    def add_admin_users(
+        self,
+        emails: list[str],
+        last_active: list[datetime | None] | None = None,
+        enabled: bool = True,
+    ) -> list[str]:
+        ids = []
+        for i, email in enumerate(emails):
+            user_id = str(uuid4())
+            active = last_active[i] if last_active else None
+            self.admin_users[user_id] = {
+                **self._admin_user_template,
+                "id": user_id,
+                "email": email,
+                "name": email.split("@")[0],
+                "_status": 0 if enabled else 2,
+                "userEnabled": enabled,
+                "createdAt": _date(
+                    (active or datetime.now(timezone.utc)) - timedelta(days=30)
+                ),
+                "lastActive": _date(active) if active else None,
+                "organizations": [],
+            }
+            ids.append(user_id)
+        return ids
+
+    # Clients
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.requests[f"{request.method} {path}"] += 1
+        for method, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if method == request.method and match:
+                return handler(request, *match.groups())  # type: ignore
+        return httpx.Response(404, request=request)
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handler)
+
+    def api_client(
+        self, transport: httpx.BaseTransport | None = None
+    ) -> BitwardenAPIClient:
+        """A client of the test account, logged in on its first request"""
+        return BitwardenAPIClient(
+            url=URL,
+            email=EMAIL,
+            password=PASSWORD,
+            client_id=f"user.{USER_ID}",
+            client_secret="secret",
+            device_id="e54ba5f5-7d58-4830-8f2b-99194c70c14f",
+            transport=transport or self.transport(),
+        )
+
+    def admin_client(
+        self, transport: httpx.BaseTransport | None = None
+    ) -> VaultwardenAdminClient:
+        return VaultwardenAdminClient(
+            url=URL,
+            admin_secret_token=ADMIN_TOKEN,
+            preload_users=False,
+            transport=transport or self.transport(),
+        )
+
+    def request_count(self) -> int:
+        return sum(self.requests.values())
+
+    # Identity and account
+
+    def _prelogin(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            json={
+                "kdf": int(self.kdf.kdf),
+                "kdfIterations": self.kdf.iterations,
+                "kdfMemory": self.kdf.memory,
+                "kdfParallelism": self.kdf.parallelism,
+            },
+        )
+
+    def _token(self, request: httpx.Request) -> httpx.Response:
+        keys = self.keys
+        return httpx.Response(
+            200,
+            json={
+                "Kdf": int(self.kdf.kdf),
+                "KdfIterations": self.kdf.iterations,
+                "KdfMemory": self.kdf.memory,
+                "KdfParallelism": self.kdf.parallelism,
+                "Key": keys["encrypted_user_key"],
+                "PrivateKey": keys["encrypted_private_key"],
+                "access_token": ACCESS_TOKEN,
+                "refresh_token": "refresh-token",
+                "expires_in": 3600,
+                "token_type": "Bearer",
+                "scope": "api",
+            },
+        )
+
+    def _get_sync(self, request: httpx.Request) -> httpx.Response:
+        sync = {
+            **self._sync,
+            "ciphers": list(self.ciphers.values()),
+            "collections": [
+                {**coll, "object": "collectionDetails", "readOnly": False}
+                for colls in self.collections.values()
+                for coll in colls.values()
+            ],
+        }
+        return httpx.Response(200, json=sync)
+
+    def _revision(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=self.revision)
+
+    # Organizations
+
+    def _get_org(self, request: httpx.Request, org_id: str) -> httpx.Response:
+        return httpx.Response(200, json=self.organizations[org_id])
+
+    def _get_org_users(
+        self, request: httpx.Request, org_id: str
+    ) -> httpx.Response:
+        return httpx.Response(
+            200, json=_list(list(self.org_users[org_id].values()))
+        )
+
+    def _get_org_user(
+        self, request: httpx.Request, org_id: str, member_id: str
+    ) -> httpx.Response:
+        return httpx.Response(200, json=self.org_users[org_id][member_id])
+
+    def _get_collections(
+        self, request: httpx.Request, org_id: str
+    ) -> httpx.Response:
+        return httpx.Response(
+            200, json=_list(list(self.collections[org_id].values()))
+        )
+
+    def _post_collection(
+        self, request: httpx.Request, org_id: str
+    ) -> httpx.Response:
+        body = json.loads(request.content)
+        name = decrypt(body["name"], self.org_key).decode("utf-8")
+        (coll_id,) = self.add_collections([name], org_id)
+        return httpx.Response(200, json=self.collections[org_id][coll_id])
+
+    def _delete_collection(
+        self, request: httpx.Request, org_id: str, coll_id: str
+    ) -> httpx.Response:
+        del self.collections[org_id][coll_id]
+        for user in self.org_users[org_id].values():
+            user["collections"] = [
+                c for c in user["collections"] if c["id"] != coll_id
+            ]
+        self._touch()
+        return httpx.Response(200)
+
+    def _get_collection_users(
+        self, request: httpx.Request, org_id: str, coll_id: str
+    ) -> httpx.Response:
+        return httpx.Response(
+            200,
+            json=[
+                {**access, "id": member_id}
+                for member_id, user in self.org_users[org_id].items()
+                for access in user["collections"]
+                if access["id"] == coll_id
+            ],
+        )
+
+    def _put_collection_users(
+        self, request: httpx.Request, org_id: str, coll_id: str
+    ) -> httpx.Response:
+        accesses = {a["id"]: a for a in json.loads(request.content)}
+        for member_id, user in self.org_users[org_id].items():
+            collections = [
+                c for c in user["collections"] if c["id"] != coll_id
+            ]
+            if member_id in accesses:
+                collections.append({**accesses[member_id], "id": coll_id})
+            user["collections"] = collections
+        self._touch()
+        return httpx.Response(200)
+
+    def _get_groups(
+        self, request: httpx.Request, org_id: str
+    ) -> httpx.Response:
+        return httpx.Response(
+            200, json=_list(list(self.groups[org_id].values()))
+        )
+
+    def _get_events(
+        self, request: httpx.Request, org_id: str
+    ) -> httpx.Response:
+        return httpx.Response(200, json=_list([]))
+
+    # Ciphers
+
+    def _get_org_ciphers(self, request: httpx.Request) -> httpx.Response:
+        org_id = request.url.params["organizationId"]
+        return httpx.Response(
+            200,
+            json=_list(
+                [
+                    c
+                    for c in self.ciphers.values()
+                    if c["organizationId"] == org_id
+                ]
+            ),
+        )
+
+    def _import_ciphers(self, request: httpx.Request) -> httpx.Response:
+        org_id = request.url.params["organizationId"]
+        body = json.loads(request.content)
+        coll_ids = [c.get("id") for c in body["collections"]]
+        relations: dict[int, list[str]] = {}
+        for relation in body["collectionRelationships"]:
+            relations.setdefault(relation["key"], []).append(
+                coll_ids[relation["value"]]
+            )
+        for i, cipher in enumerate(body["ciphers"]):
+            cipher_id = str(uuid4())
+            self.ciphers[cipher_id] = {
+                **copy.deepcopy(cipher),
+                "id": cipher_id,
+                "organizationId": org_id,
+                "collectionIds": relations.get(i, []),
+                "deletedDate": None,
+                "object": "cipherDetails",
+            }
+        self._touch()
+        return httpx.Response(200)
+
+    # Admin
+
+    def _admin_login(self, request: httpx.Request) -> httpx.Response:
+        form = httpx.QueryParams(request.content.decode())
+        if form.get("token") != ADMIN_TOKEN:
+            return httpx.Response(401, request=request)
+        return httpx.Response(
+            200, headers={"set-cookie": "VW_ADMIN=session; Path=/admin"}
+        )
+
+    def _get_admin_users(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=list(self.admin_users.values()))
+
+    def _admin_invite(self, request: httpx.Request) -> httpx.Response:
+        email = json.loads(request.content)["email"]
+        if any(u["email"] == email for u in self.admin_users.values()):
+            return httpx.Response(409, request=request)
+        (user_id,) = self.add_admin_users([email])
+        self.admin_users[user_id]["_status"] = 1
+        return httpx.Response(200, json=self.admin_users[user_id])
+
+    def _set_admin_user_enabled(
+        self, request: httpx.Request, user_id: str, action: str
+    ) -> httpx.Response:
+        user = self.admin_users[user_id]
+        user["userEnabled"] = action == "enable"
+        if user["_status"] != 1:
+            user["_status"] = 0 if user["userEnabled"] else 2
+        return httpx.Response(200)
+
+    def _delete_admin_user(
+        self, request: httpx.Request, user_id: str
+    ) -> httpx.Response:
+        del self.admin_users[user_id]
+        return httpx.Response(200)
@@ -0,0 +1,270 @@
+"""Seedable generator of encrypted organization fixtures, cached on disk
+
+A seed always gives the same ids, names, memberships and secrets. The
+encrypted values use random IVs and freshly generated keys, so a dataset is
+written to the cache directory once and read back by the following runs.
+"""
+
+from base64 import b64decode, b64encode
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+import json
+import os
+from pathlib import Path
+import random
+from uuid import UUID
+
+from vaultwarden.models.enum import CipherType, OrganizationUserType
+from vaultwarden.utils.crypto import encrypt_sym
+from vaultwarden.utils.parallel import process_map
+
+from tests.mock_client import ORGANIZATION_ID, make_account_keys
+
+# Bump to invalidate the datasets cached by a previous layout
+FIXTURE_VERSION = 1
+FIXTURE_CACHE_DIR = Path(
+    os.environ.get(
+        "VAULTWARDEN_FIXTURES_CACHE",
+        Path.home() / ".cache" / "python-vaultwarden" / "fixtures",
+    )
+)
+# Number of values encrypted by each task of the process pool
+ENCRYPT_BATCH_SIZE = 512
+
+WORDS = [
+    "alpha", "backup", "billing", "cloud", "data", "deploy", "edge", "infra",
+    "legal", "mail", "metrics", "mobile", "network", "ops", "payments",
+    "platform", "search", "security", "storage", "web",
+]  # fmt: skip
+# Share of the users of each type, the rest are plain users
+USER_TYPE_WEIGHTS = {
+    OrganizationUserType.Admin: 0.01,
+    OrganizationUserType.Manager: 0.04,
+    OrganizationUserType.User: 0.95,
+}
+
+
+@dataclass
+class Dataset:
+    """JSON payloads of an organization, as returned by the server"""
+
+    seed: int
+    keys: dict[str, bytes | str]
+    collections: list[dict] = field(default_factory=list)
+    org_users: list[dict] = field(default_factory=list)
+    ciphers: list[dict] = field(default_factory=list)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "seed": self.seed,
+                # the raw keys are wrapped, the encrypted ones are strings
+                "keys": {
+                    name: {"b64": b64encode(value).decode()}
+                    if isinstance(value, bytes)
+                    else value
+                    for name, value in self.keys.items()
+                },
+                "collections": self.collections,
+                "org_users": self.org_users,
+                "ciphers": self.ciphers,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> "Dataset":
+        payload = json.loads(data)
+        payload["keys"] = {
+            name: b64decode(value["b64"]) if isinstance(value, dict) else value
+            for name, value in payload["keys"].items()
+        }
+        return cls(**payload)
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(UUID(int=rng.getrandbits(128), version=4))
+
+
+def _encrypt_batch(batch: tuple[bytes, list[str]]) -> list[str]:
+    key, values = batch
+    return [encrypt_sym(value, key) for value in values]
+
+
+def _popular(rng: random.Random, items: list[str], count: int) -> list[str]:
+    """Pick distinct items, the first ones being much more popular"""
+    count = min(count, len(items))
+    picked: set[str] = set()
+    while len(picked) < count:
+        picked.add(items[min(int(rng.paretovariate(1.2)) - 1, len(items) - 1)])
+    return sorted(picked)
+
+
+def _build(
+    rng: random.Random, users: int, collections: int, ciphers: int
+) -> tuple[list[dict], list[dict], list[dict], list[tuple[dict, str]]]:
+    org_id = str(ORGANIZATION_ID)
+    # the fields encrypted once the plaintext payloads are built
+    targets: list[tuple[dict, str]] = []
+
+    collection_payloads = []
+    for i in range(collections):
+        name = "/".join(
+            [rng.choice(WORDS), f"team-{rng.randrange(20)}", f"project-{i}"]
+        )
+        payload: dict = {
+            "id": _uuid(rng),
+            "name": name,
+            "organizationId": org_id,
+            "externalId": None,
+            "object": "collection",
+        }
+        targets.append((payload, "name"))
+        collection_payloads.append(payload)
+    collection_ids: list[str] = [c["id"] for c in collection_payloads]
+
+    now = datetime(2024, 7, 1, tzinfo=timezone.utc)
+    user_types = list(USER_TYPE_WEIGHTS)
+    user_payloads = []
+    for i in range(users):
+        # a few users did not accept their invitation or were revoked
+        status = rng.choices([2, 1, 0, -1], [0.9, 0.03, 0.05, 0.02])[0]
+        user_type = rng.choices(
+            user_types, weights=list(USER_TYPE_WEIGHTS.values())
+        )[0]
+        access = []
+        for coll_id in _popular(
+            rng, collection_ids, int(rng.expovariate(1 / 3)) + 1
+        ):
+            draw = rng.random()
+            access.append(
+                {
+                    "id": coll_id,
+                    "readOnly": draw < 0.2,
+                    "hidePasswords": 0.2 <= draw < 0.3,
+                    "manage": user_type == OrganizationUserType.Manager,
+                }
+            )
+        user_payloads.append(
+            {
+                "accessAll": False,
+                "collections": access,
+                "email": f"user-{i}@example.com",
+                "externalId": None,
+                "groups": [],
+                "id": _uuid(rng),
+                "name": f"User {i}",
+                "object": "organizationUserUserDetails",
+                "resetPasswordEnrolled": False,
+                "status": status,
+                "twoFactorEnabled": rng.random() < 0.6,
+                "type": int(user_type),
+                "userId": _uuid(rng),
+            }
+        )
+
+    cipher_payloads = []
+    for i in range(ciphers):
+        host = f"{rng.choice(WORDS)}-{i}.example.com"
+        uri = {"uri": f"https://{host}/login", "match": None}
+        login: dict = {
+            "username": f"svc-{rng.choice(WORDS)}-{i}",
+            "password": "".join(
+                rng.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=24)
+            ),
+            "totp": None,
+            "uris": [uri],
+        }
+        payload = {
+            "id": _uuid(rng),
+            "organizationId": org_id,
+            "folderId": None,
+            "type": int(CipherType.Login),
+            "name": f"{host} {i}",
+            "notes": None,
+            "key": None,
+            "login": login,
+            "fields": [],
+            "collectionIds": _popular(
+                rng, collection_ids, 1 + (rng.random() < 0.2)
+            ),
+            "attachments": None,
+            "revisionDate": (
+                now - timedelta(minutes=rng.randrange(525600))
+            ).isoformat(),
+            "deletedDate": None,
+            "object": "cipherDetails",
+        }
+        targets += [
+            (payload, "name"),
+            (login, "username"),
+            (login, "password"),
+            (uri, "uri"),
+        ]
+        cipher_payloads.append(payload)
+    return collection_payloads, user_payloads, cipher_payloads, targets
+
+
+def generate_dataset(
+    users: int,
+    collections: int,
+    ciphers: int,
+    seed: int = 0,
+    max_workers: int | None = None,
+    cache_dir: Path | None = FIXTURE_CACHE_DIR,
+) -> Dataset:
+    """Generate, or read from the cache, the payloads of an organization.
+
+    Args:
+        users: The number of users, besides the owner test account.
+        collections: The number of collections.
+        ciphers: The number of ciphers, all of the organization.
+        seed: The seed of the ids, names, memberships and secrets.
+        max_workers: The number of processes encrypting the values.
+        cache_dir: Where to cache the datasets, None to disable the cache.
+
+    Returns:
+        The dataset, whose keys are those of a test account login.
+    """
+    path = None
+    if cache_dir is not None:
+        path = (
+            Path(cache_dir) / f"dataset-v{FIXTURE_VERSION}-{seed}-{users}-"
+            f"{collections}-{ciphers}.json"
+        )
+        if path.exists():
+            return Dataset.from_json(path.read_text())
+
+    rng = random.Random(seed)
+    coll_payloads, user_payloads, cipher_payloads, targets = _build(
+        rng, users, collections, ciphers
+    )
+    keys = make_account_keys()
+    values = [payload[name] for payload, name in targets]
+    batches = [
+        (keys["org_key"], values[i : i + ENCRYPT_BATCH_SIZE])
+        for i in range(0, len(values), ENCRYPT_BATCH_SIZE)
+    ]
+    encrypted = [
+        value
+        for batch in process_map(
+            _encrypt_batch, batches, max_workers=max_workers, min_items=2
+        )
+        for value in batch
+    ]
+    for (payload, name), value in zip(targets, encrypted, strict=True):
+        payload[name] = value
+
+    dataset = Dataset(
+        seed=seed,
+        keys=keys,
+        collections=coll_payloads,
+        org_users=user_payloads,
+        ciphers=cipher_payloads,
+    )
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # written aside then renamed, for concurrent benchmark runs
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(dataset.to_json())
+        tmp.replace(path)
+    return dataset
@@ -0,0 +1,100 @@
+"""Helpers to run the clients against an in-process httpx transport"""
+
+from functools import cache
+import json
+from secrets import token_bytes
+from uuid import UUID
+
+from httpx import MockTransport
+from vaultwarden.clients.bitwarden import BitwardenAPIClient
+from vaultwarden.clients.vaultwarden import VaultwardenAdminClient
+from vaultwarden.models.sync import ConnectToken
+from vaultwarden.utils.crypto import (
+    encrypt_asym,
+    make_asym_key,
+    make_master_key,
+    make_sym_key,
+)
+from vaultwarden.utils.kdf import KdfParams, derive_master_key
+
+URL = "https://vaultwarden.test"
+EMAIL = "test-account@example.com"
+PASSWORD = "test-account"
+KDF_ITERATIONS = 1000
+ORGANIZATION_ID = UUID("cda840d2-1de0-4f31-bd49-b30dacd7e8b0")
+
+
+def make_account_keys(kdf: KdfParams | None = None) -> dict:
+    """Generate keys for the test account and its organization"""
+    if kdf is None:
+        master_key = make_master_key(PASSWORD, EMAIL, KDF_ITERATIONS)
+    else:
+        master_key = derive_master_key(PASSWORD, EMAIL, kdf)
+    encrypted_user_key, user_key = make_sym_key(master_key)
+    encrypted_private_key, public_key, private_key = make_asym_key(
+        user_key, stretch=False
+    )
+    org_key = token_bytes(64)
+    return {
+        "master_key": master_key,
+        "user_key": user_key,
+        "encrypted_user_key": encrypted_user_key,
+        "public_key": public_key,
+        "private_key": private_key,
+        "encrypted_private_key": encrypted_private_key,
+        "org_key": org_key,
+        "encrypted_org_key": encrypt_asym(org_key, public_key),
+    }
+
+
+@cache
+def account_keys() -> dict:
+    """The keys of the test account and of its organization"""
+    return make_account_keys()
+
+
+def sync_payload() -> str:
+    """The sync fixture of the test account, using the generated keys"""
+    keys = account_keys()
+    with open("tests/fixtures/test-account/sync_camel.json") as file:
+        sync = json.load(file)
+    sync["profile"]["key"] = keys["encrypted_user_key"]
+    sync["profile"]["privateKey"] = keys["encrypted_private_key"]
+    for org in sync["profile"]["organizations"]:
+        org["key"] = keys["encrypted_org_key"]
+    return json.dumps(sync)
+
+
+def make_api_client(handler) -> BitwardenAPIClient:
+    """Build a logged in BitwardenAPIClient whose requests go to `handler`"""
+    keys = account_keys()
+    client = BitwardenAPIClient(
+        url=URL,
+        email=EMAIL,
+        password=PASSWORD,
+        client_id="user.a8be340c-856b-481f-8183-2b7712995da2",
+        client_secret="secret",
+        device_id="e54ba5f5-7d58-4830-8f2b-99194c70c14f",
+        transport=MockTransport(handler),
+    )
+    client.connect_token = ConnectToken(
+        KdfIterations=KDF_ITERATIONS,
+        Key=keys["encrypted_user_key"],
+        PrivateKey=keys["encrypted_private_key"],
+        access_token="access-token",
+        expires_in=3600,
+        token_type="Bearer",
+        scope="api",
+        master_key=keys["master_key"],
+    )
+    return client
+
+
+def make_admin_client(handler) -> VaultwardenAdminClient:
+    """Build a VaultwardenAdminClient whose requests go to `handler`"""
+    return VaultwardenAdminClient(
+        url=URL,
+        admin_secret_token="admin-token",
+        preload_users=False,
+        transport=MockTransport(handler),
+    )
@@ -0,0 +1,151 @@
+import unittest
+from uuid import uuid4
+
+from vaultwarden.models.access import ACCESS_PLANES, AccessMatrix
+from vaultwarden.models.bitwarden import (
+    OrganizationCollection,
+    OrganizationGroup,
+    OrganizationUserDetails,
+)
+from vaultwarden.models.enum import (
+    OrganizationUserStatus,
+    OrganizationUserType,
+)
+
+
+def user(user_type, collections=(), groups=(), status=2, access_all=False):
+    return OrganizationUserDetails.model_validate(
+        {
+            "id": str(uuid4()),
+            "userId": str(uuid4()),
+            "email": f"{uuid4()}@example.com",
+            "status": status,
+            "type": user_type,
+            "accessAll": access_all,
+            "externalId": None,
+            "collections": [
+                {"id": str(coll_id), **access}
+                for coll_id, access in collections
+            ],
+            "groups": [str(group_id) for group_id in groups],
+            "twoFactorEnabled": False,
+        }
+    )
+
+
+class TestAccessMatrix(unittest.TestCase):
+    def setUp(self) -> None:
+        self.collections = [
+            OrganizationCollection(Id=uuid4(), Name=f"coll-{i}")
+            for i in range(3)
+        ]
+        a, b, c = (coll.Id for coll in self.collections)
+        self.group = OrganizationGroup.model_validate(
+            {
+                "id": str(uuid4()),
+                "name": "group",
+                "collections": [{"id": str(c), "manage": True}],
+            }
+        )
+        self.owner = user(OrganizationUserType.Owner)
+        self.reader = user(
+            OrganizationUserType.User,
+            [(a, {"readOnly": True, "hidePasswords": True})],
+        )
+        self.writer = user(
+            OrganizationUserType.User,
+            [(a, {}), (b, {"readOnly": True})],
+            groups=[self.group.Id],
+        )
+        self.revoked = user(
+            OrganizationUserType.User,
+            [(a, {})],
+            status=OrganizationUserStatus.Revoked,
+        )
+        self.invited_admin = user(
+            OrganizationUserType.Admin, status=OrganizationUserStatus.Invited
+        )
+        self.accepted = user(
+            OrganizationUserType.User,
+            [(a, {})],
+            groups=[self.group.Id],
+            status=OrganizationUserStatus.Accepted,
+        )
+        self.matrix = AccessMatrix(
+            [
+                self.owner,
+                self.reader,
+                self.writer,
+                self.revoked,
+                self.invited_admin,
+                self.accepted,
+            ],
+            self.collections,
+            [self.group],
+        )
+
+    def test_users_with(self):
+        a, b, c = (coll.Id for coll in self.collections)
+        self.assertEqual(
+            self.matrix.users_with(a), [self.owner, self.reader, self.writer]
+        )
+        self.assertEqual(
+            self.matrix.users_with(a, "write"), [self.owner, self.writer]
+        )
+        self.assertEqual(
+            self.matrix.users_with(a, "view_passwords"),
+            [self.owner, self.writer],
+        )
+        self.assertEqual(
+            self.matrix.users_with(c, "manage"), [self.owner, self.writer]
+        )
+        self.assertEqual(
+            self.matrix.users_with([a, b], require_all=True),
+            [self.owner, self.writer],
+        )
+
+    def test_collections_of(self):
+        self.assertEqual(
+            self.matrix.collections_of(self.writer.UserId), self.collections
+        )
+        self.assertEqual(
+            self.matrix.collections_of(self.writer.Id, "write"),
+            [self.collections[0], self.collections[2]],
+        )
+        self.assertEqual(self.matrix.collections_of(self.revoked.Id), [])
+        self.assertEqual(
+            self.matrix.collections_of(
+                [self.reader.Id, self.writer.Id], require_all=True
+            ),
+            [self.collections[0]],
+        )
+        self.assertTrue(
+            self.matrix.can(self.owner.Id, self.collections[1].Id, "manage")
+        )
+        self.assertFalse(
+            self.matrix.can(self.reader.Id, self.collections[1].Id)
+        )
+
+    def test_pending_users(self):
+        self.assertEqual(
+            self.matrix.pending, [self.invited_admin, self.accepted]
+        )
+        for pending in self.matrix.pending:
+            for plane in ACCESS_PLANES:
+                self.assertEqual(
+                    self.matrix.collections_of(pending.Id, plane), []
+                )
+        self.assertEqual(
+            self.matrix.users_with(self.collections[1].Id),
+            [self.owner, self.writer],
+        )
+
+    def test_member_access_all(self):
+        member = user(OrganizationUserType.User, access_all=True)
+        matrix = AccessMatrix([member], self.collections, [self.group])
+        for plane in ("access", "write", "view_passwords"):
+            self.assertEqual(
+                matrix.collections_of(member.Id, plane), self.collections
+            )
+        # manage comes from the group only, like for a group AccessAll
+        self.assertEqual(matrix.collections_of(member.Id, "manage"), [])
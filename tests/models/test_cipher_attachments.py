@@ -0,0 +1,116 @@
+import io
+import json
+from secrets import token_bytes
+import unittest
+
+import httpx
+from vaultwarden.models.bitwarden import CipherDetails
+from vaultwarden.utils.crypto import (
+    DecryptError,
+    decrypt,
+    decrypt_bytes,
+    encrypt_sym,
+    encrypt_sym_to_bytes,
+)
+
+from tests.mock_client import (
+    ORGANIZATION_ID,
+    URL,
+    account_keys,
+    make_api_client,
+    sync_payload,
+)
+
+CIPHER_ID = "921b94a6-d270-4889-88c2-c2531054c02e"
+ATTACHMENT_ID = "e2ac1ab6d43ec0f6a0a5"
+
+
+class TestCipherAttachments(unittest.TestCase):
+    def setUp(self) -> None:
+        self.content = token_bytes(300_000)
+        attachment_key = token_bytes(64)
+        self.encrypted = encrypt_sym_to_bytes(self.content, attachment_key)
+        org_key = account_keys()["org_key"]
+        self.attachment = {
+            "id": ATTACHMENT_ID,
+            "url": f"{URL}/attachments/{CIPHER_ID}/{ATTACHMENT_ID}?token=t",
+            "fileName": encrypt_sym(b"backup.tar", org_key),
+            "key": encrypt_sym(attachment_key, org_key),
+            "size": str(len(self.encrypted)),
+            "sizeName": "293.0 KB",
+            "object": "attachment",
+        }
+
+        self.uploads: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/sync":
+                return httpx.Response(200, text=sync_payload())
+            if request.method == "POST":
+                request.read()
+                self.uploads.append(request)
+                return httpx.Response(200, json={"attachmentId": "f00"})
+            if request.url.path.startswith("/api/ciphers/"):
+                return httpx.Response(200, json=self.attachment)
+            return httpx.Response(200, content=self.encrypted)
+
+        self.cipher = CipherDetails.model_validate(
+            {
+                "id": CIPHER_ID,
+                "type": 1,
+                "name": "2.AAAA|AAAA|AAAA",
+                "collectionIds": [],
+                "attachments": [self.attachment],
+            },
+            context={
+                "client": make_api_client(handler),
+                "parent_id": ORGANIZATION_ID,
+            },
+        )
+
+    def test_download_attachment(self):
+        sink = io.BytesIO()
+        written = self.cipher.download_attachment(
+            ATTACHMENT_ID, sink, chunk_size=4096
+        )
+        self.assertEqual(written, len(self.content))
+        self.assertEqual(sink.getvalue(), self.content)
+
+    def test_download_tampered_attachment(self):
+        tampered = bytearray(self.encrypted)
+        tampered[100] ^= 1
+        self.encrypted = bytes(tampered)
+        sink = io.BytesIO()
+        with self.assertRaises(DecryptError):
+            self.cipher.download_attachment(
+                ATTACHMENT_ID, sink, chunk_size=4096
+            )
+        self.assertEqual(sink.getvalue(), b"")
+
+    def test_upload_attachment(self):
+        attachment = self.cipher.upload_attachment(
+            "backup.tar", io.BytesIO(self.content), chunk_size=4096
+        )
+        self.assertEqual(attachment.Id, "f00")
+        self.assertEqual(len(self.cipher.Attachments), 2)
+        create, upload = self.uploads
+        self.assertEqual(
+            create.url.path, f"/api/ciphers/{CIPHER_ID}/attachment/v2"
+        )
+        self.assertEqual(
+            upload.url.path, f"/api/ciphers/{CIPHER_ID}/attachment/f00"
+        )
+        boundary = upload.headers["content-type"].split("boundary=")[1]
+        part = upload.content.split(b"--" + boundary.encode())[1]
+        data = part.split(b"\r\n\r\n", 1)[1][:-2]
+        self.assertEqual(
+            int(json.loads(create.content)["fileSize"]), len(data)
+        )
+        org_key = account_keys()["org_key"]
+        attachment_key = decrypt(attachment.Key, org_key)
+        self.assertEqual(decrypt_bytes(data, attachment_key), self.content)
+        self.assertEqual(decrypt(attachment.FileName, org_key), b"backup.tar")
+
+
+if __name__ == "__main__":
+    unittest.main()
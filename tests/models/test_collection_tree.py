@@ -0,0 +1,102 @@
+import unittest
+from uuid import uuid4
+
+import httpx
+from vaultwarden.models.bitwarden import Organization
+from vaultwarden.utils.crypto import encrypt_sym
+
+from tests.mock_client import (
+    ORGANIZATION_ID,
+    account_keys,
+    make_api_client,
+    sync_payload,
+)
+
+NAMES = ["infra", "infra/db", "infra/db/prod", "infra/web", "team/ops"]
+
+
+class TestCollectionTree(unittest.TestCase):
+    def setUp(self) -> None:
+        org_key = account_keys()["org_key"]
+        self.ids = {name: str(uuid4()) for name in NAMES}
+        self.updated: list[str] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/api/sync":
+                return httpx.Response(200, text=sync_payload())
+            if request.method == "PUT":
+                self.updated.append(path.split("/")[-2])
+                return httpx.Response(200)
+            if request.method == "DELETE":
+                return httpx.Response(200)
+            return httpx.Response(
+                200,
+                json={
+                    "data": [
+                        {
+                            "id": coll_id,
+                            "name": encrypt_sym(name, org_key),
+                            "organizationId": str(ORGANIZATION_ID),
+                            "externalId": None,
+                            "object": "collection",
+                        }
+                        for name, coll_id in self.ids.items()
+                    ],
+                    "object": "list",
+                },
+            )
+
+        self.organization = Organization.model_validate(
+            {
+                "name": "Test Organization",
+                "billingEmail": "test-account@example.com",
+                "object": "organization",
+            },
+            context={
+                "client": make_api_client(handler),
+                "parent_id": ORGANIZATION_ID,
+            },
+        )
+
+    def names(self, collections):
+        return [coll.Name for coll in collections]
+
+    def test_subtree_and_ancestors(self):
+        tree = self.organization.collection_tree()
+        self.assertEqual(
+            self.names(tree.subtree("infra")),
+            ["infra", "infra/db", "infra/db/prod", "infra/web"],
+        )
+        self.assertEqual(
+            self.names(tree.subtree("infra/db", include_self=False)),
+            ["infra/db/prod"],
+        )
+        self.assertEqual(
+            self.names(tree.ancestors("infra/db/prod")), ["infra/db", "infra"]
+        )
+        # the intermediate level of team/ops is not a collection
+        self.assertIsNone(self.organization.collection("team"))
+        self.assertEqual(self.names(tree.subtree("team")), ["team/ops"])
+
+    def test_delete_collection_updates_tree(self):
+        self.organization.collection_tree()
+        self.organization.delete_collection(self.ids["team/ops"])
+        tree = self.organization.collection_tree()
+        self.assertIsNone(tree.node("team"))
+        self.organization.delete_collection(self.ids["infra/db"])
+        self.assertIsNone(self.organization.collection("infra/db"))
+        self.assertEqual(
+            self.names(tree.subtree("infra")),
+            ["infra", "infra/db/prod", "infra/web"],
+        )
+
+    def test_set_subtree_users(self):
+        responses = self.organization.set_subtree_users(
+            "infra/db", [uuid4()], max_workers=2
+        )
+        self.assertEqual(len(responses), 2)
+        self.assertEqual(
+            sorted(self.updated),
+            sorted([self.ids["infra/db"], self.ids["infra/db/prod"]]),
+        )
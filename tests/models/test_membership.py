@@ -0,0 +1,90 @@
+import json
+import unittest
+from uuid import uuid4
+
+import httpx
+from vaultwarden.models.enum import OrganizationUserType
+from vaultwarden.models.membership import MembershipIndex
+
+from tests.mock_client import ORGANIZATION_ID, make_api_client, sync_payload
+
+OWNER_USER_ID = "a8be340c-856b-481f-8183-2b7712995da2"
+SECOND_ORGANIZATION_ID = str(uuid4())
+FORBIDDEN_ORGANIZATION_ID = str(uuid4())
+
+
+class TestMembershipIndex(unittest.TestCase):
+    @staticmethod
+    def read_json_payload(file_path):
+        with open(file_path, "r") as file:
+            return file.read()
+
+    def setUp(self) -> None:
+        self.requests: list[str] = []
+        sync = json.loads(sync_payload())
+        profile_orgs = sync["profile"]["organizations"]
+        for org_id in (SECOND_ORGANIZATION_ID, FORBIDDEN_ORGANIZATION_ID):
+            profile_orgs.append({**profile_orgs[0], "id": org_id})
+        organization = json.loads(
+            self.read_json_payload(
+                "tests/fixtures/test-organization/organization_camel.json"
+            )
+        )
+        self.users = json.loads(
+            self.read_json_payload(
+                "tests/fixtures/test-organization/users_camel.json"
+            )
+        )
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            self.requests.append(path)
+            if path == "/api/sync":
+                return httpx.Response(200, json=sync)
+            if FORBIDDEN_ORGANIZATION_ID in path:
+                return httpx.Response(403, request=request)
+            if not path.endswith("/users"):
+                org_id = path.rsplit("/", 1)[-1]
+                return httpx.Response(200, json={**organization, "id": org_id})
+            if SECOND_ORGANIZATION_ID in path:
+                return httpx.Response(
+                    200, json={**self.users, "data": self.users["data"][:1]}
+                )
+            return httpx.Response(200, json=self.users)
+
+        self.index = MembershipIndex(make_api_client(handler)).build()
+
+    def test_build(self):
+        self.assertEqual(
+            set(map(str, self.index.organizations)),
+            {str(ORGANIZATION_ID), SECOND_ORGANIZATION_ID},
+        )
+        memberships = self.index.memberships(email="Test-Account@example.com")
+        self.assertEqual(len(memberships), 2)
+        self.assertEqual(
+            {m.type for m in memberships}, {OrganizationUserType.Owner}
+        )
+        self.assertEqual(
+            self.index.memberships(user_id=OWNER_USER_ID), memberships
+        )
+        self.assertEqual(
+            [
+                str(org.Id)
+                for org in self.index.organizations_of(
+                    email="test-account-2@example.com"
+                )
+            ],
+            [str(ORGANIZATION_ID)],
+        )
+
+    def test_refresh(self):
+        self.users["data"] = self.users["data"][1:]
+        self.requests.clear()
+        self.index.refresh(ORGANIZATION_ID)
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(
+            len(self.index.memberships(email="test-account@example.com")), 1
+        )
+        self.assertEqual(
+            len(self.index.memberships(email="test-account-2@example.com")), 1
+        )
@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+import unittest
+from uuid import uuid4
+
+import httpx
+from vaultwarden.models.bitwarden import Organization
+
+from tests.mock_client import ORGANIZATION_ID, make_api_client
+
+START = datetime(2024, 7, 1, tzinfo=timezone.utc)
+END = datetime(2024, 8, 1, tzinfo=timezone.utc)
+
+
+class TestOrganizationEvents(unittest.TestCase):
+    def setUp(self) -> None:
+        self.user_id = uuid4()
+        self.requests: list[httpx.QueryParams] = []
+        pages = {
+            None: ("page-2", [1000, 1001]),
+            "page-2": ("page-3", [1100]),
+            "page-3": (None, [1300, 1301, 1302]),
+        }
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request.url.params)
+            token = request.url.params.get("continuationToken")
+            next_token, types = pages[token]
+            return httpx.Response(
+                200,
+                json={
+                    "data": [
+                        {
+                            "type": event_type,
+                            "date": "2024-07-23T09:45:02.427052Z",
+                            "userId": str(self.user_id),
+                            "organizationId": str(ORGANIZATION_ID),
+                            "deviceType": 8,
+                            "ipAddress": "127.0.0.1",
+                            "object": "event",
+                        }
+                        for event_type in types
+                    ],
+                    "continuationToken": next_token,
+                    "object": "list",
+                },
+            )
+
+        self.organization = Organization.model_validate(
+            {
+                "name": "Test Organization",
+                "billingEmail": "test-account@example.com",
+                "object": "organization",
+            },
+            context={
+                "client": make_api_client(handler),
+                "parent_id": ORGANIZATION_ID,
+            },
+        )
+
+    def test_iter_events(self):
+        events = list(self.organization.iter_events(START, END))
+        self.assertEqual(
+            [event.Type for event in events],
+            [1000, 1001, 1100, 1300, 1301, 1302],
+        )
+        self.assertEqual(events[0].UserId, self.user_id)
+        self.assertEqual(events[0].Date.year, 2024)
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(self.requests[0]["start"], START.isoformat())
+        self.assertEqual(self.requests[0]["end"], END.isoformat())
+
+    def test_resume_from_token(self):
+        pages = self.organization.iter_event_pages(START, END)
+        first = next(pages)
+        pages.close()
+        events = list(
+            self.organization.iter_events(
+                START, END, continuation_token=first.ContinuationToken
+            )
+        )
+        self.assertEqual(
+            [event.Type for event in events], [1100, 1300, 1301, 1302]
+        )
+        self.assertEqual(self.requests[-1]["continuationToken"], "page-3")
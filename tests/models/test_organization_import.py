@@ -0,0 +1,132 @@
+import json
+import unittest
+from uuid import uuid4
+
+import httpx
+from vaultwarden.models.bitwarden import Organization
+from vaultwarden.models.enum import CipherType
+from vaultwarden.models.exception_models import BitwardenError
+from vaultwarden.utils.crypto import decrypt, encrypt_sym
+
+from tests.mock_client import (
+    ORGANIZATION_ID,
+    account_keys,
+    make_api_client,
+    sync_payload,
+)
+
+
+class TestOrganizationImport(unittest.TestCase):
+    def setUp(self) -> None:
+        org_key = account_keys()["org_key"]
+        self.collection_id = str(uuid4())
+        self.created_id = str(uuid4())
+        self.imports: list[dict] = []
+        self.created: list[dict] = []
+
+        def collection(coll_id, name):
+            return {
+                "id": coll_id,
+                "name": encrypt_sym(name, org_key),
+                "organizationId": str(ORGANIZATION_ID),
+                "externalId": None,
+                "object": "collection",
+            }
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/api/sync":
+                return httpx.Response(200, text=sync_payload())
+            if path == "/api/ciphers/import-organization":
+                self.imports.append(json.loads(request.content))
+                return httpx.Response(200)
+            if request.method == "POST":
+                self.created.append(json.loads(request.content))
+                return httpx.Response(
+                    200, json=collection(self.created_id, "new-collection")
+                )
+            return httpx.Response(
+                200,
+                json={
+                    "data": [collection(self.collection_id, "existing")],
+                    "object": "list",
+                },
+            )
+
+        self.organization = Organization.model_validate(
+            {
+                "name": "Test Organization",
+                "billingEmail": "test-account@example.com",
+                "object": "organization",
+            },
+            context={
+                "client": make_api_client(handler),
+                "parent_id": ORGANIZATION_ID,
+            },
+        )
+
+    def test_import_ciphers(self):
+        items = [
+            {
+                "type": CipherType.Login,
+                "name": f"secret-{i}",
+                "login": {
+                    "username": "user",
+                    "password": f"password-{i}",
+                    "uris": [{"uri": "https://example.com", "match": None}],
+                },
+                "fields": [{"name": "env", "value": "prod", "type": 0}],
+            }
+            for i in range(3)
+        ]
+        items[2]["collectionIds"] = [self.collection_id]
+        count = self.organization.import_ciphers(
+            items, collections=["new-collection"], chunk_size=2
+        )
+        self.assertEqual(count, 3)
+        self.assertEqual(len(self.imports), 2)
+        first, second = self.imports
+        self.assertEqual(len(first["ciphers"]), 2)
+        self.assertEqual(
+            [c["id"] for c in second["collections"]],
+            [self.created_id, self.collection_id],
+        )
+        self.assertEqual(
+            second["collectionRelationships"],
+            [{"key": 0, "value": 0}, {"key": 0, "value": 1}],
+        )
+        org_key = account_keys()["org_key"]
+        cipher = second["ciphers"][0]
+        self.assertEqual(decrypt(cipher["name"], org_key), b"secret-2")
+        self.assertEqual(
+            decrypt(cipher["login"]["password"], org_key), b"password-2"
+        )
+        self.assertEqual(
+            decrypt(cipher["login"]["uris"][0]["uri"], org_key),
+            b"https://example.com",
+        )
+        self.assertEqual(
+            decrypt(cipher["fields"][0]["value"], org_key), b"prod"
+        )
+
+    def test_import_collection_ids(self):
+        items = [{"type": CipherType.SecureNote, "name": "note"}]
+        self.organization.import_ciphers(
+            items, collections=[self.collection_id, "existing"]
+        )
+        self.assertEqual(self.created, [])
+        self.assertEqual(
+            [c["id"] for c in self.imports[0]["collections"]],
+            [self.collection_id],
+        )
+        for collections in ([str(uuid4()), "other-new"], [uuid4()]):
+            with self.assertRaises(BitwardenError):
+                self.organization.import_ciphers(
+                    items, collections=collections
+                )
+        self.assertEqual(self.created, [])
+        self.assertEqual(len(self.imports), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
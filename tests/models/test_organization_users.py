@@ -0,0 +1,168 @@
+from base64 import b64encode
+import json
+import unittest
+from uuid import uuid4
+
+import httpx
+from vaultwarden.models.bitwarden import Organization
+from vaultwarden.models.enum import OrganizationUserStatus
+from vaultwarden.utils.crypto import decrypt
+
+from tests.mock_client import (
+    ORGANIZATION_ID,
+    account_keys,
+    make_api_client,
+    sync_payload,
+)
+
+OWNER_ID = "44f9833c-33dd-461c-a691-563115724e55"
+MEMBER_ID = "7f009002-3a23-4880-985c-d9c351192820"
+
+
+class TestOrganizationBulkUsers(unittest.TestCase):
+    @staticmethod
+    def read_json_payload(file_path):
+        with open(file_path, "r") as file:
+            return file.read()
+
+    def setUp(self) -> None:
+        self.requests: list[httpx.Request] = []
+        users = self.read_json_payload(
+            "tests/fixtures/test-organization/users_camel.json"
+        )
+
+        self.users_payload = json.loads(users)
+        self.users_payload["data"][1]["status"] = 1
+        public_key = b64encode(account_keys()["public_key"]).decode()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            if request.url.path == "/api/sync":
+                return httpx.Response(200, text=sync_payload())
+            if request.method == "GET":
+                return httpx.Response(200, json=self.users_payload)
+            body = json.loads(request.content)
+            if request.url.path.endswith("/users/invite"):
+                invited = {
+                    **self.users_payload["data"][1],
+                    "id": str(uuid4()),
+                    "email": body["emails"][0],
+                    "status": OrganizationUserStatus.Invited,
+                }
+                self.users_payload["data"].append(invited)
+                return httpx.Response(200)
+            if request.url.path.endswith("/public-keys"):
+                return httpx.Response(
+                    200,
+                    json={
+                        "data": [
+                            {"id": i, "userId": i, "key": public_key}
+                            for i in body["ids"]
+                        ]
+                    },
+                )
+            ids = body.get("ids") or [k["id"] for k in body["keys"]]
+            return httpx.Response(
+                200,
+                json={
+                    "data": [
+                        {"id": i, "error": "" if i != OWNER_ID else "Owner"}
+                        for i in ids
+                    ],
+                    "object": "list",
+                    "continuationToken": None,
+                },
+            )
+
+        client = make_api_client(handler)
+        self.organization = Organization.model_validate_json(
+            self.read_json_payload(
+                "tests/fixtures/test-organization/organization_camel.json"
+            ),
+            context={"client": client, "parent_id": ORGANIZATION_ID},
+        )
+        self.organization.users()
+
+    def test_remove_users_chunks_and_patches_cache(self):
+        res = self.organization.remove_users(
+            [OWNER_ID, MEMBER_ID], chunk_size=1
+        )
+        bulk = [r for r in self.requests if r.method == "DELETE"]
+        self.assertEqual(len(bulk), 2)
+        self.assertEqual(
+            [r.success for r in res],
+            [False, True],
+        )
+        users = self.organization.users()
+        self.assertEqual([str(u.Id) for u in users], [OWNER_ID])
+
+    def test_revoke_users_patches_status(self):
+        users = self.organization.users()
+        self.organization.revoke_users(users)
+        self.assertEqual(self.requests[-1].url.path.split("/")[-1], "revoke")
+        self.assertEqual(
+            [u.Status for u in self.organization.users()],
+            [OrganizationUserStatus.Confirmed, OrganizationUserStatus.Revoked],
+        )
+
+    def test_confirm_accepted_users(self):
+        res = self.organization.confirm_users()
+        self.assertEqual([str(r.Id) for r in res], [MEMBER_ID])
+        public_keys = [r for r in self.requests if "public-keys" in str(r.url)]
+        self.assertEqual(len(public_keys), 1)
+        confirm = json.loads(self.requests[-1].content)["keys"]
+        self.assertEqual(
+            decrypt(confirm[0]["key"], account_keys()["private_key"]),
+            account_keys()["org_key"],
+        )
+        self.assertEqual(
+            self.organization.users()[1].Status,
+            OrganizationUserStatus.Confirmed,
+        )
+
+    def roster_loads(self) -> int:
+        return len([r for r in self.requests if r.url.path.endswith("/users")])
+
+    def test_invite_reloads_roster(self):
+        loads = self.roster_loads()
+        self.organization.invite("new@example.com")
+        self.assertEqual(self.roster_loads(), loads + 1)
+        self.assertEqual(
+            self.organization.users(search="new@example.com")[0].Status,
+            OrganizationUserStatus.Invited,
+        )
+
+    def test_restore_users_reloads_roster(self):
+        loads = self.roster_loads()
+        # restored to the status known by the server only
+        self.users_payload["data"][1]["status"] = 2
+        self.organization.restore_users([MEMBER_ID])
+        self.assertEqual(self.roster_loads(), loads + 1)
+        self.assertEqual(
+            self.organization.users()[1].Status,
+            OrganizationUserStatus.Confirmed,
+        )
+
+    def test_instances_copy_the_users(self):
+        # the roster of a flight, shared by the instances joining it
+        shared = self.organization._fetch_users()
+        client = self.organization.api_client
+        client.coalesce = lambda key, func: shared  # type: ignore[method-assign]
+        other = Organization.model_validate_json(
+            self.read_json_payload(
+                "tests/fixtures/test-organization/organization_camel.json"
+            ),
+            context={"client": client, "parent_id": ORGANIZATION_ID},
+        )
+        first = self.organization.users(force_refresh=True)[1]
+        second = other.users()[1]
+        first.Status = OrganizationUserStatus.Revoked
+        first.Collections.clear()
+        for user in (shared[1], second):
+            self.assertEqual(user.Status, OrganizationUserStatus.Accepted)
+            self.assertNotEqual(user.Collections, [])
+        self.assertIs(first.api_client, client)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import json
+from secrets import token_bytes
+import unittest
+from uuid import uuid4
+
+import httpx
+from vaultwarden.models.enum import CipherType
+from vaultwarden.models.exception_models import BitwardenError
+from vaultwarden.utils.crypto import encrypt_sym
+
+from tests.mock_client import (
+    ORGANIZATION_ID,
+    account_keys,
+    make_api_client,
+    sync_payload,
+)
+
+
+def login_cipher(
+    key,
+    name,
+    password,
+    organization_id=None,
+    cipher_key=None,
+    uri="https://example.com",
+):
+    cipher = {
+        "id": str(uuid4()),
+        "organizationId": organization_id,
+        "type": CipherType.Login,
+        "key": None,
+        "collectionIds": [],
+        "deletedDate": None,
+    }
+    if cipher_key is not None:
+        cipher["key"] = encrypt_sym(cipher_key, key)
+        key = cipher_key
+    cipher["name"] = encrypt_sym(name, key)
+    cipher["notes"] = None
+    cipher["login"] = {
+        "username": encrypt_sym("user", key),
+        "password": encrypt_sym(password, key),
+        "totp": None,
+        "uris": [{"uri": encrypt_sym(uri, key)}],
+    }
+    cipher["fields"] = [
+        {"name": encrypt_sym("env", key), "value": encrypt_sym("prod", key)}
+    ]
+    return cipher
+
+
+class TestVault(unittest.TestCase):
+    def setUp(self) -> None:
+        keys = account_keys()
+        sync = json.loads(sync_payload())
+        sync["ciphers"] = [
+            login_cipher(keys["user_key"], "personal", "p1"),
+            login_cipher(
+                keys["org_key"], "shared", "p2", str(ORGANIZATION_ID)
+            ),
+            login_cipher(
+                keys["org_key"],
+                "cipher-key",
+                "p3",
+                str(ORGANIZATION_ID),
+                token_bytes(64),
+                "https://ci.example.com:8443/a",
+            ),
+        ]
+        collection_id = str(uuid4())
+        sync["ciphers"][2]["collectionIds"] = [collection_id]
+        sync["collections"] = [
+            {
+                "id": collection_id,
+                "organizationId": str(ORGANIZATION_ID),
+                "name": encrypt_sym("infra/ci", keys["org_key"]),
+            }
+        ]
+        self.requests = 0
+        self.revision = "1"
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/accounts/revision-date":
+                return httpx.Response(200, text=self.revision)
+            self.requests += 1
+            return httpx.Response(200, json=sync)
+
+        self.client = make_api_client(handler)
+
+    def test_vault_items(self):
+        vault = self.client.vault()
+        items = vault.items()
+        self.assertEqual(
+            [(i.name, i.password) for i in items],
+            [("personal", "p1"), ("shared", "p2"), ("cipher-key", "p3")],
+        )
+        self.assertEqual(items[2].uris, ["https://ci.example.com:8443/a"])
+        self.assertEqual(items[2].fields, {"env": "prod"})
+        self.assertEqual(len(vault.items(organization_id=ORGANIZATION_ID)), 2)
+        self.assertIs(self.client.vault(), vault)
+        self.assertEqual(self.requests, 1)
+
+    def test_vault_lazy_decryption(self):
+        vault = self.client.vault()
+        item = vault.items()[0]
+        self.assertEqual(len(vault._cache), 0)
+        self.assertEqual(item.username, "user")
+        self.assertEqual(item.username, "user")
+        self.assertEqual(len(vault._cache), 1)
+
+    def test_get_secret(self):
+        secret = self.client.get_secret(name="shared")
+        self.assertEqual(secret.password, "p2")
+        secret = self.client.get_secret(uri="CI.example.com")
+        self.assertEqual(secret.name, "cipher-key")
+        secret = self.client.get_secret(
+            name="cipher-key", collection="infra/ci"
+        )
+        self.assertEqual(secret.password, "p3")
+        self.assertIsNone(self.client.get_secret(name="missing"))
+        with self.assertRaises(BitwardenError):
+            self.client.get_secret(uri="https://example.com")
+
+    def test_get_secret_check_revision(self):
+        self.client.get_secret(name="shared", check_revision=True)
+        self.client.get_secret(name="shared", check_revision=True)
+        self.assertEqual(self.requests, 1)
+        self.revision = "2"
+        self.client.get_secret(name="shared", check_revision=True)
+        self.assertEqual(self.requests, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+from Crypto.PublicKey import RSA
+from vaultwarden.utils.cache import LRUCache
+from vaultwarden.utils.crypto import decrypt, encrypt_asym
+from vaultwarden.utils.crypto_backend import get_backend
+from vaultwarden.utils.key_cache import RSAKeyCache
+
+from tests.fake_server import FakeVaultwarden
+from tests.mock_client import ORGANIZATION_ID
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache: LRUCache[str, int] = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_get_or_set(self):
+        cache: LRUCache[str, int] = LRUCache(2)
+        calls = []
+        for _ in range(2):
+            cache.get_or_set("a", lambda: calls.append(1) or 1)
+        self.assertEqual(len(calls), 1)
+
+    def test_stats(self):
+        cache: LRUCache[str, int] = LRUCache(1)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+        cache.set("b", 2)
+        stats = cache.stats()
+        self.assertEqual(
+            (stats.hits, stats.misses, stats.evictions, stats.size),
+            (1, 1, 1, 1),
+        )
+        self.assertEqual(stats.hit_rate, 0.5)
+
+
+class TestRSAKeyCache(unittest.TestCase):
+    def test_bounded_and_hashed(self):
+        keys = [RSA.generate(1024).exportKey("DER") for _ in range(3)]
+        cache = RSAKeyCache(maxsize=2)
+        for key in keys + keys[-1:]:
+            encrypted = encrypt_asym(b"secret", key, key_cache=cache)
+            self.assertEqual(
+                decrypt(encrypted, key, key_cache=cache), b"secret"
+            )
+        stats = cache.stats()
+        self.assertEqual((stats.size, stats.evictions), (2, 1))
+        self.assertEqual((stats.misses, stats.hits), (3, 5))
+        # the encoded private keys are not kept
+        self.assertTrue(all(len(digest) == 32 for _, digest in cache._data))
+        self.assertIs(
+            cache.load(keys[-1], get_backend()),
+            cache.load(keys[-1], get_backend()),
+        )
+
+    def test_client_cache(self):
+        server = FakeVaultwarden()
+        client = server.api_client()
+        client.rsa_key_cache = RSAKeyCache()
+        for _ in range(2):
+            self.assertEqual(
+                client.organization_key(ORGANIZATION_ID), server.org_key
+            )
+        stats = client.rsa_key_cache.stats()
+        self.assertEqual((stats.misses, stats.hits), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
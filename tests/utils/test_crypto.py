@@ -0,0 +1,46 @@
+from secrets import token_bytes
+import unittest
+
+from vaultwarden.utils.crypto import (
+    B64DecryptError,
+    MissingPartsDecryptError,
+    WrongFormatError,
+    WrongTypeDecryptError,
+    decode_cipher_string,
+    encrypt_sym,
+    is_encrypted,
+)
+
+
+class TestCipherString(unittest.TestCase):
+    def test_decode(self):
+        encrypted = encrypt_sym(b"secret", token_bytes(64))
+        typ, iv, ct, mac = decode_cipher_string(encrypted)
+        self.assertEqual(typ, 2)
+        self.assertEqual((len(iv), len(ct), len(mac)), (16, 16, 32))
+        self.assertEqual(
+            decode_cipher_string("4.AA=="), (4, None, b"\0", None)
+        )
+        self.assertEqual(
+            decode_cipher_string("0.AAAAAA==|AAAA"),
+            (0, b"\0" * 4, b"\0\0\0", None),
+        )
+
+    def test_decode_errors(self):
+        for cipher_string, error in (
+            ("", WrongFormatError),
+            ("2.AAAA|AAAA|AAAA", WrongFormatError),
+            ("2.AAAA\n|AA==|AAAA", WrongFormatError),
+            ("9.AA==", WrongTypeDecryptError),
+            ("2.AA==|AAAA", MissingPartsDecryptError),
+            ("0.AA==|AAAA|AAAA", MissingPartsDecryptError),
+            ("2.A==|AAAA|AAAA", B64DecryptError),
+        ):
+            with self.subTest(cipher_string=cipher_string):
+                self.assertRaises(error, decode_cipher_string, cipher_string)
+
+    def test_is_encrypted(self):
+        self.assertTrue(is_encrypted(encrypt_sym("secret", token_bytes(64))))
+        self.assertTrue(is_encrypted("4.AA=="))
+        for value in ("secret", "2.AA==|AAAA", "9.AA==", "", None, b"2.="):
+            self.assertFalse(is_encrypted(value))
@@ -0,0 +1,70 @@
+from secrets import token_bytes
+import unittest
+
+from Crypto.PublicKey import RSA
+from vaultwarden.utils.crypto import (
+    decrypt,
+    encrypt_asym,
+    encrypt_sym,
+    strech_key,
+)
+from vaultwarden.utils.crypto_backend import (
+    CryptoBackend,
+    available_backends,
+    get_backend,
+    set_backend,
+)
+
+
+class TestCryptoBackend(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        rsa_key = RSA.generate(2048)
+        cls.private_key = rsa_key.exportKey("DER", pkcs=8)
+        cls.public_key = rsa_key.publickey().exportKey("DER")
+
+    def setUp(self) -> None:
+        self.previous = get_backend()
+        self.addCleanup(set_backend, self.previous)
+
+    def test_backends_interoperate(self):
+        backends = available_backends()
+        key = token_bytes(64)
+        for encrypting in backends:
+            set_backend(encrypting)
+            sym = encrypt_sym("secret value", key)
+            asym = encrypt_asym(b"secret value", self.public_key)
+            stretched = strech_key(key[:32])
+            for decrypting in backends:
+                set_backend(decrypting)
+                with self.subTest(
+                    encrypting=encrypting.name, decrypting=decrypting.name
+                ):
+                    self.assertEqual(decrypt(sym, key), b"secret value")
+                    self.assertEqual(
+                        decrypt(asym, self.private_key), b"secret value"
+                    )
+                    self.assertEqual(strech_key(key[:32]), stretched)
+
+    def test_set_backend(self):
+        set_backend("pycryptodome")
+        self.assertEqual(get_backend().name, "pycryptodome")
+        with self.assertRaises(ValueError):
+            set_backend("unknown")
+        set_backend(None)
+        self.assertIn(
+            get_backend().name, [b.name for b in available_backends()]
+        )
+
+    def test_incomplete_backend(self):
+        class AESOnly(CryptoBackend):
+            name = "aes-only"
+
+            def aes_cbc_encrypt(self, key, iv, data):
+                return data
+
+            def aes_cbc_decrypt(self, key, iv, data):
+                return data
+
+        with self.assertRaises(TypeError):
+            AESOnly()  # type: ignore[abstract]
@@ -0,0 +1,81 @@
+import io
+from secrets import token_bytes
+import unittest
+
+from vaultwarden.utils.crypto import (
+    DecryptError,
+    decrypt_bytes,
+    encrypt_sym_to_bytes,
+)
+from vaultwarden.utils.crypto_stream import decrypt_stream, encrypt_stream
+
+
+def chunked(data: bytes, size: int):
+    return (data[i : i + size] for i in range(0, len(data), size))
+
+
+class TestCryptoStream(unittest.TestCase):
+    def setUp(self) -> None:
+        self.key = token_bytes(64)
+
+    def test_decrypt_stream_any_chunk_size(self):
+        for length in (0, 1, 15, 16, 17, 1000):
+            plaintext = token_bytes(length)
+            encrypted = encrypt_sym_to_bytes(plaintext, self.key)
+            for size in (1, 7, 16, 49, 4096):
+                sink = io.BytesIO()
+                written = decrypt_stream(
+                    chunked(encrypted, size), self.key, sink
+                )
+                self.assertEqual(sink.getvalue(), plaintext)
+                self.assertEqual(written, length)
+
+    def test_encrypt_stream_roundtrip(self):
+        for length in (0, 15, 16, 100_000):
+            plaintext = token_bytes(length)
+            sink = io.BytesIO()
+            written = encrypt_stream(
+                io.BytesIO(plaintext), self.key, sink, chunk_size=1000
+            )
+            self.assertEqual(written, len(sink.getvalue()))
+            self.assertEqual(written, 49 + (length // 16 + 1) * 16)
+            self.assertEqual(
+                decrypt_bytes(sink.getvalue(), self.key), plaintext
+            )
+
+    def test_encrypt_stream_from_iterable(self):
+        plaintext = token_bytes(1000)
+        sink = io.BytesIO()
+        encrypt_stream(chunked(plaintext, 7), self.key, sink)
+        sink.seek(0)
+        decrypted = io.BytesIO()
+        decrypt_stream(chunked(sink.getvalue(), 13), self.key, decrypted)
+        self.assertEqual(decrypted.getvalue(), plaintext)
+
+    def test_decrypt_stream_tampered(self):
+        encrypted = encrypt_sym_to_bytes(token_bytes(100_000), self.key)
+        for position in (49, len(encrypted) // 2, len(encrypted) - 1):
+            tampered = bytearray(encrypted)
+            tampered[position] ^= 1
+            sink = io.BytesIO()
+            # spooled to a file, the sink gets nothing of the first chunks
+            with self.assertRaises(DecryptError):
+                decrypt_stream(
+                    chunked(bytes(tampered), 4096),
+                    self.key,
+                    sink,
+                    spool_size=1024,
+                )
+            self.assertEqual(sink.getvalue(), b"")
+
+    def test_decrypt_stream_truncated(self):
+        encrypted = encrypt_sym_to_bytes(token_bytes(100), self.key)
+        for truncated in (encrypted[:-16], encrypted[:-1], encrypted[:40]):
+            sink = io.BytesIO()
+            with self.assertRaises(DecryptError):
+                decrypt_stream([truncated], self.key, sink)
+            self.assertEqual(sink.getvalue(), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
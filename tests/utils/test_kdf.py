@@ -0,0 +1,173 @@
+from hashlib import sha256
+import threading
+import unittest
+from unittest.mock import patch
+
+import httpx
+from vaultwarden.models.enum import KdfType
+from vaultwarden.models.exception_models import BitwardenError
+from vaultwarden.models.sync import ConnectToken
+from vaultwarden.utils import kdf
+from vaultwarden.utils.crypto import make_master_key
+from vaultwarden.utils.kdf import (
+    KdfParams,
+    clear_cache,
+    derive_master_key,
+    derive_master_key_async,
+)
+
+from tests.fake_server import FakeVaultwarden
+from tests.mock_client import ORGANIZATION_ID
+
+try:
+    from argon2.low_level import Type, hash_secret_raw
+except ImportError:  # pragma: no cover
+    hash_secret_raw = None  # type: ignore[assignment]
+
+ARGON2 = KdfParams(KdfType.Argon2id, iterations=2, memory=8, parallelism=4)
+
+
+class TestKdf(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_cache()
+        self.addCleanup(clear_cache)
+
+    def test_pbkdf2(self):
+        self.assertEqual(
+            derive_master_key(
+                "password", "User@Example.com", KdfParams(iterations=1000)
+            ),
+            make_master_key("password", "user@example.com", 1000),
+        )
+
+    @unittest.skipIf(hash_secret_raw is None, "argon2-cffi is not installed")
+    def test_argon2id(self):
+        self.assertEqual(
+            derive_master_key("password", "User@Example.com", ARGON2),
+            hash_secret_raw(
+                b"password",
+                sha256(b"user@example.com").digest(),
+                time_cost=2,
+                memory_cost=8 * 1024,
+                parallelism=4,
+                hash_len=32,
+                type=Type.ID,
+            ),
+        )
+
+    def test_params(self):
+        token = ConnectToken(
+            Kdf=1,
+            KdfIterations=3,
+            KdfMemory=64,
+            KdfParallelism=4,
+            Key="",
+            PrivateKey="",
+            access_token="",
+            expires_in=0,
+            token_type="Bearer",
+            scope="api",
+        )
+        self.assertEqual(
+            KdfParams.from_settings(token),
+            KdfParams(KdfType.Argon2id, 3, 64, 4),
+        )
+        token.Kdf = 7
+        with self.assertRaises(BitwardenError):
+            KdfParams.from_settings(token)
+
+    def test_derived_once(self):
+        calls = []
+        release = threading.Event()
+
+        def derive(password, salt, params):
+            calls.append(password)
+            release.wait(5)
+            return password.encode()
+
+        derivations = {KdfType.PBKDF2_SHA256: derive}
+        with patch.dict(kdf.DERIVATIONS, derivations):
+            futures = [
+                derive_master_key_async("password", "a@b.c", KdfParams())
+                for _ in range(4)
+            ]
+            other = derive_master_key_async("other", "a@b.c", KdfParams())
+            release.set()
+            self.assertEqual({f.result() for f in futures}, {b"password"})
+            self.assertEqual(other.result(), b"other")
+            self.assertEqual(
+                derive_master_key("password", "A@B.C", KdfParams()),
+                b"password",
+            )
+        self.assertEqual(sorted(calls), ["other", "password"])
+
+    def test_failure_not_cached(self):
+        with self.assertRaises(BitwardenError):
+            derive_master_key(
+                "password", "a@b.c", KdfParams(KdfType.Argon2id, 2)
+            )
+        self.assertEqual(len(kdf._cache), 0)
+
+    @unittest.skipIf(hash_secret_raw is None, "argon2-cffi is not installed")
+    def test_argon2id_login(self):
+        server = FakeVaultwarden(kdf=ARGON2)
+        client = server.api_client()
+        self.assertEqual(
+            client.organization_key(ORGANIZATION_ID), server.org_key
+        )
+
+
+class TestClientMasterKey(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_cache()
+        self.addCleanup(clear_cache)
+        self.derived: list[KdfParams] = []
+
+        def derive(password, salt, params):
+            self.derived.append(params)
+            return make_master_key(password, salt, params.iterations)
+
+        patcher = patch.dict(kdf.DERIVATIONS, {KdfType.PBKDF2_SHA256: derive})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_prelogin_and_refresh(self):
+        server = FakeVaultwarden()
+        client = server.api_client()
+        key = client.organization_key(ORGANIZATION_ID)
+        self.assertEqual(key, server.org_key)
+        self.assertEqual(
+            server.requests["POST /identity/accounts/prelogin"], 1
+        )
+        self.assertEqual(self.derived, [server.kdf])
+
+        # the refresh reuses the master key, even out of the cache
+        clear_cache()
+        assert client.connect_token is not None
+        client.connect_token.expires_in = 0
+        client.sync(force_refresh=True)
+        self.assertEqual(server.requests["POST /identity/connect/token"], 2)
+        self.assertEqual(len(self.derived), 1)
+        self.assertEqual(client.organization_key(ORGANIZATION_ID), key)
+
+    def test_prelogin_mismatch_or_failure(self):
+        for response, derived in (
+            # the prelogin tells other parameters than the token
+            (httpx.Response(200, json={"kdfIterations": 1}), 2),
+            (httpx.Response(500), 1),
+        ):
+            clear_cache()
+            self.derived.clear()
+            server = FakeVaultwarden()
+            server._routes = [
+                (method, pattern, handler)
+                if "prelogin" not in pattern.pattern
+                else (method, pattern, lambda request, r=response: r)
+                for method, pattern, handler in server._routes
+            ]
+            client = server.api_client()
+            self.assertEqual(
+                client.organization_key(ORGANIZATION_ID), server.org_key
+            )
+            self.assertEqual(len(self.derived), derived)
+            self.assertEqual(self.derived[-1], server.kdf)
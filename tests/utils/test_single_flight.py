@@ -0,0 +1,124 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import unittest
+
+import httpx
+from vaultwarden.models.bitwarden import get_organization
+from vaultwarden.utils.single_flight import SingleFlight
+
+from tests.fake_server import FakeVaultwarden
+from tests.mock_client import ORGANIZATION_ID
+
+THREADS = 8
+
+
+def slow_transport(server: FakeVaultwarden) -> httpx.MockTransport:
+    """Keep the requests in flight long enough for the threads to meet"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(0.1)
+        return server.handler(request)
+
+    return httpx.MockTransport(handler)
+
+
+def run_together(func, count: int = THREADS) -> list:
+    barrier = threading.Barrier(count, timeout=5)
+
+    def call(_):
+        barrier.wait()
+        return func()
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        return list(executor.map(call, range(count)))
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_shared_result_and_error(self):
+        flights = SingleFlight()
+        calls = []
+
+        def call():
+            calls.append(1)
+            time.sleep(0.1)
+            return object()
+
+        results = run_together(lambda: flights.do("key", call))
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(flights.in_flight(), 0)
+        # done calls are not kept
+        self.assertIsNot(flights.do("key", call), results[0])
+
+        def fail():
+            time.sleep(0.1)
+            raise ValueError("failed")
+
+        def catch():
+            try:
+                flights.do("key", fail)
+            except ValueError as e:
+                return e
+
+        errors = run_together(catch)
+        self.assertIsInstance(errors[0], ValueError)
+        self.assertTrue(all(e is errors[0] for e in errors))
+
+    def test_api_client(self):
+        server = FakeVaultwarden()
+        server.add_org_users(
+            str(ORGANIZATION_ID), [f"user-{i}@example.com" for i in range(5)]
+        )
+        client = server.api_client(transport=slow_transport(server))
+        syncs = run_together(client.sync)
+        self.assertTrue(all(s is syncs[0] for s in syncs))
+        rosters = run_together(
+            lambda: get_organization(client, ORGANIZATION_ID).users()
+        )
+        # one parse, copied for each organization instance
+        self.assertEqual(
+            {tuple(user.Id for user in roster) for roster in rosters},
+            {tuple(user.Id for user in rosters[0])},
+        )
+        self.assertIsNot(rosters[0][0], rosters[1][0])
+        org_path = f"/api/organizations/{ORGANIZATION_ID}"
+        for request in (
+            "POST /identity/connect/token",
+            "GET /api/sync",
+            f"GET {org_path}",
+            f"GET {org_path}/users",
+        ):
+            self.assertEqual(server.requests[request], 1, request)
+
+    def test_admin_client(self):
+        server = FakeVaultwarden()
+        server.add_admin_users(["user@example.com"])
+        client = server.admin_client(transport=slow_transport(server))
+        run_together(lambda: client.users(force_refresh=True))
+        self.assertEqual(server.requests["POST /admin/"], 1)
+        self.assertEqual(server.requests["GET /admin/users"], 1)
+
+    def test_reload_after_write(self):
+        server = FakeVaultwarden()
+        server.add_admin_users(["user@example.com"])
+        loading = threading.Event()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            # answered with the users before the invitation, late
+            response = server.handler(request)
+            if request.url.path == "/admin/users" and not loading.is_set():
+                loading.set()
+                time.sleep(0.3)
+            return response
+
+        client = server.admin_client(transport=httpx.MockTransport(handler))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            load = executor.submit(client.users, force_refresh=True)
+            loading.wait(timeout=5)
+            self.assertTrue(client.invite("new@example.com"))
+            self.assertIsNotNone(client.get_user(email="new@example.com"))
+            load.result()
+        # the older shared load does not overwrite the fresh one
+        self.assertIsNotNone(client.get_user(email="new@example.com"))
+        self.assertEqual(server.requests["GET /admin/users"], 2)
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+import httpx
+from vaultwarden.utils.sync_cache import SyncCache
+
+from tests.mock_client import make_api_client, sync_payload
+
+
+class TestSyncCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "sync.sqlite3")
+        self.requests: list[str] = []
+        self.offline = False
+        # status answered for every request, like a proxy of a down server
+        self.status: int | None = None
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if self.offline:
+                raise httpx.ConnectError("unreachable", request=request)
+            if self.status is not None:
+                return httpx.Response(self.status, request=request)
+            self.requests.append(request.url.path)
+            if request.url.path == "/api/accounts/revision-date":
+                return httpx.Response(200, text="1")
+            return httpx.Response(200, text=sync_payload())
+
+        self.handler = handler
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def make_client(self, ttl: float, logged_in: bool = True):
+        client = make_api_client(self.handler)
+        client.sync_cache = SyncCache(self.path, ttl=ttl)
+        if not logged_in:
+            client._connect_token = None
+        return client
+
+    def test_fresh_cache_is_served_without_login(self):
+        self.make_client(ttl=60).sync()
+        self.assertEqual(
+            self.requests, ["/api/accounts/revision-date", "/api/sync"]
+        )
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+        client = self.make_client(ttl=60, logged_in=False)
+        sync = client.sync()
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(sync.Profile.Email, "test-account@example.com")
+        self.assertEqual(len(client.connect_token.user_key), 64)
+
+    def test_stale_cache_is_revalidated(self):
+        self.make_client(ttl=0).sync()
+        self.make_client(ttl=0).sync()
+        self.assertEqual(
+            self.requests,
+            [
+                "/api/accounts/revision-date",
+                "/api/sync",
+                "/api/accounts/revision-date",
+            ],
+        )
+
+    def test_stale_cache_is_served_offline(self):
+        self.make_client(ttl=0).sync()
+        self.offline = True
+        client = self.make_client(ttl=0, logged_in=False)
+        sync = client.sync()
+        self.assertEqual(sync.Profile.Email, "test-account@example.com")
+        client.sync_cache = None
+        with self.assertRaises(httpx.ConnectError):
+            client.sync(force_refresh=True)
+
+    def test_stale_cache_is_served_behind_a_proxy(self):
+        self.make_client(ttl=0).sync()
+        for status in (502, 503, 504):
+            self.status = status
+            client = self.make_client(ttl=0, logged_in=False)
+            with self.subTest(status=status):
+                sync = client.sync()
+                self.assertEqual(
+                    sync.Profile.Email, "test-account@example.com"
+                )
+        self.status = 401
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.make_client(ttl=0, logged_in=False).sync()
+
+    def test_sync_if_changed_fetches_the_revision_once(self):
+        client = self.make_client(ttl=60)
+        client.sync()
+        self.requests.clear()
+        client.sync_if_changed()
+        self.assertEqual(self.requests, ["/api/accounts/revision-date"])
+        # a new revision, the sync is fetched without asking it again
+        client._sync_revision = 0
+        self.requests.clear()
+        client.sync_if_changed()
+        self.assertEqual(
+            self.requests, ["/api/accounts/revision-date", "/api/sync"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+import httpx
+from vaultwarden.utils.transport import ConnectionPool
+
+from tests.fake_server import FakeVaultwarden
+from tests.mock_client import ORGANIZATION_ID
+
+
+class ClosingTransport(httpx.MockTransport):
+    closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class TestConnectionPool(unittest.TestCase):
+    def test_shared_by_clients(self):
+        server = FakeVaultwarden()
+        server.add_admin_users(["user@example.com"])
+        inner = ClosingTransport(server.handler)
+        with ConnectionPool(transport=inner) as pool:
+            api_client = server.api_client(transport=pool)
+            admin_client = server.admin_client(transport=pool)
+            self.assertEqual(
+                api_client.organization_key(ORGANIZATION_ID), server.org_key
+            )
+            self.assertEqual(len(admin_client.users()), 1)
+            api_client._http_client.close()
+            self.assertFalse(inner.closed)
+            self.assertEqual(len(admin_client.users(force_refresh=True)), 1)
+        self.assertTrue(inner.closed)
+
+    def test_limits(self):
+        pool = ConnectionPool(
+            max_connections=4, max_keepalive_connections=2, keepalive_expiry=1
+        )
+        self.addCleanup(pool.shutdown)
+        assert isinstance(pool.transport, httpx.HTTPTransport)
+        connections = pool.transport._pool
+        self.assertEqual(connections._max_connections, 4)
+        self.assertEqual(connections._max_keepalive_connections, 2)
+        self.assertEqual(connections._keepalive_expiry, 1)